@@ -0,0 +1,227 @@
+# aggregator/archive.py
+
+"""
+Persistent archive of every entry the aggregator has posted.
+
+Entries are stored in a SQLite database together with an FTS5 index over their
+title and overview, so past advisories can be searched by keyword, time range,
+feed and severity without scrolling through Discord history.
+
+Command line usage:
+    python -m aggregator.archive ransomware --feed CVEFeed --since 2025-01-01 --min-score 9
+"""
+
+import argparse
+import sqlite3
+import time
+import logging
+
+from aggregator.entry import to_timestamp
+from aggregator.severity import parse_severity
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    link TEXT NOT NULL UNIQUE,
+    title TEXT,
+    overview TEXT,
+    author TEXT,
+    feed_type TEXT,
+    severity TEXT,
+    severity_score REAL,
+    severity_label TEXT,
+    pub_date TEXT,
+    published_ts INTEGER,
+    archived_ts INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_entries_published ON entries(published_ts);
+CREATE INDEX IF NOT EXISTS idx_entries_feed ON entries(feed_type, published_ts);
+CREATE INDEX IF NOT EXISTS idx_entries_score ON entries(severity_score);
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(
+    title, overview, content='entries', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS entries_ai AFTER INSERT ON entries BEGIN
+    INSERT INTO entries_fts(rowid, title, overview) VALUES (new.id, new.title, new.overview);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_ad AFTER DELETE ON entries BEGIN
+    INSERT INTO entries_fts(entries_fts, rowid, title, overview)
+    VALUES ('delete', old.id, old.title, old.overview);
+END;
+"""
+
+RESULT_COLUMNS = (
+    "link", "title", "overview", "author", "feed_type",
+    "severity", "severity_score", "pub_date", "published_ts",
+)
+
+
+def build_match_query(keywords):
+    """
+    Turn user supplied keywords into an FTS5 MATCH expression.
+
+    Every keyword is quoted, so punctuation in terms like "CVE-2025-1234" is matched
+    literally instead of being interpreted as FTS5 syntax. All keywords must match.
+
+    :param keywords: Iterable of keyword strings.
+    :return: The MATCH expression.
+    """
+    terms = []
+    for keyword in keywords:
+        keyword = keyword.strip()
+        if keyword:
+            terms.append('"%s"' % keyword.replace('"', '""'))
+    return " AND ".join(terms)
+
+
+class EntryArchive:
+    """
+    EntryArchive stores posted entries in SQLite and answers search queries.
+
+    Writes are batched: add_entries() inserts a whole cycle's worth of entries in a
+    single transaction.
+    """
+
+    def __init__(self, path):
+        """
+        Open (and create if needed) the archive database.
+
+        :param path: Path of the SQLite database file.
+        """
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def add_entries(self, entries):
+        """
+        Insert a batch of entries. Entries whose link is already archived are ignored.
+
+        :param entries: Iterable of entry dictionaries.
+        :return: The number of newly archived entries.
+        """
+        now = int(time.time())
+        rows = []
+        for entry in entries:
+            link = entry.get("link", "")
+            if not link:
+                continue
+            severity = entry.get("severity")
+            score, label = parse_severity(severity)
+            rows.append((
+                link,
+                entry.get("title"),
+                entry.get("overview"),
+                entry.get("author"),
+                entry.get("feed_type"),
+                severity,
+                score,
+                label,
+                entry.get("pub_date"),
+                to_timestamp(entry.get("pub_date")),
+                now,
+            ))
+        if not rows:
+            return 0
+        with self.conn:
+            cursor = self.conn.executemany(
+                "INSERT OR IGNORE INTO entries (link, title, overview, author, feed_type, severity, "
+                "severity_score, severity_label, pub_date, published_ts, archived_ts) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            inserted = cursor.rowcount
+        logging.info("Archived %d new entries.", inserted)
+        return inserted
+
+    def search(self, keywords=None, since=None, until=None, feed=None,
+               severity=None, min_score=None, limit=50):
+        """
+        Search the archive. All given criteria must match.
+
+        :param keywords: Iterable of keywords matched against title and overview.
+        :param since: Only entries published at or after this date (string or timestamp).
+        :param until: Only entries published before this date (string or timestamp).
+        :param feed: Only entries from this feed type (e.g. "CVEFeed").
+        :param severity: Only entries with this severity label (e.g. "CRITICAL").
+        :param min_score: Only entries with a CVSS score of at least this value.
+        :param limit: Maximum number of results.
+        :return: A list of result dictionaries, newest first.
+        """
+        clauses = []
+        params = []
+        match = build_match_query(keywords or [])
+        if match:
+            source = "entries_fts JOIN entries ON entries.id = entries_fts.rowid"
+            clauses.append("entries_fts MATCH ?")
+            params.append(match)
+        else:
+            source = "entries"
+        if since is not None:
+            clauses.append("entries.published_ts >= ?")
+            params.append(since if isinstance(since, (int, float)) else to_timestamp(since))
+        if until is not None:
+            clauses.append("entries.published_ts < ?")
+            params.append(until if isinstance(until, (int, float)) else to_timestamp(until))
+        if feed:
+            clauses.append("entries.feed_type = ?")
+            params.append(feed)
+        if severity:
+            clauses.append("entries.severity_label = ?")
+            params.append(severity.upper())
+        if min_score is not None:
+            clauses.append("entries.severity_score >= ?")
+            params.append(min_score)
+
+        sql = "SELECT %s FROM %s" % (", ".join("entries." + c for c in RESULT_COLUMNS), source)
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY entries.published_ts DESC LIMIT ?"
+        params.append(limit)
+
+        cursor = self.conn.execute(sql, params)
+        return [dict(zip(RESULT_COLUMNS, row)) for row in cursor]
+
+    def close(self):
+        """Close the underlying database connection."""
+        self.conn.close()
+
+
+def main(argv=None):
+    """Command line interface for searching the archive."""
+    parser = argparse.ArgumentParser(description="Search the ThreatFeed HQ entry archive.")
+    parser.add_argument("keywords", nargs="*", help="Keywords matched against title and overview")
+    parser.add_argument("--db", default="archive.db", help="Path of the archive database")
+    parser.add_argument("--since", help="Only entries published on or after this date")
+    parser.add_argument("--until", help="Only entries published before this date")
+    parser.add_argument("--feed", help="Only entries from this feed type, e.g. CVEFeed")
+    parser.add_argument("--severity", help="Only entries with this severity label, e.g. CRITICAL")
+    parser.add_argument("--min-score", type=float, help="Only entries with at least this CVSS score")
+    parser.add_argument("--limit", type=int, default=50, help="Maximum number of results")
+    args = parser.parse_args(argv)
+
+    archive = EntryArchive(args.db)
+    try:
+        started = time.perf_counter()
+        results = archive.search(
+            keywords=args.keywords,
+            since=args.since,
+            until=args.until,
+            feed=args.feed,
+            severity=args.severity,
+            min_score=args.min_score,
+            limit=args.limit,
+        )
+        elapsed_ms = (time.perf_counter() - started) * 1000
+    finally:
+        archive.close()
+
+    for result in results:
+        severity = " [%s]" % result["severity"] if result["severity"] not in (None, "N/A") else ""
+        print("%s  %-20s%s %s" % (result["pub_date"], result["feed_type"], severity, result["title"]))
+        print("    %s" % result["link"])
+    print("%d result(s) in %.1f ms" % (len(results), elapsed_ms))
+
+
+if __name__ == "__main__":
+    main()
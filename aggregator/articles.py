@@ -0,0 +1,273 @@
+# aggregator/articles.py
+
+"""
+Linked-article enrichment.
+
+Some feeds carry weak descriptions: GitHub and Microsoft advisories are often empty or
+boilerplate, and Sophos falls back to the raw description when the summary block is
+missing. ArticleEnricher fetches the linked page of new entries from such feeds and
+replaces the overview with a better one extracted from the page.
+
+  - Fetches run on a bounded thread pool, with a per-host concurrency limit and timeout.
+  - Responses are kept in a content-addressed on-disk cache: bodies are stored once
+    under the SHA-256 of their content and an index maps each URL to its body, so
+    retries and restarts never fetch a page twice.
+  - Enrichment never delays delivery past the deadline: an entry whose page is not
+    ready in time is delivered with its feed overview (the fetch still completes and
+    fills the cache).
+
+Cache layout:
+    <cache_dir>/index/<sha256(url)>.json     {"url", "status", "object", "fetched_at"}
+    <cache_dir>/objects/<ab>/<sha256(body)>.gz
+"""
+
+import os
+import gzip
+import json
+import time
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from urllib.parse import urlparse
+
+from aggregator.entry import truncate_words, OVERVIEW_WORDS
+
+USER_AGENT = "ThreatFeedHQ/1.0 (+article enrichment)"
+# Pages are read up to this size; article text is practically always near the top.
+MAX_BODY_BYTES = 2 * 1024 * 1024
+# Paragraphs shorter than this are navigation, bylines or captions.
+MIN_PARAGRAPH_WORDS = 8
+TRANSIENT_STATUSES = (408, 425, 429)
+NOISE_TAGS = ("script", "style", "nav", "header", "footer", "aside", "form", "noscript", "svg")
+
+
+def extract_overview(html_text):
+    """
+    Extract a readable overview from an article or advisory page.
+
+    Paragraph text of the page's <article> or <main> element is preferred; the page's
+    description meta tags are the fallback.
+
+    :param html_text: HTML document.
+    :return: Overview truncated to OVERVIEW_WORDS words, or None if nothing usable was found.
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html_text, "html.parser")
+    meta = soup.find("meta", attrs={"property": "og:description"}) or soup.find("meta", attrs={"name": "description"})
+    for tag in soup(NOISE_TAGS):
+        tag.decompose()
+    container = soup.find("article") or soup.find("main") or soup.body or soup
+    paragraphs = []
+    words = 0
+    for paragraph in container.find_all("p"):
+        text = paragraph.get_text(" ", strip=True)
+        count = len(text.split())
+        if count >= MIN_PARAGRAPH_WORDS:
+            paragraphs.append(text)
+            words += count
+            if words >= OVERVIEW_WORDS:
+                break
+    if words >= OVERVIEW_WORDS // 2:
+        return truncate_words(" ".join(paragraphs))
+    description = meta.get("content", "").strip() if meta is not None else ""
+    if len(description.split()) >= MIN_PARAGRAPH_WORDS:
+        return truncate_words(description)
+    if paragraphs:
+        return truncate_words(" ".join(paragraphs))
+    return None
+
+
+class ResponseCache:
+    """Content-addressed on-disk cache of fetched pages."""
+
+    def __init__(self, cache_dir):
+        """
+        :param cache_dir: Directory holding the index and object store.
+        """
+        self.index_dir = os.path.join(cache_dir, "index")
+        self.objects_dir = os.path.join(cache_dir, "objects")
+        os.makedirs(self.index_dir, exist_ok=True)
+        os.makedirs(self.objects_dir, exist_ok=True)
+
+    def _index_path(self, url):
+        return os.path.join(self.index_dir, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest + ".gz")
+
+    @staticmethod
+    def _write_atomic(path, data):
+        temporary = "%s.%d.tmp" % (path, threading.get_ident())
+        with open(temporary, "wb") as f:
+            f.write(data)
+        os.replace(temporary, path)
+
+    def get(self, url):
+        """
+        :param url: Page URL.
+        :return: A (status, body) tuple for a cached URL (body is None for cached HTTP
+            errors), or None if the URL was never fetched.
+        """
+        try:
+            with open(self._index_path(url), "r", encoding="utf-8") as f:
+                record = json.load(f)
+            if not record.get("object"):
+                return record.get("status"), None
+            with gzip.open(self._object_path(record["object"]), "rb") as f:
+                return record.get("status"), f.read()
+        except (OSError, ValueError):
+            return None
+
+    def put(self, url, status, body):
+        """
+        Store a response. Identical bodies (e.g. the same page under several URLs) are stored once.
+
+        :param url: Page URL.
+        :param status: HTTP status code.
+        :param body: Response body, or None for HTTP errors.
+        """
+        digest = None
+        if body is not None:
+            digest = hashlib.sha256(body).hexdigest()
+            path = self._object_path(digest)
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                self._write_atomic(path, gzip.compress(body))
+        record = {"url": url, "status": status, "object": digest, "fetched_at": int(time.time())}
+        self._write_atomic(self._index_path(url), json.dumps(record).encode("utf-8"))
+
+
+class ArticleEnricher:
+    """
+    ArticleEnricher improves the overviews of new entries from their linked pages.
+
+    Usage:
+        enricher.submit(entry)  # as soon as the entry is known to be new
+        enricher.wait(entry)    # right before delivery; returns by the entry's deadline
+    """
+
+    def __init__(self, cache_dir, feeds, workers=8, per_host=2, timeout=10, deadline=5):
+        """
+        :param cache_dir: Directory of the on-disk response cache.
+        :param feeds: Feed types whose entries are enriched.
+        :param workers: Maximum number of concurrent fetches.
+        :param per_host: Maximum number of concurrent fetches per host.
+        :param timeout: Connect/read timeout of a fetch in seconds.
+        :param deadline: Maximum seconds an entry waits for enrichment after submission.
+        """
+        self.cache = ResponseCache(cache_dir)
+        self.feeds = set(feeds)
+        self.per_host = per_host
+        self.timeout = timeout
+        self.deadline = deadline
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="article")
+        self.lock = threading.Lock()
+        self.host_limits = {}
+        self.pending = {}
+        self.stats = {"enriched": 0, "late": 0, "cached": 0, "fetched": 0, "failed": 0}
+
+    def _host_limit(self, url):
+        host = urlparse(url).hostname or ""
+        with self.lock:
+            limit = self.host_limits.get(host)
+            if limit is None:
+                limit = self.host_limits[host] = threading.BoundedSemaphore(self.per_host)
+            return limit
+
+    def _fetch(self, url):
+        cached = self.cache.get(url)
+        if cached is not None:
+            with self.lock:
+                self.stats["cached"] += 1
+            return cached
+        import requests
+
+        with self._host_limit(url):
+            with requests.get(url, timeout=self.timeout, stream=True,
+                              headers={"User-Agent": USER_AGENT}) as response:
+                status = response.status_code
+                body = None
+                if status < 400:
+                    buffer = bytearray()
+                    for chunk in response.iter_content(64 * 1024):
+                        buffer.extend(chunk)
+                        if len(buffer) >= MAX_BODY_BYTES:
+                            break
+                    body = bytes(buffer)
+        with self.lock:
+            self.stats["fetched"] += 1
+        # Network errors raised above, rate limits and server errors are transient and
+        # retried next time; pages and permanent HTTP errors are cached.
+        if status in TRANSIENT_STATUSES or status >= 500:
+            raise IOError("HTTP status %s" % status)
+        self.cache.put(url, status, body)
+        return status, body
+
+    def _overview(self, url):
+        try:
+            status, body = self._fetch(url)
+            if body is None:
+                return None
+            return extract_overview(body.decode("utf-8", errors="replace"))
+        except Exception as e:
+            logging.warning("Article enrichment failed for %s: %s", url, e)
+            with self.lock:
+                self.stats["failed"] += 1
+            return None
+
+    def submit(self, entry):
+        """
+        Start enriching an entry if its feed is configured for it.
+
+        The entry itself is not touched by the fetch; wait() applies the result.
+
+        :param entry: Entry record.
+        """
+        link = entry.link or ""
+        if entry.feed_type not in self.feeds or not link.startswith(("http://", "https://")):
+            return
+        future = self.executor.submit(self._overview, link)
+        with self.lock:
+            # The entry is kept referenced so its id cannot be reused while pending.
+            self.pending[id(entry)] = (entry, future, time.monotonic() + self.deadline)
+
+    def wait(self, entry):
+        """
+        Wait (at most until the entry's deadline) for its enrichment and apply it.
+
+        The overview is only replaced if the page yields more text than the feed did.
+
+        :param entry: Entry record passed to submit() earlier.
+        :return: True if the overview was replaced.
+        """
+        with self.lock:
+            pending = self.pending.pop(id(entry), None)
+        if pending is None:
+            return False
+        _, future, deadline = pending
+        try:
+            overview = future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except TimeoutError:
+            with self.lock:
+                self.stats["late"] += 1
+            logging.info("Article enrichment for %s missed its deadline.", entry.link)
+            return False
+        if not overview or len(overview.split()) <= len((entry.overview or "").split()):
+            return False
+        entry.overview = overview
+        with self.lock:
+            self.stats["enriched"] += 1
+        return True
+
+    def log_summary(self):
+        """Log the enrichment counters."""
+        with self.lock:
+            stats = dict(self.stats)
+        logging.info("Article enrichment: %(enriched)d enriched, %(late)d past deadline, "
+                     "%(fetched)d fetched, %(cached)d from cache, %(failed)d failed.", stats)
+
+    def close(self):
+        """Stop the fetch pool without waiting for running fetches."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
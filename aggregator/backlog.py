@@ -0,0 +1,228 @@
+# aggregator/backlog.py
+
+"""
+Backpressure for Discord delivery after an outage or a long downtime.
+
+The first cycle after a gap finds every unseen item of every feed at once. Queuing all of
+them in memory and draining them at the cycle boundary would stall polling for as long as
+Discord's rate limit takes to work through them, with fresh alerts stuck behind hours of
+backlog. Instead the Discord sink keeps a bounded number of deliveries in memory and
+spills the rest to disk:
+
+  - DeliveryBacklog is the catch-up lane: a durable SQLite FIFO of deliveries (it also
+    survives restarts, so catch-up resumes where it stopped).
+  - RateBudget tracks the rate-limit headers Discord returns per webhook, so posts are
+    paced to the remaining budget instead of running into 429s; catch-up deliveries only
+    use budget beyond a reserve kept free for fresh entries.
+
+Catch-up runs on the sink's worker thread whenever no fresh deliveries are waiting, and
+the cycle boundary does not wait for deliveries at all, so polling continues at full speed.
+"""
+
+import json
+import time
+import sqlite3
+from collections import deque
+
+from aggregator.entry import Entry
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS backlog_items (
+    id INTEGER PRIMARY KEY,
+    priority TEXT NOT NULL,
+    enqueued_at REAL NOT NULL,
+    webhooks TEXT NOT NULL,
+    entry TEXT NOT NULL
+);
+"""
+
+# Rows read from disk at a time; only these are held in memory.
+PREFETCH_ROWS = 32
+# Lower than every row id (prepend() gives rows ids below 1).
+MIN_ROW_ID = -(1 << 63)
+
+
+class BacklogItem:
+    """A delivery waiting in the catch-up lane."""
+
+    __slots__ = ("id", "entry", "webhook_urls", "priority", "enqueued_at")
+
+    def __init__(self, item_id, entry, webhook_urls, priority, enqueued_at):
+        self.id = item_id
+        self.entry = entry
+        self.webhook_urls = webhook_urls
+        self.priority = priority
+        self.enqueued_at = enqueued_at
+
+
+class DeliveryBacklog:
+    """
+    DeliveryBacklog stores spilled deliveries on disk, oldest first.
+
+    Usage:
+        backlog.add(entry, webhook_urls, "normal")
+        item = backlog.peek()
+        posted = post_to_discord(item.entry, item.webhook_urls)
+        if len(posted) == len(item.webhook_urls):
+            backlog.remove(item)
+        else:
+            backlog.retain(item, [url for url in item.webhook_urls if url not in posted])
+
+    A row is only deleted once it has been delivered to every webhook, so nothing is lost
+    if a post fails or the aggregator stops halfway through catch-up.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: Path of the SQLite database file.
+        """
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.count = self.conn.execute("SELECT COUNT(*) FROM backlog_items").fetchone()[0]
+        self.prefetched = deque()
+        self.last_id = MIN_ROW_ID
+
+    def __len__(self):
+        return self.count
+
+    def add(self, entry, webhook_urls, priority, now=None):
+        """
+        Spill a delivery to disk.
+
+        :param entry: Entry record.
+        :param webhook_urls: List of webhook URLs.
+        :param priority: Priority class name.
+        :param now: Enqueue time (defaults to time.time()).
+        """
+        now = time.time() if now is None else now
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO backlog_items (priority, enqueued_at, webhooks, entry) VALUES (?, ?, ?, ?)",
+                (priority, now, json.dumps(webhook_urls), json.dumps(entry.to_dict(), ensure_ascii=False)),
+            )
+        self.count += 1
+
+    def prepend(self, items):
+        """
+        Put deliveries in front of all waiting ones, keeping their order.
+
+        :param items: List of (entry, webhook_urls, priority, enqueued_at) tuples.
+        """
+        if not items:
+            return
+        first = self.conn.execute("SELECT MIN(id) FROM backlog_items").fetchone()[0]
+        if first is None:
+            first = 1
+        rows = [(first - len(items) + position, priority, enqueued_at, json.dumps(webhook_urls),
+                 json.dumps(entry.to_dict(), ensure_ascii=False))
+                for position, (entry, webhook_urls, priority, enqueued_at) in enumerate(items)]
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO backlog_items (id, priority, enqueued_at, webhooks, entry) VALUES (?, ?, ?, ?, ?)", rows)
+        self.count += len(items)
+        # Read again from the new front.
+        self.prefetched.clear()
+        self.last_id = MIN_ROW_ID
+
+    def peek(self):
+        """
+        :return: The oldest undelivered BacklogItem, or None if the backlog is empty.
+        """
+        if not self.prefetched and self.count:
+            rows = self.conn.execute(
+                "SELECT id, priority, enqueued_at, webhooks, entry FROM backlog_items "
+                "WHERE id > ? ORDER BY id LIMIT ?", (self.last_id, PREFETCH_ROWS))
+            for item_id, priority, enqueued_at, webhooks, entry in rows:
+                self.prefetched.append(BacklogItem(item_id, Entry.from_dict(json.loads(entry)),
+                                                   json.loads(webhooks), priority, enqueued_at))
+                self.last_id = item_id
+        return self.prefetched[0] if self.prefetched else None
+
+    def remove(self, item):
+        """
+        Delete a delivered item.
+
+        :param item: The BacklogItem returned by peek().
+        """
+        if self.prefetched and self.prefetched[0] is item:
+            self.prefetched.popleft()
+        with self.conn:
+            self.conn.execute("DELETE FROM backlog_items WHERE id = ?", (item.id,))
+        self.count -= 1
+
+    def retain(self, item, webhook_urls):
+        """
+        Keep a partially delivered item for the webhooks it could not be posted to.
+
+        :param item: The BacklogItem returned by peek(); it stays at the front.
+        :param webhook_urls: Webhook URLs still waiting for the item.
+        """
+        with self.conn:
+            self.conn.execute("UPDATE backlog_items SET webhooks = ? WHERE id = ?",
+                              (json.dumps(webhook_urls), item.id))
+        item.webhook_urls = webhook_urls
+
+    def close(self):
+        """Close the underlying database connection."""
+        self.conn.close()
+
+
+class RateBudget:
+    """
+    RateBudget tracks Discord's per-webhook rate-limit budget.
+
+    Discord reports the requests left in the current window (X-RateLimit-Remaining) and the
+    seconds until it resets (X-RateLimit-Reset-After) on every response; a 429 carries
+    retry_after instead. Webhooks without these headers are never delayed.
+    """
+
+    def __init__(self):
+        # url -> (remaining requests, monotonic time the window resets)
+        self.windows = {}
+
+    def update(self, url, headers, now=None):
+        """
+        Record the budget reported by a response.
+
+        :param url: Webhook URL.
+        :param headers: Response headers (case-insensitive mapping).
+        :param now: Current monotonic time (defaults to time.monotonic()).
+        """
+        now = time.monotonic() if now is None else now
+        try:
+            remaining = int(headers["X-RateLimit-Remaining"])
+            reset_after = float(headers["X-RateLimit-Reset-After"])
+        except (KeyError, TypeError, ValueError):
+            return
+        self.windows[url] = (remaining, now + reset_after)
+
+    def exhausted(self, url, retry_after, now=None):
+        """
+        Record a 429: no requests are left until retry_after seconds from now.
+
+        :param url: Webhook URL.
+        :param retry_after: Seconds Discord asked to wait.
+        :param now: Current monotonic time (defaults to time.monotonic()).
+        """
+        now = time.monotonic() if now is None else now
+        self.windows[url] = (0, now + retry_after)
+
+    def delay(self, url, reserve=0, now=None):
+        """
+        :param url: Webhook URL.
+        :param reserve: Requests of the current window that must stay unused.
+        :param now: Current monotonic time (defaults to time.monotonic()).
+        :return: Seconds to wait before a request to the webhook fits the budget.
+        """
+        window = self.windows.get(url)
+        if window is None:
+            return 0.0
+        now = time.monotonic() if now is None else now
+        remaining, reset_at = window
+        if now >= reset_at:
+            del self.windows[url]
+            return 0.0
+        if remaining > reserve:
+            return 0.0
+        return reset_at - now
@@ -1,11 +1,32 @@
 # aggregator/base_feed.py
 
+
+# HTTP statuses that say nothing about the feed itself: retry later.
+TRANSIENT_STATUSES = (408, 429)
+
+
+class FeedError(Exception):
+    """Raised when a loaded feed is unusable (HTTP error, not a feed, unparseable)."""
+
+    def __init__(self, message, transient=False):
+        """
+        :param message: Description of the problem.
+        :param transient: True if the feed is likely fine and the error is on the way to
+            it (network error, server error, rate limit).
+        """
+        super().__init__(message)
+        self.transient = transient
+
+
 class BaseFeed:
     """
     BaseFeed is an abstract class that defines a common interface for RSS feed parsers.
     All subclasses must implement the load() and get_entries() methods.
     """
 
+    # Maximum number of items read by feeds that load with aggregator.streaming.stream_parse().
+    stream_max_items = 200
+
     def __init__(self, url):
         """
         Initialize the BaseFeed instance with the given URL.
@@ -14,6 +35,10 @@ class BaseFeed:
         """
         self.url = url
         self.feed = None
+        # Optional predicate telling streaming feeds which links were already processed.
+        self.seen = None
+        # Epoch time the feed was last fetched (stamped on its entries as first_seen).
+        self.fetched_at = None
 
     def load(self):
         """
@@ -25,11 +50,43 @@ class BaseFeed:
     def get_entries(self):
         """
         Retrieve a list of entries from the RSS feed in a standardized format.
-        Each entry should be a dictionary with keys such as 'title', 'pub_date',
-        'link', and 'overview'.
+        Each entry should be an aggregator.entry.Entry with fields such as 'title',
+        'pub_date', 'link', and 'overview'.
         
         This method must be implemented by subclasses.
         
-        :return: A list of dictionaries representing feed entries.
+        :return: A list of Entry records representing feed entries.
         """
         raise NotImplementedError("Subclasses must implement the get_entries() method.")
+
+    def validate(self):
+        """
+        Check that the loaded feed is usable.
+
+        feedparser rarely raises: a moved page, an HTTP error or an HTML document instead
+        of RSS yields a "bozo" result with zero entries. Such results are reported as errors
+        so feed health tracking can back off. Network errors, server errors and rate limits
+        are flagged as transient, since they say nothing about the feed itself.
+
+        :raises FeedError: If the feed returned an HTTP error or could not be parsed.
+        """
+        if self.feed is None:
+            raise FeedError("Feed has not been loaded.")
+        status = self.feed.get("status")
+        if status is not None and status >= 400:
+            raise FeedError("HTTP status %s" % status, transient=status >= 500 or status in TRANSIENT_STATUSES)
+        if not self.feed.get("entries") and self.feed.get("bozo"):
+            problem = self.feed.get("bozo_exception", "no entries")
+            # feedparser and stream_parse() report connection failures and timeouts as bozo.
+            if isinstance(problem, OSError):
+                raise FeedError("Network error: %s" % problem, transient=True)
+            raise FeedError("Not a valid feed: %s" % problem)
+
+    def release(self):
+        """
+        Drop the parsed feed once its entries have been extracted.
+
+        The feedparser result holds the whole document and every raw entry; releasing it
+        right after get_entries() keeps only the compact Entry records alive.
+        """
+        self.feed = None
@@ -2,6 +2,7 @@ import feedparser
 from bs4 import BeautifulSoup
 import html
 from aggregator.base_feed import BaseFeed
+from aggregator.entry import Entry, truncate_words
 
 class BleepingComputerFeed(BaseFeed):
     """
@@ -25,7 +26,7 @@ class BleepingComputerFeed(BaseFeed):
         """
         Process each entry in the ZDI RSS feed and extract the required fields.
 
-        :return: A list of dictionaries representing the feed entries.
+        :return: A list of Entry records representing the feed entries.
         """
         entries = []
         for entry in self.feed.entries:
@@ -44,15 +45,14 @@ class BleepingComputerFeed(BaseFeed):
             overview_text = overview_text.replace("<![CDATA[", "").replace("]]>", "")
 
             # Limit the overview text to the first 40 words.
-            words = overview_text.split()
-            overview_limited = " ".join(words[:40])
-
-            entries.append({
-                "title": title,
-                "pub_date": pub_date,
-                "link": link,
-                "author": author,
-                "overview": overview_limited
-            })
+            overview_limited = truncate_words(overview_text)
+
+            entries.append(Entry(
+                title=title,
+                pub_date=pub_date,
+                link=link,
+                author=author,
+                overview=overview_limited
+            ))
 
         return entries
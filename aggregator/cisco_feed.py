@@ -2,6 +2,7 @@ import feedparser
 from bs4 import BeautifulSoup
 import html
 from aggregator.base_feed import BaseFeed
+from aggregator.entry import Entry, truncate_words
 
 class CiscoFeed(BaseFeed):
     """
@@ -32,7 +33,7 @@ class CiscoFeed(BaseFeed):
             The text is truncated to the first 40 words.
           - Any text starting with "More RSS Feeds:" is removed.
         
-        :return: A list of dictionaries representing the feed entries.
+        :return: A list of Entry records representing the feed entries.
         """
         entries = []
         for entry in self.feed.entries:
@@ -59,14 +60,13 @@ class CiscoFeed(BaseFeed):
                 overview_text = overview_text.split("More RSS Feeds:")[0].strip()
             
             # Limit the overview text to the first 40 words.
-            words = overview_text.split()
-            overview_limited = " ".join(words[:40])
+            overview_limited = truncate_words(overview_text)
             
-            entries.append({
-                "title": title,
-                "pub_date": pub_date,
-                "link": link,
-                "author": author,
-                "overview": overview_limited
-            })
+            entries.append(Entry(
+                title=title,
+                pub_date=pub_date,
+                link=link,
+                author=author,
+                overview=overview_limited
+            ))
         return entries
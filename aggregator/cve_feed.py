@@ -1,8 +1,9 @@
-import feedparser
 from bs4 import BeautifulSoup
 import html
 import re
 from aggregator.base_feed import BaseFeed
+from aggregator.streaming import stream_parse
+from aggregator.entry import Entry, truncate_words
 
 class CVEFeed(BaseFeed):
     """
@@ -18,7 +19,8 @@ class CVEFeed(BaseFeed):
     """
 
     def load(self):
-        self.feed = feedparser.parse(self.url)
+        # latest.xml is large and mostly already posted: only its newest items are read.
+        self.feed = stream_parse(self.url, self.stream_max_items, self.seen)
 
     def get_entries(self):
         entries = []
@@ -47,16 +49,15 @@ class CVEFeed(BaseFeed):
                 severity_value = "N/A"
 
             # Limit the overview text to the first 40 words
-            words = description_text.split()
-            overview_limited = " ".join(words[:40])
-
-            entries.append({
-                "title": title,
-                "pub_date": pub_date,
-                "link": link,
-                "author": author,
-                "overview": overview_limited,
-                "severity": severity_value
-            })
+            overview_limited = truncate_words(description_text)
+
+            entries.append(Entry(
+                title=title,
+                pub_date=pub_date,
+                link=link,
+                author=author,
+                overview=overview_limited,
+                severity=severity_value
+            ))
 
         return entries
@@ -0,0 +1,254 @@
+# aggregator/dedup.py
+
+"""
+Near-duplicate story detection across news feeds.
+
+News outlets often cover the same incident under different URLs, which the exact-match
+dedup on `link` cannot catch. Rewrites by different outlets keep the names, products and
+key terms of a story but reorder and reword the rest, so NearDuplicateDetector compares
+entries by the Jaccard similarity of their word shingles (the tokens of title and
+overview). CVE ids are decisive where both entries name some: coverage sharing a CVE id
+is the same story however differently it is worded, and entries naming only different
+CVE ids are different stories however similar their wording.
+
+Entries are kept in an inverted index from shingle to the entries containing it, over a
+sliding time window. Near-duplicates share a good part of their shingles, and the rarest
+shingles of an entry (its names, products and identifiers) are the ones a rewrite keeps,
+so a lookup probes only the PROBE_SHINGLES rarest shingles of the entry and, for each,
+the PROBE_DEPTH most recent entries containing it (plus all entries sharing a CVE id).
+Candidates are confirmed on their exact Jaccard similarity. A lookup therefore costs at
+most PROBE_SHINGLES * PROBE_DEPTH comparisons however much history is retained; the price
+is that a rewrite sharing none of its rare shingles with an older story, or only shingles
+that many newer entries contain, is missed.
+
+tools/dedup_check.py checks the threshold against real-world coverage pairs.
+
+The window can be saved to and loaded from a JSON file, so single-cycle (--once) runs
+and restarts still recognise stories posted by earlier runs.
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+from collections import deque
+from itertools import islice
+
+# Jaccard similarity from which entries count as near-duplicates, unless configured.
+DEFAULT_THRESHOLD = 0.3
+# Number of rarest shingles of an entry whose postings a lookup scans.
+PROBE_SHINGLES = 6
+# Most recent entries scanned per probed shingle.
+PROBE_DEPTH = 30
+_TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9\-]*[a-z0-9]|[a-z0-9]")
+_CVE_PATTERN = re.compile(r"^cve-\d{4}-\d{4,}$")
+
+STOPWORDS = frozenset("""
+a about after all also an and are as at be been but by can could for from has have
+how in into is it its just more new not of on or our over says than that the their
+this to up was were what when which who will with you your
+""".split())
+
+
+def tokenize(text):
+    """
+    Split text into lowercase tokens, dropping stopwords and single characters.
+
+    :param text: Plain text.
+    :return: List of tokens.
+    """
+    return [t for t in _TOKEN_PATTERN.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def _feature_hash(feature):
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def shingles(title, overview):
+    """
+    Collect the word shingles of an entry's text.
+
+    :param title: Entry title.
+    :param overview: Entry overview.
+    :return: Set of hashed shingles.
+    """
+    return {_feature_hash(token) for token in tokenize((title or "") + " " + (overview or ""))}
+
+
+def cve_ids(title, overview):
+    """
+    :param title: Entry title.
+    :param overview: Entry overview.
+    :return: Frozen set of the lowercase CVE ids named in the entry's text.
+    """
+    tokens = tokenize((title or "") + " " + (overview or ""))
+    return frozenset(token for token in tokens if _CVE_PATTERN.match(token))
+
+
+def jaccard(first, second):
+    """
+    :return: Jaccard similarity of two sets (0.0 if both are empty).
+    """
+    if not first and not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+class NearDuplicateDetector:
+    """
+    NearDuplicateDetector finds entries whose text is nearly identical to a recent one.
+
+    Usage:
+        original = detector.check(entry)
+        if original is not None:
+            ...  # entry covers the same story as the entry linked by `original`
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, window_seconds=72 * 3600):
+        """
+        :param threshold: Minimum Jaccard similarity of the shingles of near-duplicates.
+        :param window_seconds: How long an entry stays in the index.
+        """
+        self.threshold = threshold
+        self.window_seconds = window_seconds
+        self.postings = {}
+        self.cves = {}
+        self.history = deque()
+
+    def __len__(self):
+        return len(self.history)
+
+    @staticmethod
+    def _unlink(index, key, record):
+        # Postings are in insertion order, so the expiring record is normally the oldest.
+        posting = index.get(key)
+        if posting is None:
+            return
+        if posting[0] is record:
+            posting.popleft()
+        else:
+            try:
+                posting.remove(record)
+            except ValueError:
+                pass
+        if not posting:
+            del index[key]
+
+    def _expire(self, now):
+        cutoff = now - self.window_seconds
+        while self.history and self.history[0][0] < cutoff:
+            _, record = self.history.popleft()
+            for shingle in record[2]:
+                self._unlink(self.postings, shingle, record)
+            for cve in record[3]:
+                self._unlink(self.cves, cve, record)
+
+    def _candidates(self, shingle_set, cves):
+        postings = self.postings
+        rarest = sorted((len(postings[shingle]), shingle) for shingle in shingle_set if shingle in postings)
+        for _, shingle in rarest[:PROBE_SHINGLES]:
+            yield from islice(reversed(postings[shingle]), PROBE_DEPTH)
+        for cve in cves:
+            yield from self.cves.get(cve, ())
+
+    def find(self, shingle_set, cves=frozenset(), now=None):
+        """
+        Look up an entry without adding it to the index.
+
+        :param shingle_set: Hashed shingles of the entry (see shingles()).
+        :param cves: CVE ids named by the entry (see cve_ids()).
+        :param now: Current time (defaults to time.time()).
+        :return: The (link, feed_type, shingles, cves) record of the closest match, or None.
+        """
+        self._expire(time.time() if now is None else now)
+        best = None
+        best_similarity = -1.0
+        seen = set()
+        for record in self._candidates(shingle_set, cves):
+            if id(record) in seen:
+                continue
+            seen.add(id(record))
+            similarity = jaccard(record[2], shingle_set)
+            if cves and record[3]:
+                if not cves & record[3]:
+                    continue
+            elif similarity < self.threshold:
+                continue
+            if similarity > best_similarity:
+                best, best_similarity = record, similarity
+        return best
+
+    def add(self, shingle_set, link, feed_type=None, cves=frozenset(), now=None):
+        """
+        Add an entry to the index.
+
+        :param shingle_set: Hashed shingles of the entry (see shingles()).
+        :param link: Link of the entry.
+        :param feed_type: Feed type of the entry.
+        :param cves: CVE ids named by the entry (see cve_ids()).
+        :param now: Current time (defaults to time.time()).
+        """
+        record = (link, feed_type, frozenset(shingle_set), frozenset(cves))
+        for shingle in record[2]:
+            self.postings.setdefault(shingle, deque()).append(record)
+        for cve in record[3]:
+            self.cves.setdefault(cve, deque()).append(record)
+        self.history.append((time.time() if now is None else now, record))
+
+    def check(self, entry, now=None):
+        """
+        Check an entry against the index and remember it if it is not a near-duplicate.
+
+        Near-duplicates are not added themselves, so later coverage keeps pointing at the
+        first entry of the story.
+
+        :param entry: Entry record.
+        :param now: Current time (defaults to time.time()).
+        :return: Link of the earlier entry covering the same story, or None.
+        """
+        title, overview = entry.get("title", ""), entry.get("overview", "")
+        shingle_set = shingles(title, overview)
+        if not shingle_set:
+            return None
+        cves = cve_ids(title, overview)
+        match = self.find(shingle_set, cves, now)
+        if match is not None and match[0] != entry.get("link"):
+            return match[0]
+        if match is None:
+            self.add(shingle_set, entry.get("link"), entry.get("feed_type"), cves, now)
+        return None
+
+    def load(self, path):
+        """
+        Restore the window saved by save(); entries older than the window are dropped.
+
+        :param path: JSON state file (a missing file leaves the index empty).
+        """
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                records = json.load(f)
+            for added, link, feed_type, shingle_list, cves in records:
+                self.add(frozenset(shingle_list), link, feed_type, frozenset(cves), now=added)
+        except (ValueError, TypeError, OSError) as e:
+            logging.error("Error loading near-duplicate state: %s", e)
+        self._expire(time.time())
+
+    def save(self, path):
+        """
+        Persist the current window.
+
+        :param path: JSON state file.
+        """
+        records = [[added, link, feed_type, sorted(shingle_set), sorted(cves)]
+                   for added, (link, feed_type, shingle_set, cves) in self.history]
+        temporary = path + ".tmp"
+        try:
+            with open(temporary, "w", encoding="utf-8") as f:
+                json.dump(records, f)
+            os.replace(temporary, path)
+        except OSError as e:
+            logging.error("Failed to save near-duplicate state: %s", e)
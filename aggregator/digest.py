@@ -0,0 +1,182 @@
+# aggregator/digest.py
+
+"""
+Digest mode for low-priority feeds.
+
+Instead of one Discord request per entry and webhook, entries of digest feeds (or for
+digest webhooks) are buffered durably in SQLite and sent as one compact multi-item
+message per webhook once their window has elapsed. The buffer survives restarts, so
+buffered entries are never lost even though they are already marked as processed.
+"""
+
+import json
+import time
+import sqlite3
+
+from aggregator.entry import Entry
+
+# Discord limits: 4096 characters per embed description, 10 embeds and 6000 characters per message.
+EMBED_DESCRIPTION_LIMIT = 4000
+MESSAGE_CHARACTER_LIMIT = 5800
+MESSAGE_EMBED_LIMIT = 10
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS digest_items (
+    id INTEGER PRIMARY KEY,
+    webhook TEXT NOT NULL,
+    due_at REAL NOT NULL,
+    entry TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_digest_webhook ON digest_items(webhook, due_at);
+"""
+
+
+class DigestBuffer:
+    """
+    DigestBuffer stores entries waiting for their webhook's next digest.
+
+    A webhook's digest is due once its oldest buffered entry reaches its due time; all
+    entries buffered for that webhook are then sent together.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: Path of the SQLite database file.
+        """
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def add(self, webhook, entry, window, now=None):
+        """
+        Buffer an entry for a webhook.
+
+        :param webhook: Webhook URL.
+        :param entry: Entry record.
+        :param window: Digest window in seconds.
+        :param now: Current time (defaults to time.time()).
+        """
+        now = time.time() if now is None else now
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO digest_items (webhook, due_at, entry) VALUES (?, ?, ?)",
+                (webhook, now + window, json.dumps(entry.to_dict(), ensure_ascii=False)),
+            )
+
+    def due_webhooks(self, now=None):
+        """
+        :param now: Current time (defaults to time.time()).
+        :return: List of webhook URLs whose digest is due.
+        """
+        now = time.time() if now is None else now
+        rows = self.conn.execute(
+            "SELECT webhook FROM digest_items GROUP BY webhook HAVING MIN(due_at) <= ?", (now,)
+        )
+        return [row[0] for row in rows]
+
+    def pending(self, webhook):
+        """
+        :param webhook: Webhook URL.
+        :return: List of (id, Entry) tuples buffered for the webhook, oldest first.
+        """
+        rows = self.conn.execute("SELECT id, entry FROM digest_items WHERE webhook = ? ORDER BY id", (webhook,))
+        return [(row[0], Entry.from_dict(json.loads(row[1]))) for row in rows]
+
+    def remove(self, ids):
+        """
+        Delete sent entries from the buffer.
+
+        :param ids: Row ids returned by pending().
+        """
+        with self.conn:
+            self.conn.executemany("DELETE FROM digest_items WHERE id = ?", [(i,) for i in ids])
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM digest_items").fetchone()[0]
+
+    def close(self):
+        """Close the underlying database connection."""
+        self.conn.close()
+
+
+def digest_line(entry):
+    """
+    Render one entry as a single compact digest line.
+
+    :param entry: Entry record.
+    :return: Markdown line.
+    """
+    title = (entry.get("title", "No Title") or "").replace("[", "(").replace("]", ")")
+    line = "• [%s](%s) — %s" % (title, entry.get("link", ""), entry.get("author", ""))
+    severity = entry.get("severity")
+    if severity and severity != "N/A":
+        line += " · **%s**" % severity
+    return line[:EMBED_DESCRIPTION_LIMIT]
+
+
+def build_digest_payloads(entries, username="ThreatFeed HQ"):
+    """
+    Build Discord webhook payloads that list the given entries compactly.
+
+    Lines are packed into embeds and embeds into messages within Discord's limits, so a
+    large digest is split over as few messages as possible.
+
+    :param entries: List of Entry records, oldest first.
+    :param username: Webhook username.
+    :return: List of payload dictionaries.
+    """
+    return [payload for payload, _ in build_digest_batches(entries, username)]
+
+
+def build_digest_batches(entries, username="ThreatFeed HQ"):
+    """
+    Like build_digest_payloads(), but also tell how many entries each payload lists, so a
+    digest that is only partly sent can be resumed with the remaining entries.
+
+    :param entries: List of Entry records, oldest first.
+    :param username: Webhook username.
+    :return: List of (payload dictionary, number of entries) tuples, in entry order.
+    """
+    payloads = []
+    counts = []
+    message = []
+    message_length = 0
+    message_count = 0
+    lines = []
+    embed_length = 0
+    for entry in entries:
+        line = digest_line(entry)
+        added = len(line) + 1
+        if lines and message_length + added > MESSAGE_CHARACTER_LIMIT:
+            # Message is full: close the current embed and start a new message.
+            message.append("\n".join(lines))
+            payloads.append(message)
+            counts.append(message_count)
+            message, message_length, message_count, lines, embed_length = [], 0, 0, [], 0
+        elif lines and embed_length + added > EMBED_DESCRIPTION_LIMIT:
+            message.append("\n".join(lines))
+            lines, embed_length = [], 0
+            if len(message) >= MESSAGE_EMBED_LIMIT:
+                payloads.append(message)
+                counts.append(message_count)
+                message, message_length, message_count = [], 0, 0
+        lines.append(line)
+        embed_length += added
+        message_length += added
+        message_count += 1
+    if lines:
+        message.append("\n".join(lines))
+    if message:
+        payloads.append(message)
+        counts.append(message_count)
+
+    total = len(entries)
+    result = []
+    for number, (descriptions, count) in enumerate(zip(payloads, counts), start=1):
+        title = "Digest: %d new item%s" % (total, "" if total == 1 else "s")
+        if len(payloads) > 1:
+            title += " (part %d/%d)" % (number, len(payloads))
+        embeds_payload = [{"description": d, "color": 0x6c757d} for d in descriptions]
+        embeds_payload[0]["title"] = title
+        result.append(({"username": username, "embeds": embeds_payload}, count))
+    return result
@@ -0,0 +1,152 @@
+# aggregator/entry.py
+
+"""
+Compact record type for standardized feed entries.
+
+Every feed produces Entry objects instead of plain dictionaries. Entry uses __slots__,
+so an entry costs a fixed handful of pointers instead of a per-instance dict, and the
+feed type is interned so all entries of a feed share one string object.
+
+For compatibility with code that treats entries as dictionaries, Entry supports
+entry["title"], entry.get("severity") and entry["feed_type"] = ... for its fields.
+"""
+
+import re
+import sys
+import calendar
+
+# Number of words kept from a description for the overview.
+OVERVIEW_WORDS = 40
+
+_WORD_PATTERN = re.compile(r"\S+")
+
+
+def truncate_words(text, limit=OVERVIEW_WORDS):
+    """
+    Return the first `limit` words of text joined by single spaces.
+
+    Only the needed words are scanned, so long descriptions are never split in full.
+
+    :param text: Plain text to truncate.
+    :param limit: Maximum number of words to keep.
+    :return: The truncated text.
+    """
+    words = []
+    for match in _WORD_PATTERN.finditer(text):
+        words.append(match.group())
+        if len(words) >= limit:
+            break
+    return " ".join(words)
+
+
+def to_timestamp(value):
+    """
+    Convert a date string into a UTC epoch timestamp.
+
+    :param value: Date string in any format understood by dateutil.
+    :return: Integer timestamp, or None if the value cannot be parsed.
+    """
+    if not value:
+        return None
+    # Imported on first use: runs without new entries never need to parse dates.
+    from dateutil.parser import parse as parse_date
+    try:
+        parsed = parse_date(value)
+    except (ValueError, OverflowError):
+        return None
+    if parsed.tzinfo is None:
+        return calendar.timegm(parsed.timetuple())
+    return int(parsed.timestamp())
+
+
+class Entry:
+    """
+    Entry holds one standardized feed entry.
+
+    Fields:
+      - title
+      - pub_date
+      - link
+      - author
+      - overview (already truncated to OVERVIEW_WORDS words)
+      - severity (only set by feeds that report one, e.g. "9.8 | CRITICAL")
+      - feed_type (class name of the feed that produced the entry)
+      - duplicate_of (link of an earlier entry covering the same story, if any)
+      - cvss_vector, cwe (attached by offline NVD enrichment, see aggregator.nvd)
+      - watchlists, routes (matching watchlist names and their extra webhooks, see aggregator.watchlist)
+      - first_seen (epoch time the entry's feed was fetched, for freshness tracking)
+      - affected (affected packages as "ecosystem/name", set by GitHub advisory mirror ingestion)
+    """
+
+    __slots__ = ("title", "pub_date", "link", "author", "overview", "severity", "feed_type", "duplicate_of",
+                 "cvss_vector", "cwe", "watchlists", "routes", "first_seen", "affected")
+
+    def __init__(self, title, pub_date, link, author, overview, severity=None, feed_type=None):
+        self.title = title
+        self.pub_date = pub_date
+        self.link = link
+        self.author = author
+        self.overview = overview
+        self.severity = severity
+        self.feed_type = sys.intern(feed_type) if feed_type else feed_type
+        self.duplicate_of = None
+        self.cvss_vector = None
+        self.cwe = None
+        self.watchlists = None
+        self.routes = None
+        self.first_seen = None
+        self.affected = None
+
+    def get(self, key, default=None):
+        """
+        Dictionary-style access to a field.
+
+        :param key: Field name.
+        :param default: Value returned when the field is unknown or unset.
+        :return: The field value or default.
+        """
+        if key not in self.__slots__:
+            return default
+        value = getattr(self, key)
+        return default if value is None else value
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        if key == "feed_type" and value:
+            value = sys.intern(value)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.__slots__ and getattr(self, key) is not None
+
+    def to_dict(self):
+        """
+        Convert the entry into a plain dictionary, omitting unset fields.
+
+        :return: Dictionary with the entry's fields.
+        """
+        return {key: getattr(self, key) for key in self.__slots__ if getattr(self, key) is not None}
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Rebuild an entry from a dictionary produced by to_dict().
+
+        :param data: Dictionary with entry fields; unknown keys are ignored.
+        :return: Entry record.
+        """
+        entry = cls(data.get("title"), data.get("pub_date"), data.get("link"),
+                    data.get("author"), data.get("overview"))
+        for key in cls.__slots__:
+            if key in data:
+                entry[key] = data[key]
+        return entry
+
+    def __repr__(self):
+        return "Entry(feed_type=%r, link=%r, title=%r)" % (self.feed_type, self.link, self.title)
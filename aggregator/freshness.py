@@ -0,0 +1,297 @@
+# aggregator/freshness.py
+
+"""
+End-to-end freshness tracking.
+
+How stale is an alert when it lands in Discord? For every successful post the time since
+publication is split into stages:
+
+    discovery   pub_date   -> first seen   (upstream delay + polling interval)
+    pipeline    first seen -> enqueued     (fetch/parse/dedup stages, sink queues)
+    delivery    enqueued   -> posted       (priority queueing and rate-limit waits)
+    end_to_end  pub_date   -> posted
+
+Each stage is aggregated into fixed-bucket histograms per feed and per webhook, persisted
+to a JSON file, optionally exported in the Prometheus text format (for node_exporter's
+textfile collector) and printed by:
+
+    python -m aggregator.freshness [freshness.json] [--webhooks]
+
+Webhooks are identified by their Discord webhook ID only; tokens are never stored.
+Digest deliveries are delayed by design and therefore not recorded.
+"""
+
+import os
+import re
+import sys
+import json
+import bisect
+import hashlib
+import logging
+import threading
+from urllib.parse import urlparse
+
+from aggregator.entry import to_timestamp
+
+STAGES = ("discovery", "pipeline", "delivery", "end_to_end")
+
+# Upper bucket bounds in seconds, from one second to three days; slower samples go to +Inf.
+BUCKETS = (1, 2, 5, 10, 30, 60, 120, 300, 600, 1200, 1800, 3600, 7200, 14400, 43200, 86400, 259200)
+
+_DISCORD_WEBHOOK = re.compile(r"/api/webhooks/(\d+)/")
+
+
+def webhook_label(url):
+    """
+    :param url: Webhook URL.
+    :return: A label identifying the webhook without its secret token.
+    """
+    match = _DISCORD_WEBHOOK.search(url)
+    if match:
+        return "discord/%s" % match.group(1)
+    return "%s/%s" % (urlparse(url).hostname or "webhook", hashlib.sha1(url.encode("utf-8")).hexdigest()[:8])
+
+
+class Histogram:
+    """Fixed-bucket latency histogram."""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        """
+        :param seconds: Latency sample; negative values (clock skew) count as zero.
+        """
+        seconds = max(0.0, seconds)
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        """
+        :param q: Quantile between 0 and 1.
+        :return: Upper bound of the bucket holding the quantile (capped at the maximum seen).
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for position, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= rank and count:
+                bound = BUCKETS[position] if position < len(BUCKETS) else self.max
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {"counts": self.counts, "count": self.count, "total": self.total, "max": self.max}
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls()
+        if len(data.get("counts", [])) == len(histogram.counts):
+            histogram.counts = list(data["counts"])
+            histogram.count = data.get("count", sum(histogram.counts))
+            histogram.total = data.get("total", 0.0)
+            histogram.max = data.get("max", 0.0)
+        return histogram
+
+
+class FreshnessTracker:
+    """
+    FreshnessTracker aggregates per-stage latency histograms by feed and by webhook.
+
+    Usage:
+        tracker.record(entry, webhook_url, enqueued_at, posted_at)  # after each post
+        tracker.log_summary()
+        tracker.save()
+    """
+
+    def __init__(self, state_file=None, prometheus_file=None):
+        """
+        :param state_file: JSON file the histograms are persisted to (None to keep them in memory).
+        :param prometheus_file: Optional file the histograms are exported to in Prometheus text format.
+        """
+        self.state_file = state_file
+        self.prometheus_file = prometheus_file
+        self.lock = threading.Lock()
+        self.histograms = {"feed": {}, "webhook": {}}
+        self.recorded = 0
+        self.logged = 0
+        self.load()
+
+    def _add(self, dimension, name, stage, seconds):
+        stages = self.histograms[dimension].setdefault(name, {})
+        histogram = stages.get(stage)
+        if histogram is None:
+            histogram = stages[stage] = Histogram()
+        histogram.add(seconds)
+
+    def record(self, entry, webhook_url, enqueued_at, posted_at):
+        """
+        Record the stage latencies of one successful post.
+
+        :param entry: Entry record (pub_date and first_seen are used when available).
+        :param webhook_url: Webhook the entry was posted to.
+        :param enqueued_at: Epoch time the entry was queued for delivery.
+        :param posted_at: Epoch time the post succeeded.
+        """
+        published = to_timestamp(entry.pub_date)
+        first_seen = entry.first_seen
+        samples = {"delivery": posted_at - enqueued_at}
+        if first_seen is not None:
+            samples["pipeline"] = enqueued_at - first_seen
+            if published is not None:
+                samples["discovery"] = first_seen - published
+        if published is not None:
+            samples["end_to_end"] = posted_at - published
+        feed_type = entry.feed_type or "unknown"
+        webhook = webhook_label(webhook_url)
+        with self.lock:
+            for stage, seconds in samples.items():
+                self._add("feed", feed_type, stage, seconds)
+                self._add("webhook", webhook, stage, seconds)
+            self.recorded += 1
+
+    def summary(self, dimension="feed"):
+        """
+        :param dimension: "feed" or "webhook".
+        :return: Dictionary mapping name -> stage -> {"count", "p50", "p95", "max"}.
+        """
+        with self.lock:
+            result = {}
+            for name, stages in self.histograms[dimension].items():
+                result[name] = {
+                    stage: {
+                        "count": histogram.count,
+                        "p50": histogram.quantile(0.5),
+                        "p95": histogram.quantile(0.95),
+                        "max": histogram.max,
+                    }
+                    for stage, histogram in stages.items()
+                }
+            return result
+
+    def log_summary(self):
+        """Log end-to-end and delivery freshness per feed, if anything was posted since the last call."""
+        if self.recorded == self.logged:
+            return
+        self.logged = self.recorded
+        for name, stages in sorted(self.summary("feed").items()):
+            end_to_end = stages.get("end_to_end")
+            delivery = stages.get("delivery")
+            if end_to_end is None and delivery is None:
+                continue
+            parts = []
+            for stage, stats in (("end-to-end", end_to_end), ("delivery", delivery)):
+                if stats is not None:
+                    parts.append("%s p50 %s, p95 %s" % (stage, format_seconds(stats["p50"]),
+                                                         format_seconds(stats["p95"])))
+            logging.info("Freshness [%s]: %s", name, "; ".join(parts))
+
+    def load(self):
+        """Load persisted histograms, if a state file is configured and exists."""
+        if not self.state_file or not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            with self.lock:
+                for dimension in self.histograms:
+                    self.histograms[dimension] = {
+                        name: {stage: Histogram.from_dict(h) for stage, h in stages.items()}
+                        for name, stages in data.get(dimension, {}).items()
+                    }
+        except (ValueError, AttributeError, OSError) as e:
+            logging.error("Error loading freshness state: %s", e)
+
+    def save(self):
+        """Persist the histograms and write the Prometheus export, if configured."""
+        with self.lock:
+            data = {
+                "buckets": BUCKETS,
+                "feed": {n: {s: h.to_dict() for s, h in st.items()} for n, st in self.histograms["feed"].items()},
+                "webhook": {n: {s: h.to_dict() for s, h in st.items()} for n, st in self.histograms["webhook"].items()},
+            }
+            prometheus = self.prometheus_text() if self.prometheus_file else None
+        if self.state_file:
+            try:
+                with open(self.state_file, "w", encoding="utf-8") as f:
+                    json.dump(data, f)
+            except OSError as e:
+                logging.error("Failed to save freshness state: %s", e)
+        if prometheus is not None:
+            try:
+                # Written atomically so the textfile collector never reads a partial file.
+                temporary = self.prometheus_file + ".tmp"
+                with open(temporary, "w", encoding="utf-8") as f:
+                    f.write(prometheus)
+                os.replace(temporary, self.prometheus_file)
+            except OSError as e:
+                logging.error("Failed to export freshness metrics: %s", e)
+
+    def prometheus_text(self):
+        """
+        Render the histograms in the Prometheus text exposition format (caller holds the lock).
+
+        :return: Metrics text.
+        """
+        lines = []
+        for dimension in ("feed", "webhook"):
+            metric = "threatfeed_%s_freshness_seconds" % dimension
+            lines.append("# HELP %s Latency of each delivery stage per %s." % (metric, dimension))
+            lines.append("# TYPE %s histogram" % metric)
+            for name, stages in sorted(self.histograms[dimension].items()):
+                for stage, histogram in sorted(stages.items()):
+                    labels = '%s="%s",stage="%s"' % (dimension, name.replace('"', ""), stage)
+                    cumulative = 0
+                    for bound, count in zip(BUCKETS, histogram.counts):
+                        cumulative += count
+                        lines.append('%s_bucket{%s,le="%s"} %d' % (metric, labels, bound, cumulative))
+                    lines.append('%s_bucket{%s,le="+Inf"} %d' % (metric, labels, histogram.count))
+                    lines.append("%s_sum{%s} %.3f" % (metric, labels, histogram.total))
+                    lines.append("%s_count{%s} %d" % (metric, labels, histogram.count))
+        return "\n".join(lines) + "\n"
+
+
+def format_seconds(seconds):
+    """
+    :param seconds: Duration in seconds, or None.
+    :return: Compact human-readable duration such as "0.4s", "45s", "12m" or "3.5h".
+    """
+    if seconds is None:
+        return "-"
+    if seconds < 10:
+        return "%.1fs" % seconds
+    if seconds < 120:
+        return "%ds" % seconds
+    if seconds < 7200:
+        return "%dm" % (seconds // 60)
+    return "%.1fh" % (seconds / 3600)
+
+
+def main(argv=None):
+    """Print the persisted freshness histograms as percentile tables."""
+    argv = sys.argv[1:] if argv is None else argv
+    dimension = "webhook" if "--webhooks" in argv else "feed"
+    paths = [arg for arg in argv if not arg.startswith("--")]
+    tracker = FreshnessTracker(paths[0] if paths else "freshness.json")
+    print("%-24s %-11s %7s %8s %8s %8s" % (dimension, "stage", "count", "p50", "p95", "max"))
+    for name, stages in sorted(tracker.summary(dimension).items()):
+        for stage in STAGES:
+            stats = stages.get(stage)
+            if stats is None:
+                continue
+            print("%-24s %-11s %7d %8s %8s %8s" % (
+                name, stage, stats["count"], format_seconds(stats["p50"]),
+                format_seconds(stats["p95"]), format_seconds(stats["max"])))
+
+
+if __name__ == "__main__":
+    main()
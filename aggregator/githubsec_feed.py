@@ -2,7 +2,16 @@ import feedparser
 from bs4 import BeautifulSoup
 import html
 import logging
-from aggregator.base_feed import BaseFeed
+import os
+import re
+import json
+import subprocess
+from aggregator.base_feed import BaseFeed, FeedError
+from aggregator.entry import Entry, truncate_words
+from aggregator.severity import cvss3_base_score, severity_label
+
+_MARKDOWN = re.compile(r"^#+\s*|[*`]", re.MULTILINE)
+
 
 class GithubFeed(BaseFeed):
     """
@@ -14,13 +23,138 @@ class GithubFeed(BaseFeed):
       - Link (converted if needed)
       - Author (always "GitHub Security")
       - Overview text, cleaned of HTML and truncated to the first 40 words.
+
+    If the URL is a local path instead, it names a git mirror of
+    github/advisory-database (plain or bare clone, kept up to date by e.g. a cron job
+    running `git pull`). Only advisory files added since the last processed commit are
+    read, straight from the git object store, so no advisory scrolls off between polls.
+    Severity, CVSS vector, CWE and affected packages come from the advisories' OSV JSON.
+    The mirror needs its commit history: in a shallow clone nothing predates the first
+    read, which then only records a checkpoint (see load_mirror()).
     """
 
+    # Mirror directories that are ingested (advisories/unreviewed holds unreviewed CVE imports).
+    mirror_paths = ("advisories/github-reviewed",)
+    # Without a checkpoint, the first read starts at the mirror's state this many seconds ago.
+    mirror_initial_window = 86400
+    # Checkpoints of processed commits, per mirror path.
+    mirror_state_file = "github_mirror_state.json"
+
+    def is_mirror(self):
+        """
+        :return: True if the feed reads a local advisory-database mirror.
+        """
+        return not self.url.startswith(("http://", "https://"))
+
     def load(self):
         """
-        Load the RSS feed from the specified URL using feedparser.
+        Load the RSS feed from the specified URL using feedparser, or the new advisories
+        from the local mirror.
+        """
+        if self.is_mirror():
+            self.feed = self.load_mirror()
+        else:
+            self.feed = feedparser.parse(self.url)
+
+    def _git(self, *args, stdin=None):
+        try:
+            result = subprocess.run(["git", "-C", self.url, *args], input=stdin, capture_output=True, check=True)
+        except FileNotFoundError:
+            raise FeedError("git is not installed")
+        except subprocess.CalledProcessError as e:
+            raise FeedError("git %s failed: %s" % (args[0], e.stderr.decode("utf-8", "replace").strip()))
+        return result.stdout
+
+    def _read_state(self):
+        try:
+            with open(self.mirror_state_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logging.error("Error loading GitHub mirror state, starting from the initial window: %s", e)
+            return {}
+
+    def _write_state(self, state):
+        temporary = self.mirror_state_file + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(temporary, self.mirror_state_file)
+
+    def _is_ancestor(self, commit, head):
+        try:
+            self._git("merge-base", "--is-ancestor", commit, head)
+        except FeedError:
+            return False
+        return True
+
+    def load_mirror(self):
+        """
+        Read the advisories added to the mirror since the last processed commit.
+
+        The checkpoint trails by one load: every read starts at the commit the previous
+        read ended on before the last one, so advisories of a cycle that was interrupted
+        before they were posted are read again (and dropped as duplicates otherwise).
+
+        Without a checkpoint, the first read starts at the mirror's state
+        mirror_initial_window ago. If the history does not reach back that far (a shallow
+        or freshly created clone), HEAD is recorded and nothing is returned, rather than
+        posting the whole database as new.
+
+        :return: Dictionary with "entries" (OSV advisory documents) and "bozo".
+        :raises FeedError: If the mirror cannot be read.
         """
-        self.feed = feedparser.parse(self.url)
+        head = self._git("rev-parse", "HEAD^{commit}").decode().strip()
+        states = self._read_state()
+        state = states.get(self.url, {})
+        base = state.get("confirmed")
+        if base and not self._is_ancestor(base, head):
+            logging.warning("GitHub mirror %s was rewritten, restarting from the initial window.", self.url)
+            base = None
+        if not base:
+            since = "%d seconds ago" % self.mirror_initial_window
+            base = self._git("rev-list", "-1", "--before=" + since, head).decode().strip() or None
+
+        if base is None:
+            logging.warning("GitHub mirror %s has no history before the initial window (shallow clone?): "
+                            "starting from commit %s without importing existing advisories.", self.url, head[:12])
+            states[self.url] = {"confirmed": head, "loaded": head}
+            self._write_state(states)
+            return {"entries": [], "bozo": 0}
+
+        # (blob id, path) of every added advisory file.
+        added = []
+        if base != head:
+            # Moves from unreviewed to github-reviewed count as additions, edits do not.
+            output = self._git("diff", "--raw", "--no-abbrev", "--no-renames", "--diff-filter=A", "-z",
+                               base, head, "--", *self.mirror_paths).decode("utf-8").split("\0")
+            for info, name in zip(output[0::2], output[1::2]):
+                added.append((info.split()[3], name))
+        added = [(blob, name) for blob, name in added if name.endswith(".json")]
+
+        advisories = []
+        if added:
+            # One git process reads every added file by blob id, without resolving paths.
+            output = self._git("cat-file", "--batch", stdin="".join(blob + "\n" for blob, _ in added).encode())
+            position = 0
+            for _, name in added:
+                end = output.index(b"\n", position)
+                header = output[position:end].split()
+                position = end + 1
+                if len(header) != 3:
+                    logging.warning("GitHub mirror object %s is missing.", name)
+                    continue
+                size = int(header[2])
+                try:
+                    advisories.append(json.loads(output[position:position + size]))
+                except ValueError as e:
+                    logging.warning("Skipping unreadable advisory %s: %s", name, e)
+                position += size + 1
+
+        states[self.url] = {"confirmed": state.get("loaded") or base, "loaded": head}
+        self._write_state(states)
+        logging.info("GitHub mirror %s: %d new advisories up to commit %s.", self.url, len(advisories), head[:12])
+        return {"entries": advisories, "bozo": 0}
 
     def extract_github_advisory_url(self, tag_uri):
         """
@@ -38,12 +172,64 @@ class GithubFeed(BaseFeed):
             return f"https://github.com/advisories/{ghsa_id}"
         return tag_uri  # Return original if it's already a valid URL
 
+    def advisory_entry(self, advisory):
+        """
+        Convert an OSV advisory document from the mirror into an Entry.
+
+        :param advisory: Parsed OSV JSON of one advisory.
+        :return: Entry record.
+        """
+        ghsa_id = advisory.get("id", "")
+        specific = advisory.get("database_specific") or {}
+        label = (specific.get("severity") or "").upper()
+        if label == "MODERATE":
+            label = "MEDIUM"
+
+        vector = None
+        score = None
+        for severity in advisory.get("severity") or []:
+            if severity.get("type") == "CVSS_V3":
+                vector = severity.get("score")
+                score = cvss3_base_score(vector)
+                break
+            vector = vector or severity.get("score")
+        # The label must match the score shown next to it; GitHub's own label is only used without one.
+        if score is not None:
+            severity = "%.1f | %s" % (score, severity_label(score))
+        else:
+            severity = label or "N/A"
+
+        affected = []
+        for item in advisory.get("affected") or []:
+            package = item.get("package") or {}
+            if package.get("name"):
+                name = "%s/%s" % (package.get("ecosystem", "?"), package["name"])
+                if name not in affected:
+                    affected.append(name)
+
+        entry = Entry(
+            title=advisory.get("summary") or ghsa_id,
+            pub_date=advisory.get("published", "No Date"),
+            link=f"https://github.com/advisories/{ghsa_id}",
+            author="GitHub Security",
+            overview=truncate_words(_MARKDOWN.sub("", advisory.get("details") or "")),
+            severity=severity,
+        )
+        entry.cvss_vector = vector
+        cwe_ids = specific.get("cwe_ids") or []
+        entry.cwe = cwe_ids[0] if cwe_ids else None
+        entry.affected = affected or None
+        return entry
+
     def get_entries(self):
         """
         Process each entry in the GitHub Security RSS feed and extract the required fields.
 
-        :return: A list of dictionaries representing the feed entries.
+        :return: A list of Entry records representing the feed entries.
         """
+        if self.is_mirror():
+            return [self.advisory_entry(advisory) for advisory in self.feed["entries"]]
+
         entries = []
         for entry in self.feed.entries:
             title = entry.get("title", "No Title")
@@ -61,16 +247,15 @@ class GithubFeed(BaseFeed):
             overview_text = soup.get_text(separator=" ").strip()
 
             # Limit the overview text to the first 40 words (without cutting words in half)
-            words = overview_text.split()
-            overview_limited = " ".join(words[:40])
-
-            entry_data = {
-                "title": title,
-                "pub_date": pub_date,
-                "link": link,
-                "author": author,
-                "overview": overview_limited
-            }
+            overview_limited = truncate_words(overview_text)
+
+            entry_data = Entry(
+                title=title,
+                pub_date=pub_date,
+                link=link,
+                author=author,
+                overview=overview_limited
+            )
 
             
             entries.append(entry_data)
@@ -0,0 +1,245 @@
+# aggregator/health.py
+
+"""
+Failure-aware per-feed health tracking.
+
+A broken feed (moved blog, HTML instead of RSS, a non-feed page) used to be retried every
+cycle forever. FeedHealthTracker counts consecutive failures per feed URL and backs off
+exponentially; after too many failures in a row the feed is quarantined and only probed
+occasionally. The first success returns a feed to healthy polling.
+
+Only failures that point at the feed itself (HTTP 4xx, a document that is not a feed)
+escalate to quarantine. Network errors, server errors and rate limits are transient: a
+local network outage fails every feed at once, and quarantining all of them would keep
+the aggregator mostly blind for hours after the network is back. Transient failures
+back off up to a short cap and are retried until they clear.
+
+The state is persisted to a JSON file so backoff survives restarts.
+
+Command line usage:
+    python -m aggregator.health [feed_health.json]
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import threading
+
+from aggregator.base_feed import FeedError
+
+HEALTHY = "healthy"
+BACKOFF = "backoff"
+QUARANTINED = "quarantined"
+
+
+def is_transient(reason):
+    """
+    :param reason: Exception (or description) of a failed poll.
+    :return: True if the failure is likely on the way to the feed rather than the feed itself.
+    """
+    if isinstance(reason, FeedError):
+        return reason.transient
+    # Connection errors and timeouts (requests' exceptions derive from OSError, too).
+    return isinstance(reason, OSError)
+
+
+class FeedHealth:
+    """Health record of a single feed URL."""
+
+    __slots__ = ("url", "state", "consecutive_failures", "permanent_failures", "total_failures", "last_error",
+                 "last_success", "last_failure", "next_attempt", "last_entry_count")
+
+    def __init__(self, url):
+        self.url = url
+        self.state = HEALTHY
+        self.consecutive_failures = 0
+        # Consecutive failures that were not transient; only these lead to quarantine.
+        self.permanent_failures = 0
+        self.total_failures = 0
+        self.last_error = None
+        self.last_success = None
+        self.last_failure = None
+        self.next_attempt = 0
+        self.last_entry_count = None
+
+    def to_dict(self):
+        return {key: getattr(self, key) for key in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        health = cls(data["url"])
+        for key in cls.__slots__:
+            if key in data:
+                setattr(health, key, data[key])
+        return health
+
+
+class FeedHealthTracker:
+    """
+    FeedHealthTracker decides which feeds to poll and records the outcome of each poll.
+
+    Usage:
+        if tracker.should_poll(url):
+            ...
+            tracker.record_success(url, len(entries))  # or tracker.record_failure(url, reason)
+    """
+
+    def __init__(self, state_file=None, base_backoff=60, max_backoff=3600,
+                 quarantine_after=8, probe_interval=6 * 3600, max_transient_backoff=300):
+        """
+        :param state_file: JSON file the health state is persisted to (None to keep it in memory).
+        :param base_backoff: Backoff in seconds after the first failure; doubled per further failure.
+        :param max_backoff: Upper bound of the backoff in seconds.
+        :param quarantine_after: Consecutive failures after which a feed is quarantined.
+        :param probe_interval: Seconds between probes of a quarantined feed.
+        :param max_transient_backoff: Upper bound of the backoff after transient failures
+            (network or server errors), which never quarantine a feed.
+        """
+        self.state_file = state_file
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.max_transient_backoff = max_transient_backoff
+        self.quarantine_after = quarantine_after
+        self.probe_interval = probe_interval
+        self.lock = threading.Lock()
+        self.feeds = {}
+        self.load()
+
+    def _get(self, url):
+        health = self.feeds.get(url)
+        if health is None:
+            health = self.feeds[url] = FeedHealth(url)
+        return health
+
+    def should_poll(self, url, now=None):
+        """
+        :param url: Feed URL.
+        :param now: Current time (defaults to time.time()).
+        :return: True if the feed is due for a poll (or a probe, when quarantined).
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            health = self.feeds.get(url)
+            return health is None or health.state == HEALTHY or now >= health.next_attempt
+
+    def record_success(self, url, entry_count=None, now=None):
+        """
+        Record a successful poll and return the feed to healthy polling.
+
+        :param url: Feed URL.
+        :param entry_count: Number of entries the feed returned.
+        :param now: Current time (defaults to time.time()).
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            health = self._get(url)
+            if health.state != HEALTHY:
+                logging.info("Feed %s recovered after %d consecutive failures.", url, health.consecutive_failures)
+            health.state = HEALTHY
+            health.consecutive_failures = 0
+            health.permanent_failures = 0
+            health.last_success = now
+            health.next_attempt = 0
+            health.last_entry_count = entry_count
+
+    def record_failure(self, url, reason, now=None):
+        """
+        Record a failed poll and schedule the next attempt.
+
+        :param url: Feed URL.
+        :param reason: Exception (or short description) of the failure.
+        :param now: Current time (defaults to time.time()).
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            health = self._get(url)
+            health.consecutive_failures += 1
+            health.total_failures += 1
+            health.last_failure = now
+            health.last_error = str(reason)
+            if is_transient(reason):
+                delay = min(self.max_transient_backoff,
+                            self.base_backoff * 2 ** (health.consecutive_failures - 1))
+                # A quarantined feed stays quarantined; others are retried without escalating.
+                if health.state == QUARANTINED:
+                    health.next_attempt = now + self.probe_interval
+                else:
+                    health.state = BACKOFF
+                    health.next_attempt = now + delay
+                    logging.warning("Feed %s unreachable (%d in a row), retrying in %d seconds: %s",
+                                    url, health.consecutive_failures, delay, reason)
+                return
+            health.permanent_failures += 1
+            if health.permanent_failures >= self.quarantine_after:
+                if health.state != QUARANTINED:
+                    logging.warning("Feed %s quarantined after %d consecutive failures: %s",
+                                    url, health.permanent_failures, reason)
+                health.state = QUARANTINED
+                health.next_attempt = now + self.probe_interval
+            else:
+                delay = min(self.max_backoff, self.base_backoff * 2 ** (health.permanent_failures - 1))
+                health.state = BACKOFF
+                health.next_attempt = now + delay
+                logging.warning("Feed %s failed (%d in a row), backing off %d seconds: %s",
+                                url, health.consecutive_failures, delay, reason)
+
+    def summary(self):
+        """
+        :return: List of health dictionaries, unhealthy feeds first.
+        """
+        with self.lock:
+            records = [health.to_dict() for health in self.feeds.values()]
+        order = {QUARANTINED: 0, BACKOFF: 1, HEALTHY: 2}
+        return sorted(records, key=lambda r: (order.get(r["state"], 3), r["url"]))
+
+    def log_summary(self):
+        """Log one line per feed that is not healthy."""
+        unhealthy = [r for r in self.summary() if r["state"] != HEALTHY]
+        if not unhealthy:
+            logging.info("Feed health: all %d tracked feeds healthy.", len(self.feeds))
+            return
+        for record in unhealthy:
+            logging.info("Feed health: %s is %s (%d consecutive failures, next attempt in %ds): %s",
+                         record["url"], record["state"], record["consecutive_failures"],
+                         max(0, record["next_attempt"] - time.time()), record["last_error"])
+
+    def load(self):
+        """Load persisted health state, if a state file is configured and exists."""
+        if not self.state_file or not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                records = json.load(f)
+            with self.lock:
+                self.feeds = {r["url"]: FeedHealth.from_dict(r) for r in records}
+        except (ValueError, KeyError, OSError) as e:
+            logging.error("Error loading feed health state: %s", e)
+
+    def save(self):
+        """Persist the health state, if a state file is configured."""
+        if not self.state_file:
+            return
+        try:
+            with open(self.state_file, "w", encoding="utf-8") as f:
+                json.dump(self.summary(), f, indent=2)
+        except OSError as e:
+            logging.error("Failed to save feed health state: %s", e)
+
+
+def main(argv=None):
+    """Print the persisted feed health summary."""
+    argv = sys.argv[1:] if argv is None else argv
+    tracker = FeedHealthTracker(argv[0] if argv else "feed_health.json")
+    now = time.time()
+    for record in tracker.summary():
+        next_attempt = max(0, record["next_attempt"] - now) if record["state"] != HEALTHY else 0
+        print("%-12s %3d failures  next in %6ds  %s" % (
+            record["state"], record["consecutive_failures"], next_attempt, record["url"]))
+        if record["state"] != HEALTHY and record["last_error"]:
+            print("             last error: %s" % record["last_error"])
+
+
+if __name__ == "__main__":
+    main()
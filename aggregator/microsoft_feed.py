@@ -2,6 +2,7 @@ import feedparser
 from bs4 import BeautifulSoup
 import html
 from aggregator.base_feed import BaseFeed
+from aggregator.entry import Entry, truncate_words
 
 class MicrosoftFeed(BaseFeed):
     """
@@ -25,7 +26,7 @@ class MicrosoftFeed(BaseFeed):
         """
         Process each entry in the Microsoft Security RSS feed and extract the required fields.
 
-        :return: A list of dictionaries representing the feed entries.
+        :return: A list of Entry records representing the feed entries.
         """
         entries = []
         for entry in self.feed.entries:
@@ -52,15 +53,14 @@ class MicrosoftFeed(BaseFeed):
                 overview_text = description_html_unescaped
 
             
-            words = overview_text.split()
-            overview_limited = " ".join(words[:40])
+            overview_limited = truncate_words(overview_text)
 
-            entries.append({
-                "title": title,
-                "pub_date": pub_date,
-                "link": link,
-                "author": author,
-                "overview": overview_limited
-            })
+            entries.append(Entry(
+                title=title,
+                pub_date=pub_date,
+                link=link,
+                author=author,
+                overview=overview_limited
+            ))
 
         return entries
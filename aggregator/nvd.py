@@ -0,0 +1,325 @@
+# aggregator/nvd.py
+
+"""
+Offline CVSS enrichment from a local NVD mirror.
+
+Only CVEFeed reports a severity; advisories and news from every other feed that name a
+CVE in their title carry none. This module indexes a locally mirrored NVD JSON data set
+once into a compact binary file and looks CVE IDs up in it without any network access:
+
+    header   magic, record count
+    records  fixed-size (key, score, vector, CWE) records sorted by key, where
+             key = year << 32 | number of the CVE ID
+    strings  deduplicated CVSS vectors and CWE IDs referenced by offset and length
+
+CveIndex memory-maps the file and binary-searches the records, so a lookup costs
+O(log n) page reads and a few microseconds, and the index is shared between processes
+through the page cache.
+
+Supported inputs (plain or gzipped, files or directories of them):
+  - NVD 1.1 data feeds (nvdcve-1.1-<year>.json, "CVE_Items")
+  - NVD API 2.0 responses ("vulnerabilities")
+  - mirrors that store API 2.0 CVE objects per file or as "cve_items" lists
+
+Command line usage:
+    python -m aggregator.nvd build nvd.idx ~/mirror/nvd/
+    python -m aggregator.nvd lookup nvd.idx CVE-2024-3094
+"""
+
+import os
+import re
+import gzip
+import json
+import mmap
+import struct
+import argparse
+import logging
+
+from aggregator.severity import parse_severity, severity_label
+
+MAGIC = b"TFHQNVD1"
+HEADER = struct.Struct("<8sI")
+# key, score * 10 (NO_SCORE if unknown), vector offset and length, CWE offset and length
+RECORD = struct.Struct("<QHIHIH")
+KEY = struct.Struct("<Q")
+NO_SCORE = 0xFFFF
+
+CVE_PATTERN = re.compile(r"\bCVE-(\d{4})-(\d{4,})\b", re.IGNORECASE)
+
+# Lookups per entry are capped; roundup posts can name dozens of CVEs.
+MAX_CVES_PER_ENTRY = 20
+
+
+def cve_key(cve_id):
+    """
+    :param cve_id: CVE ID such as "CVE-2024-3094".
+    :return: Integer sort key of the ID, or None if it is not a CVE ID.
+    """
+    match = CVE_PATTERN.fullmatch(cve_id.strip())
+    if not match:
+        return None
+    return int(match.group(1)) << 32 | int(match.group(2))
+
+
+def _cvss_from_metrics(metrics):
+    # Prefer CVSS v3.1, then v3.0, v4.0 and v2; within a version the primary (NVD) score.
+    for name in ("cvssMetricV31", "cvssMetricV30", "cvssMetricV40", "cvssMetricV2"):
+        candidates = metrics.get(name) or []
+        candidates = sorted(candidates, key=lambda m: m.get("type") != "Primary")
+        for metric in candidates:
+            data = metric.get("cvssData", {})
+            if data.get("baseScore") is not None:
+                return data["baseScore"], data.get("vectorString")
+    return None, None
+
+
+def _records_from_document(data):
+    """
+    Yield (cve_id, score, vector, cwe) tuples from one parsed NVD JSON document.
+    """
+    if "CVE_Items" in data:
+        for item in data["CVE_Items"]:
+            cve = item.get("cve", {})
+            cve_id = cve.get("CVE_data_meta", {}).get("ID")
+            impact = item.get("impact", {})
+            score, vector = None, None
+            for metric_name, cvss_name in (("baseMetricV3", "cvssV3"), ("baseMetricV2", "cvssV2")):
+                cvss = impact.get(metric_name, {}).get(cvss_name)
+                if cvss and cvss.get("baseScore") is not None:
+                    score, vector = cvss["baseScore"], cvss.get("vectorString")
+                    break
+            cwe = None
+            for problem in cve.get("problemtype", {}).get("problemtype_data", []):
+                for description in problem.get("description", []):
+                    if description.get("value", "").startswith("CWE-"):
+                        cwe = description["value"]
+                        break
+                if cwe:
+                    break
+            yield cve_id, score, vector, cwe
+        return
+
+    if "vulnerabilities" in data:
+        items = [v.get("cve", {}) for v in data["vulnerabilities"]]
+    elif "cve_items" in data:
+        items = data["cve_items"]
+    elif "id" in data:
+        items = [data]
+    else:
+        return
+    for cve in items:
+        score, vector = _cvss_from_metrics(cve.get("metrics", {}))
+        cwe = None
+        for weakness in sorted(cve.get("weaknesses", []), key=lambda w: w.get("type") != "Primary"):
+            for description in weakness.get("description", []):
+                if description.get("value", "").startswith("CWE-"):
+                    cwe = description["value"]
+                    break
+            if cwe:
+                break
+        yield cve.get("id"), score, vector, cwe
+
+
+def _source_files(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                for name in sorted(names):
+                    if name.endswith((".json", ".json.gz")):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def build_index(sources, index_path):
+    """
+    Build the binary index from NVD JSON files.
+
+    Later files override earlier records of the same CVE, so incremental "modified"
+    feeds can be listed after the yearly ones.
+
+    :param sources: List of JSON files (optionally gzipped) or directories containing them.
+    :param index_path: Path of the index file to write (replaced atomically).
+    :return: Number of indexed CVEs.
+    """
+    records = {}
+    for path in _source_files(sources):
+        opener = gzip.open if path.endswith(".gz") else open
+        try:
+            with opener(path, "rb") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.error("Skipping NVD file %s: %s", path, e)
+            continue
+        for cve_id, score, vector, cwe in _records_from_document(data):
+            key = cve_key(cve_id or "")
+            if key is not None:
+                records[key] = (score, vector, cwe)
+
+    strings = bytearray()
+    offsets = {}
+
+    def intern_string(value):
+        if not value:
+            return 0, 0
+        encoded = value.encode("utf-8")[:0xFFFF]
+        if encoded not in offsets:
+            offsets[encoded] = len(strings)
+            strings.extend(encoded)
+        return offsets[encoded], len(encoded)
+
+    packed = bytearray(HEADER.pack(MAGIC, len(records)))
+    for key in sorted(records):
+        score, vector, cwe = records[key]
+        score_value = NO_SCORE if score is None else int(round(float(score) * 10))
+        packed.extend(RECORD.pack(key, score_value, *intern_string(vector), *intern_string(cwe)))
+    packed.extend(strings)
+
+    temporary = index_path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(packed)
+    os.replace(temporary, index_path)
+    return len(records)
+
+
+class CveIndex:
+    """
+    CveIndex answers CVSS lookups from a memory-mapped index built by build_index().
+
+    Usage:
+        index = CveIndex("nvd.idx")
+        index.lookup("CVE-2024-3094")  # {"cve": ..., "score": 10.0, "severity": "CRITICAL", ...}
+        index.enrich(entry)
+    """
+
+    def __init__(self, path):
+        """
+        :param path: Path of the index file.
+        :raises ValueError: If the file is not an index built by build_index().
+        """
+        self.path = path
+        self.file = open(path, "rb")
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.file.close()
+            raise ValueError("%s is empty" % path)
+        magic, self.count = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError("%s is not an NVD index" % path)
+        self.strings_offset = HEADER.size + self.count * RECORD.size
+
+    def __len__(self):
+        return self.count
+
+    def _string(self, offset, length):
+        if not length:
+            return None
+        start = self.strings_offset + offset
+        return self.map[start:start + length].decode("utf-8")
+
+    def lookup(self, cve_id):
+        """
+        :param cve_id: CVE ID such as "CVE-2024-3094" (case-insensitive).
+        :return: Dictionary with "cve", "score", "severity", "vector" and "cwe"
+            (score and severity are None if NVD has not scored the CVE yet),
+            or None if the CVE is not in the index.
+        """
+        key = cve_key(cve_id)
+        if key is None:
+            return None
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            middle_key = KEY.unpack_from(self.map, HEADER.size + middle * RECORD.size)[0]
+            if middle_key < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low == self.count:
+            return None
+        record_key, score, vector_offset, vector_length, cwe_offset, cwe_length = \
+            RECORD.unpack_from(self.map, HEADER.size + low * RECORD.size)
+        if record_key != key:
+            return None
+        score = None if score == NO_SCORE else score / 10
+        return {
+            "cve": cve_id.upper(),
+            "score": score,
+            "severity": severity_label(score) if score is not None else None,
+            "vector": self._string(vector_offset, vector_length),
+            "cwe": self._string(cwe_offset, cwe_length),
+        }
+
+    def enrich(self, entry):
+        """
+        Attach CVSS data for the CVE IDs named in an entry's title or overview.
+
+        The highest-scoring CVE wins. Its score becomes the entry's severity unless the
+        feed already reported one; its vector and CWE are attached in any case.
+
+        :param entry: Entry record (updated in place).
+        :return: True if the entry was enriched.
+        """
+        text = "%s %s" % (entry.title or "", entry.overview or "")
+        best = None
+        checked = set()
+        for match in CVE_PATTERN.finditer(text):
+            cve_id = match.group(0).upper()
+            if cve_id in checked:
+                continue
+            checked.add(cve_id)
+            if len(checked) > MAX_CVES_PER_ENTRY:
+                break
+            info = self.lookup(cve_id)
+            if info is not None and info["score"] is not None \
+                    and (best is None or info["score"] > best["score"]):
+                best = info
+        if best is None:
+            return False
+        if parse_severity(entry.severity)[0] is None:
+            entry.severity = "%.1f | %s" % (best["score"], best["severity"])
+        entry.cvss_vector = best["vector"]
+        entry.cwe = best["cwe"]
+        return True
+
+    def close(self):
+        """Unmap and close the index file."""
+        if getattr(self, "map", None) is not None:
+            self.map.close()
+            self.map = None
+        self.file.close()
+
+
+def main(argv=None):
+    """Command line interface for building and querying the index."""
+    parser = argparse.ArgumentParser(description="Offline NVD CVSS index.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Index NVD JSON files or directories")
+    build.add_argument("index", help="Path of the index file to write")
+    build.add_argument("sources", nargs="+", help="NVD JSON files (.json or .json.gz) or directories")
+    lookup = commands.add_parser("lookup", help="Look up CVE IDs")
+    lookup.add_argument("index", help="Path of the index file")
+    lookup.add_argument("cves", nargs="+", help="CVE IDs")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        count = build_index(args.sources, args.index)
+        print("Indexed %d CVEs into %s (%d bytes)" % (count, args.index, os.path.getsize(args.index)))
+        return
+    index = CveIndex(args.index)
+    try:
+        for cve_id in args.cves:
+            info = index.lookup(cve_id)
+            if info is None:
+                print("%s  not found" % cve_id.upper())
+            else:
+                score = "%.1f %s" % (info["score"], info["severity"]) if info["score"] is not None else "unscored"
+                print("%s  %s  %s  %s" % (info["cve"], score, info["vector"] or "-", info["cwe"] or "-"))
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
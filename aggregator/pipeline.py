@@ -0,0 +1,216 @@
+# aggregator/pipeline.py
+
+"""
+Staged streaming pipeline for a polling cycle.
+
+A cycle used to run in strict phases: fetch and parse every feed, sort everything, then
+deliver. FeedPipeline instead runs the stages concurrently, connected by bounded queues:
+
+    fetch workers --(loaded feeds)--> parse worker --(entries)--> consumer (dedup + deliver)
+
+New entries reach the consumer as soon as their feed is parsed, while the remaining feeds
+are still being fetched. When a downstream stage falls behind, the bounded queues fill up
+and the upstream stages wait, so memory stays bounded. With a reorder lateness, entries
+of all feeds are merged into publication order by a ReorderBuffer before the consumer
+sees them.
+"""
+
+import sys
+import queue
+import logging
+import threading
+import time
+
+from aggregator.entry import to_timestamp
+from aggregator.reorder import ReorderBuffer
+
+_DONE = object()
+# Seconds a blocked stage waits before checking whether the pipeline was stopped.
+_STOP_POLL_INTERVAL = 0.1
+
+
+def _put(target, item, stop):
+    # Block while the queue is full, but give up once the pipeline is stopped.
+    while not stop.is_set():
+        try:
+            target.put(item, timeout=_STOP_POLL_INTERVAL)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _get(source, stop):
+    # Block while the queue is empty, but return _DONE once the pipeline is stopped.
+    while not stop.is_set():
+        try:
+            return source.get(timeout=_STOP_POLL_INTERVAL)
+        except queue.Empty:
+            pass
+    return _DONE
+
+
+class FeedPipeline:
+    """
+    FeedPipeline runs one polling cycle over a list of feed instances.
+
+    Usage:
+        for entry in FeedPipeline().run(feeds):
+            ...  # dedup and deliver
+    """
+
+    def __init__(self, fetch_workers=4, queue_size=64, fetch_delay=0, health=None, on_parsed=None, enricher=None,
+                 reorder_lateness=None, reorder_capacity=None):
+        """
+        :param fetch_workers: Number of feeds fetched concurrently.
+        :param queue_size: Capacity of the queues between stages (feeds resp. entries).
+        :param fetch_delay: Seconds each fetch worker pauses between two fetches.
+        :param health: Optional FeedHealthTracker that records the outcome of every feed.
+        :param on_parsed: Optional callable invoked with each successfully parsed feed
+            instance before its parsed feed is released (e.g. WebSub hub discovery).
+        :param enricher: Optional ArticleEnricher; new entries are submitted in the parse stage
+            and handed to the consumer once enriched or past their deadline.
+        :param reorder_lateness: Seconds of publication-time lateness the cycle's entries are
+            reordered across feeds for (None keeps each feed's entries together, oldest first).
+        :param reorder_capacity: Maximum number of entries held back for reordering.
+        """
+        self.fetch_workers = max(1, fetch_workers)
+        self.queue_size = queue_size
+        self.fetch_delay = fetch_delay
+        self.health = health
+        self.on_parsed = on_parsed
+        self.enricher = enricher
+        self.reorder_lateness = reorder_lateness
+        self.reorder_capacity = reorder_capacity
+        self.failed_feeds = []
+
+    def _fetch(self, tasks, loaded, stop):
+        while not stop.is_set():
+            try:
+                feed_instance = tasks.get_nowait()
+            except queue.Empty:
+                _put(loaded, _DONE, stop)
+                return
+            try:
+                feed_instance.load()
+                feed_instance.fetched_at = time.time()
+                feed_instance.validate()
+                logging.info("Loaded feed from URL: %s", feed_instance.url)
+                if not _put(loaded, feed_instance, stop):
+                    feed_instance.release()
+            except Exception as e:
+                logging.error("Error loading feed from URL %s: %s", feed_instance.url, e)
+                self.failed_feeds.append(feed_instance.url)
+                feed_instance.release()
+                if self.health is not None:
+                    self.health.record_failure(feed_instance.url, e)
+            if self.fetch_delay and not tasks.empty():
+                time.sleep(self.fetch_delay)
+
+    def _parse(self, loaded, parsed, is_new, stop):
+        try:
+            self._parse_feeds(loaded, parsed, is_new, stop)
+        except Exception:
+            logging.exception("Parse stage failed, ending the cycle early.")
+        finally:
+            # The consumer ends on _DONE, however the parse stage ended.
+            _put(parsed, _DONE, stop)
+
+    def _parse_feeds(self, loaded, parsed, is_new, stop):
+        remaining = self.fetch_workers
+        while remaining:
+            feed_instance = _get(loaded, stop)
+            if feed_instance is _DONE:
+                remaining -= 1
+                continue
+            try:
+                entries = feed_instance.get_entries()
+                if self.on_parsed is not None:
+                    self.on_parsed(feed_instance)
+            except Exception as e:
+                logging.error("Error processing entries for feed %s: %s", feed_instance.url, e)
+                self.failed_feeds.append(feed_instance.url)
+                if self.health is not None:
+                    self.health.record_failure(feed_instance.url, e)
+                continue
+            finally:
+                # Only the extracted entries are needed from here on.
+                feed_instance.release()
+            if self.health is not None:
+                self.health.record_success(feed_instance.url, len(entries))
+
+            feed_type = sys.intern(feed_instance.__class__.__name__)
+            if is_new is not None:
+                entries = [entry for entry in entries if is_new(entry)]
+            # Deliver each feed's entries oldest first; undated entries count as oldest.
+            keyed = [(to_timestamp(entry.pub_date) or 0, entry) for entry in entries]
+            keyed.sort(key=lambda pair: pair[0])
+            for timestamp, entry in keyed:
+                entry.feed_type = feed_type
+                entry.first_seen = feed_instance.fetched_at
+                if self.enricher is not None:
+                    self.enricher.submit(entry)
+                if not _put(parsed, (timestamp, entry), stop):
+                    return
+
+    def _ordered(self, parsed):
+        if self.reorder_lateness is None:
+            while True:
+                item = parsed.get()
+                if item is _DONE:
+                    return
+                yield item[1]
+
+        reorder = ReorderBuffer(self.reorder_lateness, self.reorder_capacity)
+        while True:
+            item = parsed.get()
+            if item is _DONE:
+                break
+            yield from reorder.push(*item)
+        # Every feed is parsed: nothing earlier can arrive any more.
+        yield from reorder.drain()
+        if reorder.late or reorder.forced:
+            logging.info("Reorder buffer: %d entries arrived behind the %ds lateness watermark, "
+                         "%d released early at capacity.", reorder.late, self.reorder_lateness, reorder.forced)
+
+    def run(self, feeds, is_new=None):
+        """
+        Fetch and parse the given feeds, yielding entries as soon as they are parsed.
+
+        The generator finishes once every feed has been processed. If the consumer stops
+        early (raises, or closes the generator), the workers stop after their current feed.
+
+        :param feeds: List of BaseFeed instances.
+        :param is_new: Optional predicate; entries for which it returns False are dropped
+            in the parse stage.
+        :return: A generator of Entry records, oldest first within each feed (and across
+            feeds within the reorder lateness).
+        """
+        tasks = queue.Queue()
+        for feed_instance in feeds:
+            tasks.put(feed_instance)
+        loaded = queue.Queue(maxsize=max(1, self.queue_size // 16))
+        parsed = queue.Queue(maxsize=self.queue_size)
+
+        stop = threading.Event()
+
+        threads = [
+            threading.Thread(target=self._fetch, args=(tasks, loaded, stop), name="fetch-%d" % i, daemon=True)
+            for i in range(self.fetch_workers)
+        ]
+        threads.append(threading.Thread(target=self._parse, args=(loaded, parsed, is_new, stop), name="parse",
+                                        daemon=True))
+        for thread in threads:
+            thread.start()
+
+        try:
+            for entry in self._ordered(parsed):
+                if self.enricher is not None:
+                    self.enricher.wait(entry)
+                yield entry
+        finally:
+            # Unblocks and ends the workers when the consumer leaves early.
+            stop.set()
+
+        for thread in threads:
+            thread.join()
@@ -0,0 +1,101 @@
+# aggregator/reorder.py
+
+"""
+Streaming reorder buffer for chronological delivery across feeds.
+
+The pipeline hands over each feed's new entries oldest first, but feeds finish in
+whatever order their fetches complete, so entries of different feeds interleave out of
+publication order. Sorting the whole cycle would restore the order only by holding every
+entry back until the last feed is parsed.
+
+ReorderBuffer merges the already-ordered feed streams in a heap instead and releases
+entries in publication order as soon as the watermark passes them. The watermark trails
+the newest publication time seen by a configurable lateness: an entry is held only as
+long as an earlier entry could still arrive within that allowance. The remaining entries
+are released when the cycle's last feed has been parsed. Entries arriving behind the
+watermark ("late") are released immediately and counted, so the lateness can be tuned.
+"""
+
+import heapq
+import itertools
+
+
+class ReorderBuffer:
+    """
+    ReorderBuffer releases timestamped items in timestamp order behind a lateness watermark.
+
+    Usage:
+        buffer = ReorderBuffer(lateness=3600)
+        for entry in buffer.push(timestamp, entry):
+            deliver(entry)
+        for entry in buffer.drain():  # at the end of the streams
+            deliver(entry)
+    """
+
+    def __init__(self, lateness, capacity=None):
+        """
+        :param lateness: Seconds an item may trail the newest timestamp seen and still be
+            released in order (0 releases items as they arrive).
+        :param capacity: Optional maximum number of held items; beyond it the oldest items
+            are released early so memory stays bounded.
+        """
+        self.lateness = lateness
+        self.capacity = capacity
+        self.heap = []
+        self._seq = itertools.count()
+        self.newest = None
+        self.last_released = None
+        self.late = 0
+        self.forced = 0
+
+    def __len__(self):
+        return len(self.heap)
+
+    def watermark(self):
+        """
+        :return: Timestamp up to which no earlier item is expected any more, or None before the first item.
+        """
+        if self.newest is None:
+            return None
+        return self.newest - self.lateness
+
+    def push(self, timestamp, item):
+        """
+        Add an item and release every item the watermark has passed.
+
+        :param timestamp: Sort key of the item (e.g. publication time as epoch seconds).
+        :param item: Item to buffer.
+        :return: List of released items, in timestamp order.
+        """
+        if self.last_released is not None and timestamp < self.last_released:
+            self.late += 1
+        # The sequence number keeps items with equal timestamps in arrival order.
+        heapq.heappush(self.heap, (timestamp, next(self._seq), item))
+        if self.newest is None or timestamp > self.newest:
+            self.newest = timestamp
+        released = self._release(self.newest - self.lateness)
+        if self.capacity is not None:
+            while len(self.heap) > self.capacity:
+                self.forced += 1
+                released.append(self._pop())
+        return released
+
+    def drain(self):
+        """
+        Release all held items; called once every stream has ended.
+
+        :return: List of items in timestamp order.
+        """
+        return self._release(float("inf"))
+
+    def _pop(self):
+        timestamp, _, item = heapq.heappop(self.heap)
+        if self.last_released is None or timestamp > self.last_released:
+            self.last_released = timestamp
+        return item
+
+    def _release(self, watermark):
+        released = []
+        while self.heap and self.heap[0][0] <= watermark:
+            released.append(self._pop())
+        return released
@@ -0,0 +1,220 @@
+# aggregator/scheduler.py
+
+"""
+Severity-aware priority scheduling for Discord delivery.
+
+Entries are put into priority classes based on their parsed severity and the configured
+per-feed priority. Delivery is weighted-fair across classes (smooth weighted round-robin),
+so a CVSS 9.8 advisory no longer waits behind a burst of blog posts, while lower classes
+still make progress. Within a class entries keep their enqueue order, and an optional
+per-channel ordering guarantee makes sure no webhook ever receives entries out of order.
+"""
+
+import itertools
+import logging
+import time
+from collections import deque
+
+from aggregator.severity import parse_severity
+
+# Priority classes, most urgent first.
+PRIORITY_CLASSES = ("critical", "high", "normal", "low")
+
+# Relative share of deliveries each class receives while several classes are waiting.
+DEFAULT_CLASS_WEIGHTS = {"critical": 8, "high": 4, "normal": 2, "low": 1}
+
+# Number of latency samples kept per class for percentile reporting.
+LATENCY_SAMPLES = 1000
+
+
+def severity_class(severity):
+    """
+    Map a severity string such as "9.8 | CRITICAL" to a priority class.
+
+    Scores follow the CVSS v3 qualitative ranges; the label is used when no score is given.
+
+    :param severity: Severity string or None.
+    :return: A priority class name, or None if the severity is unknown.
+    """
+    score, label = parse_severity(severity)
+    if score is not None:
+        if score >= 9.0:
+            return "critical"
+        if score >= 7.0:
+            return "high"
+        if score >= 4.0:
+            return "normal"
+        return "low"
+    return {"CRITICAL": "critical", "HIGH": "high", "MEDIUM": "normal", "LOW": "low"}.get(label)
+
+
+def priority_class(entry, feed_priorities):
+    """
+    Determine the priority class of an entry.
+
+    Entries with a known severity use its class, entries without one use their feed's
+    configured priority (default "normal"). If both are available the more urgent wins.
+
+    :param entry: Entry record.
+    :param feed_priorities: Mapping of feed type to priority class name.
+    :return: A priority class name.
+    """
+    by_severity = severity_class(entry.get("severity"))
+    by_feed = feed_priorities.get(entry.get("feed_type", ""))
+    candidates = [c for c in (by_severity, by_feed) if c in PRIORITY_CLASSES]
+    if not candidates:
+        return "normal"
+    return min(candidates, key=PRIORITY_CLASSES.index)
+
+
+class DeliveryJob:
+    """A single entry waiting to be delivered to its webhooks."""
+
+    __slots__ = ("seq", "entry", "webhook_urls", "priority", "enqueued_at")
+
+    def __init__(self, seq, entry, webhook_urls, priority, enqueued_at):
+        self.seq = seq
+        self.entry = entry
+        self.webhook_urls = webhook_urls
+        self.priority = priority
+        self.enqueued_at = enqueued_at
+
+
+class PriorityScheduler:
+    """
+    PriorityScheduler orders delivery jobs across priority classes.
+
+    Usage:
+        scheduler.push(entry, webhook_urls, "critical")
+        job = scheduler.pop()
+        post_to_discord(job.entry, job.webhook_urls)
+        scheduler.complete(job)
+    """
+
+    def __init__(self, weights=None, preserve_channel_order=False):
+        """
+        :param weights: Mapping of priority class to weight (defaults to DEFAULT_CLASS_WEIGHTS).
+        :param preserve_channel_order: If True, a job is only delivered once every job
+            enqueued before it for any of its webhooks has been delivered.
+        """
+        self.weights = dict(DEFAULT_CLASS_WEIGHTS)
+        if weights:
+            self.weights.update(weights)
+        self.preserve_channel_order = preserve_channel_order
+        self.queues = {name: deque() for name in PRIORITY_CLASSES}
+        self.current = {name: 0 for name in PRIORITY_CLASSES}
+        self.channel_pending = {}
+        self.latencies = {name: deque(maxlen=LATENCY_SAMPLES) for name in PRIORITY_CLASSES}
+        self.delivered = {name: 0 for name in PRIORITY_CLASSES}
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return sum(len(queue) for queue in self.queues.values())
+
+    def push(self, entry, webhook_urls, priority="normal"):
+        """
+        Queue an entry for delivery.
+
+        :param entry: Entry record.
+        :param webhook_urls: List (or single string) of webhook URLs.
+        :param priority: Priority class name.
+        :return: The queued DeliveryJob.
+        """
+        if not isinstance(webhook_urls, list):
+            webhook_urls = [webhook_urls]
+        if priority not in self.queues:
+            priority = "normal"
+        job = DeliveryJob(next(self._seq), entry, webhook_urls, priority, time.monotonic())
+        self.queues[priority].append(job)
+        if self.preserve_channel_order:
+            for url in webhook_urls:
+                self.channel_pending.setdefault(url, deque()).append(job.seq)
+        return job
+
+    def _eligible(self, job):
+        if not self.preserve_channel_order:
+            return True
+        return all(self.channel_pending[url][0] == job.seq for url in job.webhook_urls)
+
+    def _first_eligible(self, name):
+        for position, job in enumerate(self.queues[name]):
+            if self._eligible(job):
+                return position
+        return None
+
+    def pop(self):
+        """
+        Take the next job to deliver.
+
+        Classes with an eligible job compete by smooth weighted round-robin. The globally
+        oldest job is always eligible, so pop() never stalls while jobs are queued.
+
+        :return: The next DeliveryJob, or None if nothing is queued.
+        """
+        candidates = {}
+        for name in PRIORITY_CLASSES:
+            if self.queues[name]:
+                position = self._first_eligible(name)
+                if position is not None:
+                    candidates[name] = position
+        if not candidates:
+            return None
+
+        total = 0
+        for name in candidates:
+            weight = self.weights.get(name, 1)
+            self.current[name] += weight
+            total += weight
+        chosen = max(candidates, key=lambda n: (self.current[n], -PRIORITY_CLASSES.index(n)))
+        self.current[chosen] -= total
+
+        queue = self.queues[chosen]
+        position = candidates[chosen]
+        job = queue[position]
+        del queue[position]
+        if not queue:
+            # An idle class must not bank credit for the next burst.
+            self.current[chosen] = 0
+        if self.preserve_channel_order:
+            for url in job.webhook_urls:
+                pending = self.channel_pending[url]
+                pending.popleft()
+                if not pending:
+                    del self.channel_pending[url]
+        return job
+
+    def complete(self, job):
+        """
+        Record that a job has been delivered.
+
+        :param job: The DeliveryJob returned by pop().
+        """
+        self.latencies[job.priority].append(time.monotonic() - job.enqueued_at)
+        self.delivered[job.priority] += 1
+
+    def latency_summary(self):
+        """
+        Summarize delivery latency per priority class.
+
+        :return: Dictionary mapping class name to count, p50, p95 and max latency in seconds.
+        """
+        summary = {}
+        for name in PRIORITY_CLASSES:
+            samples = sorted(self.latencies[name])
+            if not samples:
+                continue
+            summary[name] = {
+                "count": self.delivered[name],
+                "p50": samples[len(samples) // 2],
+                "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+                "max": samples[-1],
+            }
+        return summary
+
+    def log_latency_summary(self):
+        """Log the per-class delivery latency summary."""
+        for name, stats in self.latency_summary().items():
+            logging.info(
+                "Delivery latency [%s]: %d delivered, p50 %.1fs, p95 %.1fs, max %.1fs",
+                name, stats["count"], stats["p50"], stats["p95"], stats["max"],
+            )
@@ -0,0 +1,100 @@
+# aggregator/severity.py
+
+"""
+Helpers for working with the free-form severity strings carried by feed entries.
+
+CVEFeed reports severity as "<score> | <LABEL>" (e.g. "9.8 | CRITICAL"); GitHub advisories
+without a CVSS v3 vector report a bare label (e.g. "HIGH"); other feeds report "N/A" or
+nothing at all.
+"""
+
+import re
+import math
+
+SEVERITY_PATTERN = re.compile(r"([\d.]+)\s*\|\s*(\w+)")
+SEVERITY_LABELS = ("CRITICAL", "HIGH", "MEDIUM", "LOW")
+
+# CVSS v3.x base metric weights (FIRST CVSS v3.1 specification, section 7.4).
+_CVSS3_WEIGHTS = {
+    "AV": {"N": 0.85, "A": 0.62, "L": 0.55, "P": 0.2},
+    "AC": {"L": 0.77, "H": 0.44},
+    "UI": {"N": 0.85, "R": 0.62},
+    "C": {"H": 0.56, "L": 0.22, "N": 0.0},
+    "I": {"H": 0.56, "L": 0.22, "N": 0.0},
+    "A": {"H": 0.56, "L": 0.22, "N": 0.0},
+}
+# Privileges Required weighs more when the scope changes.
+_CVSS3_PRIVILEGES = {"U": {"N": 0.85, "L": 0.62, "H": 0.27}, "C": {"N": 0.85, "L": 0.68, "H": 0.5}}
+
+
+def parse_severity(value):
+    """
+    Split a severity string into its numeric score and label.
+
+    :param value: Severity string such as "9.8 | CRITICAL", or None.
+    :return: A (score, label) tuple. Missing parts are returned as None.
+    """
+    if not value:
+        return None, None
+    match = SEVERITY_PATTERN.search(value)
+    if not match:
+        label = value.strip().upper()
+        return None, label if label in SEVERITY_LABELS else None
+    try:
+        score = float(match.group(1))
+    except ValueError:
+        score = None
+    return score, match.group(2).upper()
+
+
+def severity_label(score):
+    """
+    :param score: CVSS base score.
+    :return: The CVSS v3 qualitative rating for the score.
+    """
+    if score >= 9.0:
+        return "CRITICAL"
+    if score >= 7.0:
+        return "HIGH"
+    if score >= 4.0:
+        return "MEDIUM"
+    if score > 0:
+        return "LOW"
+    return "NONE"
+
+
+def _roundup(value):
+    # CVSS v3.1 Roundup: the smallest one-decimal number >= value, robust to float error.
+    scaled = int(round(value * 100000))
+    if scaled % 10000 == 0:
+        return scaled / 100000.0
+    return (math.floor(scaled / 10000) + 1) / 10.0
+
+
+def cvss3_base_score(vector):
+    """
+    Compute the base score of a CVSS v3.0/v3.1 vector.
+
+    :param vector: Vector string such as "CVSS:3.1/AV:N/AC:L/PR:N/UI:N/S:U/C:H/I:H/A:H".
+    :return: Base score between 0.0 and 10.0, or None if the vector is not a valid v3 vector.
+    """
+    if not vector or not vector.startswith("CVSS:3."):
+        return None
+    metrics = dict(part.split(":", 1) for part in vector.split("/")[1:] if ":" in part)
+    try:
+        scope = metrics["S"]
+        weights = {name: _CVSS3_WEIGHTS[name][metrics[name]] for name in _CVSS3_WEIGHTS}
+        privileges = _CVSS3_PRIVILEGES[scope][metrics["PR"]]
+    except KeyError:
+        return None
+    base = 1 - (1 - weights["C"]) * (1 - weights["I"]) * (1 - weights["A"])
+    if scope == "U":
+        impact = 6.42 * base
+    else:
+        impact = 7.52 * (base - 0.029) - 3.25 * (base - 0.02) ** 15
+    if impact <= 0:
+        return 0.0
+    exploitability = 8.22 * weights["AV"] * weights["AC"] * privileges * weights["UI"]
+    if scope == "U":
+        return _roundup(min(impact + exploitability, 10))
+    return _roundup(min(1.08 * (impact + exploitability), 10))
@@ -0,0 +1,708 @@
+# aggregator/sinks.py
+
+"""
+Output sinks for aggregated entries.
+
+Every new entry from a single aggregation pass is handed to each configured sink:
+  - DiscordSink posts it to the feed-specific Discord webhooks (by priority class),
+    or rolls it into a periodic digest message for low-priority feeds. Past a bounded
+    number of queued deliveries it spills to disk and catches up in the background.
+  - JsonLinesSink appends it to a JSON-lines file for SIEM ingestion, with buffered
+    writes, fsync at cycle boundaries and size-based rotation.
+  - ArchiveSink stores it in the searchable SQLite archive.
+
+SinkDispatcher runs each sink on its own worker thread with its own queue, so a slow
+sink (e.g. Discord waiting out a 429) never blocks the others.
+"""
+
+import os
+import json
+import time
+import queue
+import logging
+import threading
+
+from aggregator.archive import EntryArchive
+from aggregator.backlog import DeliveryBacklog, RateBudget
+from aggregator.freshness import format_seconds
+from aggregator.digest import DigestBuffer, build_digest_batches
+from aggregator.scheduler import PriorityScheduler, priority_class
+
+# Priority classes that are always posted immediately, even for digest feeds.
+URGENT_CLASSES = ("critical", "high")
+# Seconds between checks for due digests while the Discord sink is idle.
+DIGEST_CHECK_INTERVAL = 5
+# Retry delay after a digest failed to post (doubled per further failure) and its upper bound, in seconds.
+DIGEST_RETRY_BASE = 30
+DIGEST_RETRY_MAX = 1800
+# Seconds an idle sink worker waits for new entries before doing background work again.
+WORKER_IDLE_WAIT = 1.0
+# Seconds backlog catch-up sleeps at a time while waiting for rate-limit budget.
+CATCHUP_POLL_INTERVAL = 0.1
+# Retry delay after a catch-up delivery failed (doubled per further failure) and its upper bound, in seconds.
+CATCHUP_RETRY_BASE = 30
+CATCHUP_RETRY_MAX = 1800
+# Affected packages listed in an advisory embed.
+MAX_AFFECTED_PACKAGES = 10
+
+
+def cvss_details(entry):
+    """
+    Render the CVSS vector and CWE attached by NVD enrichment.
+
+    :param entry: Entry record.
+    :return: Markdown lines (possibly empty), each ending in a newline.
+    """
+    details = ""
+    if entry.get("cvss_vector"):
+        details += f"**CVSS:** `{entry['cvss_vector']}`\n"
+    if entry.get("cwe"):
+        details += f"**CWE:** {entry['cwe']}\n"
+    return details
+
+
+def affected_details(entry):
+    """
+    Render the affected packages of an advisory, at most MAX_AFFECTED_PACKAGES of them.
+
+    :param entry: Entry record.
+    :return: Markdown line (possibly empty) ending in a newline.
+    """
+    packages = entry.get("affected")
+    if not packages:
+        return ""
+    shown = ", ".join(f"`{package}`" for package in packages[:MAX_AFFECTED_PACKAGES])
+    if len(packages) > MAX_AFFECTED_PACKAGES:
+        shown += f" and {len(packages) - MAX_AFFECTED_PACKAGES} more"
+    return f"**Affected:** {shown}\n"
+
+
+def post_to_discord(entry, webhook_urls, budget=None):
+    """
+    Sends a structured message to Discord using embeds while respecting rate limits.
+    If the entry is from the CVEFeed, or carries a severity from NVD enrichment or a
+    GitHub advisory, an additional severity line is included in the embed, and advisories
+    list their affected packages.
+    Near-duplicates of an earlier story are posted as a compact grey embed referencing it.
+
+    :param entry: Entry record containing feed entry data.
+    :param webhook_urls: List (or single string) of Discord webhook URLs to send the message to.
+    :param budget: Optional RateBudget pacing the posts to each webhook's rate limit.
+    :return: Dictionary mapping each webhook URL posted to successfully to the time of the post.
+    """
+    if entry.get("duplicate_of"):
+        embed = {
+            "title": entry["title"],
+            "url": entry["link"],
+            "description": (
+                f"**Also covered by {entry['author']}** on {entry['pub_date']}\n"
+                f"**Related story:** {entry['duplicate_of']}"
+            ),
+            "color": 0x808080  # Grey color for follow-up coverage
+        }
+    # Check if the entry is from CVEFeed
+    elif entry.get("feed_type") == "CVEFeed":
+        
+        embed = {
+            "title": entry["title"],
+            "url": entry["link"],
+            "description": (
+                f"**Published on:** {entry['pub_date']}\n"
+                f"**Author:** {entry['author']}\n\n"
+                f"**Severity:** {entry['severity']}\n"
+                f"{cvss_details(entry)}\n"
+                f"**Overview:** {entry['overview']}..."
+            ),
+            "color": 0xff0000  # Red color for CVE alerts
+        }
+    else:
+        severity = ""
+        if entry.get("severity", "N/A") != "N/A":
+            severity = f"**Severity:** {entry['severity']}\n{cvss_details(entry)}{affected_details(entry)}\n"
+        elif entry.get("affected"):
+            severity = f"{affected_details(entry)}\n"
+        embed = {
+            "title": entry["title"],
+            "url": entry["link"],
+            "description": (
+                f"**Published on:** {entry['pub_date']}\n"
+                f"**Author:** {entry['author']}\n\n"
+                f"{severity}"
+                f"**Overview:** {entry['overview']}..."
+            ),
+            "color": 0x007bff  # Blue color for regular feeds
+        }
+
+    payload = {
+        "username": "ThreatFeed HQ",
+        "embeds": [embed]
+    }
+
+    return send_payload(payload, webhook_urls, budget)
+
+
+def send_payload(payload, webhook_urls, budget=None):
+    """
+    Sends a prepared webhook payload to Discord, waiting out rate limits.
+
+    :param payload: Webhook payload dictionary.
+    :param webhook_urls: List (or single string) of Discord webhook URLs to send the message to.
+    :param budget: Optional RateBudget; posts wait until the webhook's window has budget left
+        instead of running into a 429.
+    :return: Dictionary mapping each webhook URL posted to successfully to the time of the post.
+    """
+    # Imported on first use: runs without new entries never post anything.
+    import requests
+
+    # Ensure webhook_urls is a list
+    if not isinstance(webhook_urls, list):
+        webhook_urls = [webhook_urls]
+
+    posted = {}
+    for url in webhook_urls:
+        while True:  # retry if rate limit is reached
+            try:
+                if budget is not None:
+                    wait = budget.delay(url)
+                    if wait > 0:
+                        time.sleep(wait)
+                response = requests.post(url, json=payload)
+                if budget is not None:
+                    budget.update(url, response.headers)
+                if response.status_code == 204:
+                    posted[url] = time.time()
+                    logging.info("Successfully posted to Discord via webhook: %s", url)
+                    break  
+                elif response.status_code == 429:  # Rate Limit Error
+                    retry_after = response.json().get("retry_after", 1)  # wait 1 second
+                    logging.warning(f"Rate limit hit! Waiting {retry_after} seconds...")
+                    if budget is not None:
+                        # The next attempt waits out the window through the budget.
+                        budget.exhausted(url, retry_after)
+                        continue
+                    time.sleep(retry_after)  # wait for next try
+                else:
+                    logging.error("Discord webhook returned status %s: %s", response.status_code, response.text)
+                    break  
+
+            except Exception as e:
+                logging.error("Error posting to Discord: %s", e)
+                break
+    return posted
+
+
+class BaseSink:
+    """
+    BaseSink defines the interface every output sink implements.
+
+    emit() receives entries one at a time, flush() is called at every cycle boundary and
+    close() when the aggregator shuts down. Sinks with background work (such as draining a
+    delivery queue) implement work(), which is called whenever no new entries are waiting.
+    Sinks whose flush() does not complete the cycle's work (it continues in work()) set
+    wait_on_flush to False, so the cycle boundary does not wait behind a delivery in progress.
+    """
+
+    name = "sink"
+    wait_on_flush = True
+
+    def emit(self, entry):
+        """
+        Accept one entry.
+
+        :param entry: Entry record.
+        """
+        raise NotImplementedError("Subclasses must implement the emit() method.")
+
+    def work(self):
+        """
+        Perform one unit of background work.
+
+        :return: True if work was done and more may be pending, False if idle.
+        """
+        return False
+
+    def flush(self):
+        """Complete all work for the current cycle."""
+
+    def close(self):
+        """Flush and release resources."""
+        self.flush()
+
+
+class DiscordSink(BaseSink):
+    """
+    DiscordSink posts entries to their feed-specific Discord webhooks, plus the webhooks
+    of any watchlist they matched.
+
+    Entries are queued in a PriorityScheduler and delivered one at a time, so critical
+    entries jump ahead of lower classes that are still waiting. Entries of digest feeds
+    (or for digest webhooks) are buffered durably instead and sent as one compact
+    multi-item message per webhook and window; critical and high entries always post
+    immediately.
+
+    With a backlog file, at most memory_limit deliveries are queued in memory; further
+    ones spill to a DeliveryBacklog on disk. Critical and high entries may take up to
+    urgent_limit further places in memory before they spill too (unless channel order
+    is preserved). Posts are paced by each webhook's rate-limit budget. Fresh deliveries
+    always go first; the backlog is delivered oldest first in between, using only budget
+    beyond catchup_reserve.
+
+    Deliveries run on the sink's worker thread in between accepting entries, so flush()
+    at the cycle boundary does not wait for Discord; only close() delivers what is left
+    in memory.
+    """
+
+    name = "discord"
+    wait_on_flush = False
+
+    def __init__(self, feed_webhooks, feed_priorities=None, weights=None, preserve_channel_order=False,
+                 digest_feeds=None, digest_webhooks=None, digest_file=None, freshness=None,
+                 backlog_file=None, memory_limit=100, catchup_reserve=1, urgent_limit=20, spill_on_close=False):
+        """
+        :param feed_webhooks: Mapping of feed type to list of webhook URLs.
+        :param feed_priorities: Mapping of feed type to priority class.
+        :param weights: Mapping of priority class to delivery weight.
+        :param preserve_channel_order: Keep every webhook's deliveries in enqueue order.
+        :param digest_feeds: Mapping of feed type to digest window in seconds.
+        :param digest_webhooks: Mapping of webhook URL to digest window in seconds.
+        :param digest_file: SQLite file buffering digest entries (required for digests).
+        :param freshness: Optional FreshnessTracker recording the latency of every post.
+        :param backlog_file: SQLite file deliveries spill to (None keeps all of them in memory).
+        :param memory_limit: Deliveries queued in memory before further ones spill to disk.
+        :param catchup_reserve: Requests per rate-limit window that catch-up leaves to fresh entries.
+        :param urgent_limit: Critical and high deliveries queued in memory beyond memory_limit
+            before they spill to disk as well.
+        :param spill_on_close: Move deliveries still queued in memory to the backlog on close()
+            instead of delivering them first (requires backlog_file).
+        """
+        self.feed_webhooks = feed_webhooks
+        self.feed_priorities = feed_priorities or {}
+        self.scheduler = PriorityScheduler(weights, preserve_channel_order)
+        self.digest_feeds = digest_feeds or {}
+        self.digest_webhooks = digest_webhooks or {}
+        self.digest_file = digest_file
+        self.digest = None
+        self.next_digest_check = 0
+        # webhook -> (consecutive failed digests, time of the next attempt)
+        self.digest_retries = {}
+        self.freshness = freshness
+        self.budget = RateBudget()
+        self.backlog_file = backlog_file
+        self.memory_limit = memory_limit
+        self.catchup_reserve = catchup_reserve
+        self.urgent_limit = urgent_limit
+        self.spill_on_close = spill_on_close
+        self.backlog = None
+        # webhook -> (consecutive failed catch-up posts, time of the next attempt)
+        self.catchup_retries = {}
+        self.caught_up = 0
+        self.caught_up_since = time.monotonic()
+
+    def _digest_window(self, feed_type, url):
+        windows = [w for w in (self.digest_feeds.get(feed_type), self.digest_webhooks.get(url)) if w]
+        return min(windows) if windows else None
+
+    def _digest_buffer(self):
+        # Opened lazily so the connection belongs to the sink's worker thread.
+        if self.digest is None:
+            self.digest = DigestBuffer(self.digest_file)
+        return self.digest
+
+    def _delivery_backlog(self):
+        # Opened lazily so the connection belongs to the sink's worker thread.
+        if self.backlog is None:
+            self.backlog = DeliveryBacklog(self.backlog_file)
+            if len(self.backlog):
+                logging.info("Resuming delivery backlog of %d entries.", len(self.backlog))
+        return self.backlog
+
+    def _enqueue(self, entry, webhook_urls, priority):
+        if self.backlog_file is not None:
+            backlog = self._delivery_backlog()
+            full = len(self.scheduler) >= self.memory_limit
+            if self.scheduler.preserve_channel_order:
+                # Nothing may overtake deliveries that were spilled earlier.
+                spill = full or len(backlog) > 0
+            elif priority in URGENT_CLASSES:
+                urgent = sum(len(self.scheduler.queues[name]) for name in URGENT_CLASSES)
+                spill = full and urgent >= self.urgent_limit
+            else:
+                spill = full
+            if spill:
+                if not len(backlog):
+                    logging.warning("Delivery queue full (%d entries), spilling further entries to %s.",
+                                    len(self.scheduler), self.backlog_file)
+                backlog.add(entry, webhook_urls, priority)
+                return
+        self.scheduler.push(entry, webhook_urls, priority)
+
+    def emit(self, entry):
+        feed_type = entry.get("feed_type", "")
+        webhook_urls = self.feed_webhooks.get(feed_type, [])
+        if not isinstance(webhook_urls, list):
+            webhook_urls = [webhook_urls]
+        # Watchlist matches add their webhooks next to the feed's own.
+        routes = [url for url in entry.get("routes", ()) if url not in webhook_urls]
+        if routes:
+            webhook_urls = webhook_urls + routes
+        if not webhook_urls:
+            return
+        priority = priority_class(entry, self.feed_priorities)
+
+        immediate = []
+        for url in webhook_urls:
+            window = self._digest_window(feed_type, url) if self.digest_file else None
+            if window and priority not in URGENT_CLASSES:
+                self._digest_buffer().add(url, entry, window)
+            else:
+                immediate.append(url)
+        if immediate:
+            self._enqueue(entry, immediate, priority)
+
+    def _send_due_digest(self, now):
+        if self.digest_file is None or now < self.next_digest_check:
+            return False
+        buffer = self._digest_buffer()
+        due = buffer.due_webhooks(now)
+        if not due:
+            self.next_digest_check = now + DIGEST_CHECK_INTERVAL
+            return False
+        retry_at = {url: self.digest_retries.get(url, (0, 0))[1] for url in due}
+        due = [url for url in due if retry_at[url] <= now]
+        if not due:
+            self.next_digest_check = min(min(retry_at.values()), now + DIGEST_CHECK_INTERVAL)
+            return False
+        url = due[0]
+        items = buffer.pending(url)
+        sent = 0
+        for payload, count in build_digest_batches([entry for _, entry in items]):
+            if url not in send_payload(payload, [url], self.budget):
+                break
+            sent += count
+        # Only entries of delivered messages leave the buffer; the rest go out with the next attempt.
+        buffer.remove([item_id for item_id, _ in items[:sent]])
+        if sent < len(items):
+            failures = self.digest_retries.get(url, (0, 0))[0] + 1
+            delay = min(DIGEST_RETRY_MAX, DIGEST_RETRY_BASE * 2 ** (failures - 1))
+            self.digest_retries[url] = (failures, now + delay)
+            logging.warning("Digest to webhook %s failed after %d of %d entries, retrying in %d seconds.",
+                            url, sent, len(items), delay)
+        else:
+            self.digest_retries.pop(url, None)
+            logging.info("Sent digest of %d entries to webhook: %s", len(items), url)
+        return True
+
+    def _record_freshness(self, entry, enqueued_at, posted):
+        if self.freshness is not None:
+            for url, posted_at in posted.items():
+                self.freshness.record(entry, url, enqueued_at, posted_at)
+
+    def _deliver_fresh(self):
+        job = self.scheduler.pop()
+        if job is None:
+            return False
+        posted = post_to_discord(job.entry, job.webhook_urls, self.budget)
+        self.scheduler.complete(job)
+        # The scheduler keeps monotonic enqueue times; freshness works in epoch time.
+        self._record_freshness(job.entry, time.time() - (time.monotonic() - job.enqueued_at), posted)
+        return True
+
+    def _catch_up(self):
+        if self.backlog_file is None:
+            return False
+        item = self._delivery_backlog().peek()
+        if item is None:
+            return False
+        now = time.time()
+        # The backlog is a FIFO: while its oldest item waits for a retry, catch-up pauses.
+        if any(self.catchup_retries.get(url, (0, 0))[1] > now for url in item.webhook_urls):
+            return False
+        delay = max(self.budget.delay(url, self.catchup_reserve) for url in item.webhook_urls)
+        if delay > 0:
+            # Out of spare budget: wait in short steps so fresh entries are still taken in.
+            time.sleep(min(delay, CATCHUP_POLL_INTERVAL))
+            return True
+        posted = post_to_discord(item.entry, item.webhook_urls, self.budget)
+        self._record_freshness(item.entry, item.enqueued_at, posted)
+        failed = [url for url in item.webhook_urls if url not in posted]
+        for url in posted:
+            self.catchup_retries.pop(url, None)
+        if not failed:
+            self.backlog.remove(item)
+            self.caught_up += 1
+            return True
+        # Only the webhooks that failed keep the item; it is retried with backoff.
+        self.backlog.retain(item, failed)
+        for url in failed:
+            failures = self.catchup_retries.get(url, (0, 0))[0] + 1
+            delay = min(CATCHUP_RETRY_MAX, CATCHUP_RETRY_BASE * 2 ** (failures - 1))
+            self.catchup_retries[url] = (failures, now + delay)
+            logging.warning("Backlog delivery to webhook %s failed, retrying in %d seconds.", url, delay)
+        return True
+
+    def work(self):
+        return self._deliver_fresh() or self._send_due_digest(time.time()) or self._catch_up()
+
+    def flush(self):
+        # Deliveries keep running in work() while the next cycle polls: a burst of posts
+        # (up to memory_limit at Discord's rate limit) must not hold up polling.
+        self.scheduler.log_latency_summary()
+        self._log_backlog()
+
+    def _log_backlog(self):
+        now = time.monotonic()
+        remaining = len(self.backlog) if self.backlog is not None else 0
+        if remaining or self.caught_up:
+            rate = self.caught_up / max(now - self.caught_up_since, 1e-6)
+            eta = format_seconds(remaining / rate) if rate else "-"
+            logging.info("Delivery backlog: %d entries waiting, %d caught up since the last cycle "
+                         "(%.2f/s, done in %s).", remaining, self.caught_up, rate, eta)
+        self.caught_up = 0
+        self.caught_up_since = now
+
+    def _spill_queued(self):
+        jobs = []
+        job = self.scheduler.pop()
+        while job is not None:
+            jobs.append(job)
+            job = self.scheduler.pop()
+        if not jobs:
+            return
+        # The scheduler keeps monotonic enqueue times; the backlog works in epoch time.
+        offset = time.time() - time.monotonic()
+        self._delivery_backlog().prepend([(job.entry, job.webhook_urls, job.priority, job.enqueued_at + offset)
+                                          for job in jobs])
+        logging.info("Moved %d queued deliveries to %s.", len(jobs), self.backlog_file)
+
+    def close(self):
+        # Deliveries queued in memory would be lost: on shutdown they go to the front of the
+        # backlog, otherwise they are delivered first. Spilled ones wait on disk for the next run.
+        if self.spill_on_close and self.backlog_file is not None:
+            self._spill_queued()
+        while self._deliver_fresh() or self._send_due_digest(time.time()):
+            pass
+        self.flush()
+        if self.digest is not None:
+            self.digest.close()
+            self.digest = None
+        if self.backlog is not None:
+            if len(self.backlog):
+                logging.info("%d backlog entries left in %s for the next run.", len(self.backlog), self.backlog_file)
+            self.backlog.close()
+            self.backlog = None
+
+
+class JsonLinesSink(BaseSink):
+    """
+    JsonLinesSink writes one JSON object per entry to a file.
+
+    Records carry the matched watchlist names but not their routes: those are Discord
+    webhook URLs, whose tokens would let anyone reading the SIEM data post to the channels.
+    Lines are buffered in memory and written in batches; flush() writes the buffer and
+    fsyncs the file. When the file grows past max_bytes it is rotated to path.1, path.2,
+    ... keeping at most backup_count old files.
+    """
+
+    name = "jsonl"
+
+    def __init__(self, path, buffer_entries=256, max_bytes=50 * 1024 * 1024, backup_count=5):
+        """
+        :param path: Path of the JSON-lines file.
+        :param buffer_entries: Number of entries buffered before a write.
+        :param max_bytes: Size at which the file is rotated (0 disables rotation).
+        :param backup_count: Number of rotated files to keep.
+        """
+        self.path = path
+        self.buffer_entries = buffer_entries
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.buffer = []
+        self.file = None
+
+    def emit(self, entry):
+        record = entry.to_dict()
+        record.pop("routes", None)
+        record["ingested_at"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        self.buffer.append(json.dumps(record, ensure_ascii=False) + "\n")
+        if len(self.buffer) >= self.buffer_entries:
+            self._write()
+
+    def _open(self):
+        if self.file is None:
+            self.file = open(self.path, "a", encoding="utf-8")
+        return self.file
+
+    def _write(self):
+        if not self.buffer:
+            return
+        f = self._open()
+        f.write("".join(self.buffer))
+        self.buffer = []
+        if self.max_bytes and f.tell() >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+        self.file = None
+        if self.backup_count > 0:
+            for index in range(self.backup_count - 1, 0, -1):
+                source = "%s.%d" % (self.path, index)
+                if os.path.exists(source):
+                    os.replace(source, "%s.%d" % (self.path, index + 1))
+            os.replace(self.path, self.path + ".1")
+        else:
+            os.remove(self.path)
+        logging.info("Rotated JSON-lines sink file %s", self.path)
+
+    def flush(self):
+        self._write()
+        if self.file is not None:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+    def close(self):
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class ArchiveSink(BaseSink):
+    """
+    ArchiveSink stores entries in the SQLite archive, one batch per cycle.
+
+    The database is opened lazily so the connection belongs to the sink's worker thread.
+    """
+
+    name = "archive"
+
+    def __init__(self, path):
+        """
+        :param path: Path of the SQLite archive database.
+        """
+        self.path = path
+        self.archive = None
+        self.batch = []
+
+    def emit(self, entry):
+        self.batch.append(entry)
+
+    def flush(self):
+        if not self.batch:
+            return
+        if self.archive is None:
+            self.archive = EntryArchive(self.path)
+        batch, self.batch = self.batch, []
+        self.archive.add_entries(batch)
+
+    def close(self):
+        self.flush()
+        if self.archive is not None:
+            self.archive.close()
+            self.archive = None
+
+
+class _FlushRequest:
+    """Marker queued to a sink worker to request a flush."""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+_STOP = object()
+
+
+class SinkWorker:
+    """SinkWorker feeds one sink from its own queue on a dedicated thread."""
+
+    def __init__(self, sink):
+        self.sink = sink
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="sink-%s" % sink.name, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                try:
+                    if self.sink.work():
+                        continue
+                except Exception as e:
+                    logging.error("Sink %s failed while delivering: %s", self.sink.name, e)
+                try:
+                    # Wake up periodically so time-based work (e.g. due digests) still runs.
+                    item = self.queue.get(timeout=WORKER_IDLE_WAIT)
+                except queue.Empty:
+                    continue
+
+            if item is _STOP:
+                try:
+                    self.sink.close()
+                except Exception as e:
+                    logging.error("Sink %s failed to close: %s", self.sink.name, e)
+                return
+            if isinstance(item, _FlushRequest):
+                try:
+                    self.sink.flush()
+                except Exception as e:
+                    logging.error("Sink %s failed to flush: %s", self.sink.name, e)
+                item.done.set()
+                continue
+            try:
+                self.sink.emit(item)
+            except Exception as e:
+                logging.error("Sink %s failed to accept entry %s: %s", self.sink.name, item.get("link"), e)
+
+
+class SinkDispatcher:
+    """
+    SinkDispatcher fans every entry out to all sinks.
+
+    Each sink runs on its own SinkWorker, so emit() never waits for a sink.
+    """
+
+    def __init__(self, sinks):
+        """
+        :param sinks: List of BaseSink instances.
+        """
+        self.workers = [SinkWorker(sink) for sink in sinks]
+
+    def emit(self, entry):
+        """
+        Hand an entry to every sink.
+
+        :param entry: Entry record.
+        """
+        for worker in self.workers:
+            worker.queue.put(entry)
+
+    def flush(self, timeout=None):
+        """
+        Ask every sink to flush and wait until they all have.
+
+        Sinks flush independently: a fast sink finishes its flush (and fsync) while a slow
+        sink is still delivering. Sinks that deliver in the background (wait_on_flush is
+        False) flush when their worker gets to it, without being waited for.
+
+        :param timeout: Maximum seconds to wait per sink, or None to wait indefinitely.
+        """
+        pending = []
+        for worker in self.workers:
+            request = _FlushRequest()
+            worker.queue.put(request)
+            if worker.sink.wait_on_flush:
+                pending.append((worker, request))
+        for worker, request in pending:
+            if not request.done.wait(timeout):
+                logging.warning("Sink %s did not finish flushing within %s seconds.", worker.sink.name, timeout)
+
+    def close(self):
+        """Flush and close all sinks and stop their workers."""
+        for worker in self.workers:
+            worker.queue.put(_STOP)
+        for worker in self.workers:
+            worker.thread.join()
@@ -4,6 +4,7 @@ import feedparser
 from bs4 import BeautifulSoup
 import html
 from aggregator.base_feed import BaseFeed
+from aggregator.entry import Entry, truncate_words
 
 class SophosFeed(BaseFeed):
     """
@@ -31,7 +32,7 @@ class SophosFeed(BaseFeed):
           - 'Overview' text: extracted from the advisory summary container.
             The overview is truncated to the first 40 words.
         
-        :return: A list of dictionaries representing the feed entries.
+        :return: A list of Entry records representing the feed entries.
         """
         entries = []
         for entry in self.feed.entries:
@@ -69,14 +70,13 @@ class SophosFeed(BaseFeed):
                 overview_text = soup.get_text(separator="\n").strip()
             
             # Limit the overview text to the first 40 words.
-            words = overview_text.split()
-            overview_limited = " ".join(words[:40])
+            overview_limited = truncate_words(overview_text)
             
-            entries.append({
-                "title": title,
-                "pub_date": pub_date,
-                "link": link,
-                "author": author, 
-                "overview": overview_limited
-            })
+            entries.append(Entry(
+                title=title,
+                pub_date=pub_date,
+                link=link,
+                author=author,
+                overview=overview_limited
+            ))
         return entries
@@ -0,0 +1,265 @@
+# aggregator/watchlist.py
+
+"""
+Content-based routing with keyword watchlists.
+
+FEED_DISCORD_WEBHOOKS routes by feed only. A watchlist file adds routing by content:
+vendor and product names, our own assets, threat-actor names, each list with its own
+webhooks. Watchlists hold thousands of terms, so they are compiled into one Aho-Corasick
+automaton that finds every term in an entry's title and overview in a single pass over
+the text, independent of the number of terms.
+
+Watchlist file format (JSON):
+
+    {
+        "vendors":  {"webhooks": ["https://discord.com/api/webhooks/..."],
+                     "terms": ["Fortinet", "Ivanti Connect Secure", ...]},
+        "actors":   {"webhooks": [...], "terms": ["Volt Typhoon", "APT29", ...]}
+    }
+
+Matching is case-insensitive, treats runs of whitespace as one space and only accepts
+whole-word matches ("ms" does not match inside "terms").
+
+Command line usage:
+    python -m aggregator.watchlist watchlist.json "Ivanti Connect Secure zero-day exploited"
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+
+MISSING = "missing"
+
+
+def normalize(text):
+    """
+    :param text: Term or text to match.
+    :return: Lowercased text with runs of whitespace collapsed to single spaces.
+    """
+    return " ".join(text.lower().split())
+
+
+class AhoCorasick:
+    """
+    Multi-pattern matcher over a fixed set of terms.
+
+    Usage:
+        automaton = AhoCorasick(["apt29", "volt typhoon"])
+        automaton.search("volt typhoon and apt29")  # {0, 1}
+    """
+
+    def __init__(self, terms):
+        """
+        :param terms: List of normalized terms; match results refer to their positions.
+        """
+        self.lengths = [len(term) for term in terms]
+        # State 0 is the root; goto[state] maps a character to the next state.
+        self.goto = [{}]
+        self.outputs = [()]
+        for term_id, term in enumerate(terms):
+            if not term:
+                continue
+            state = 0
+            for char in term:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][char] = next_state
+                    self.goto.append({})
+                    self.outputs.append(())
+                state = next_state
+            self.outputs[state] += (term_id,)
+
+        # Breadth-first: failure links point at the longest proper suffix that is also
+        # a prefix of some term; outputs inherit the terms ending at that suffix.
+        self.fail = [0] * len(self.goto)
+        pending = list(self.goto[0].values())
+        while pending:
+            following = []
+            for state in pending:
+                for char, child in self.goto[state].items():
+                    fallback = self.fail[state]
+                    while fallback and char not in self.goto[fallback]:
+                        fallback = self.fail[fallback]
+                    target = self.goto[fallback].get(char, 0)
+                    self.fail[child] = target if target != child else 0
+                    self.outputs[child] += self.outputs[self.fail[child]]
+                    following.append(child)
+            pending = following
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def search(self, text):
+        """
+        Find every term occurring as a whole word in text.
+
+        :param text: Normalized text.
+        :return: Set of matching term ids.
+        """
+        goto = self.goto
+        fail = self.fail
+        outputs = self.outputs
+        found = set()
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for term_id in outputs[state]:
+                start = position - self.lengths[term_id] + 1
+                if (start == 0 or not text[start - 1].isalnum()) \
+                        and (position + 1 == len(text) or not text[position + 1].isalnum()):
+                    found.add(term_id)
+        return found
+
+
+class Watchlist:
+    """Compiled watchlist: one automaton over the terms of every list."""
+
+    def __init__(self, lists):
+        """
+        :param lists: Mapping of list name to {"webhooks": [...], "terms": [...]}.
+        """
+        self.webhooks = {}
+        term_lists = {}
+        for name, spec in lists.items():
+            webhooks = spec.get("webhooks", [])
+            self.webhooks[name] = [webhooks] if isinstance(webhooks, str) else list(webhooks)
+            for term in spec.get("terms", []):
+                term = normalize(term)
+                if term:
+                    term_lists.setdefault(term, set()).add(name)
+        self.terms = list(term_lists)
+        self.term_lists = [term_lists[term] for term in self.terms]
+        self.automaton = AhoCorasick(self.terms)
+
+    @classmethod
+    def load(cls, path):
+        """
+        :param path: Path of the JSON watchlist file.
+        :return: Compiled Watchlist.
+        :raises ValueError: If the file is not valid watchlist JSON.
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            lists = json.load(f)
+        if not isinstance(lists, dict):
+            raise ValueError("watchlist must map list names to webhooks and terms")
+        return cls(lists)
+
+    def match(self, text):
+        """
+        :param text: Text to scan (normalized internally).
+        :return: Dictionary mapping each matching list name to its sorted matched terms.
+        """
+        matches = {}
+        for term_id in self.automaton.search(normalize(text)):
+            for name in self.term_lists[term_id]:
+                matches.setdefault(name, []).append(self.terms[term_id])
+        for terms in matches.values():
+            terms.sort()
+        return matches
+
+
+class WatchlistRouter:
+    """
+    WatchlistRouter adds watchlist webhooks to entries.
+
+    The compiled watchlist is kept in memory and only recompiled when the file's
+    modification time or size changes (checked at most every check_interval seconds).
+    If a changed file cannot be loaded, the previous watchlist stays in effect.
+    """
+
+    def __init__(self, path, check_interval=30):
+        """
+        :param path: Path of the JSON watchlist file.
+        :param check_interval: Minimum seconds between checks of the file for changes.
+        """
+        self.path = path
+        self.check_interval = check_interval
+        self.watchlist = None
+        self.signature = None
+        self.next_check = 0
+        self.reload()
+
+    def reload(self, now=None):
+        """
+        Recompile the watchlist if its file changed.
+
+        :param now: Current time (defaults to time.time()).
+        :return: True if a new watchlist was compiled.
+        """
+        now = time.time() if now is None else now
+        self.next_check = now + self.check_interval
+        try:
+            stat = os.stat(self.path)
+        except OSError as e:
+            # Logged once per disappearance, not on every check.
+            if self.signature != MISSING:
+                logging.error("Cannot read watchlist %s: %s", self.path, e)
+            self.signature = MISSING
+            return False
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == self.signature:
+            return False
+        self.signature = signature
+        try:
+            started = time.perf_counter()
+            self.watchlist = Watchlist.load(self.path)
+        except (OSError, ValueError, AttributeError) as e:
+            logging.error("Error loading watchlist %s, keeping the previous one: %s", self.path, e)
+            return False
+        logging.info("Compiled watchlist %s: %d terms in %d lists (%.0f ms).", self.path,
+                     len(self.watchlist.automaton), len(self.watchlist.webhooks),
+                     (time.perf_counter() - started) * 1000)
+        return True
+
+    def route(self, entry, now=None):
+        """
+        Match an entry against the watchlist and add the webhooks of every matching list.
+
+        :param entry: Entry record (updated in place: watchlists and routes).
+        :param now: Current time (defaults to time.time()).
+        :return: List of matching list names.
+        """
+        now = time.time() if now is None else now
+        if now >= self.next_check:
+            self.reload(now)
+        if self.watchlist is None:
+            return []
+        matches = self.watchlist.match("%s\n%s" % (entry.title or "", entry.overview or ""))
+        if not matches:
+            return []
+        names = sorted(matches)
+        routes = list(entry.routes or ())
+        for name in names:
+            for url in self.watchlist.webhooks.get(name, []):
+                if url not in routes:
+                    routes.append(url)
+        entry.watchlists = names
+        entry.routes = routes
+        logging.info("Watchlist match %s for %s", ", ".join(
+            "%s (%s)" % (name, ", ".join(matches[name])) for name in names), entry.link)
+        return names
+
+
+def main(argv=None):
+    """Print the watchlist matches of the given text."""
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) < 2:
+        print("Usage: python -m aggregator.watchlist <watchlist.json> <text>...")
+        sys.exit(1)
+    started = time.perf_counter()
+    watchlist = Watchlist.load(argv[0])
+    compiled = time.perf_counter()
+    matches = watchlist.match(" ".join(argv[1:]))
+    print("Compiled %d terms in %.1f ms, matched in %.3f ms" % (
+        len(watchlist.automaton), (compiled - started) * 1000, (time.perf_counter() - compiled) * 1000))
+    for name in sorted(matches):
+        print("%s: %s -> %s" % (name, ", ".join(matches[name]), ", ".join(watchlist.webhooks.get(name, [])) or "-"))
+
+
+if __name__ == "__main__":
+    main()
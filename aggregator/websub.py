@@ -0,0 +1,343 @@
+# aggregator/websub.py
+
+"""
+WebSub (PubSubHubbub) push ingestion.
+
+Feeds that advertise a hub (e.g. feedburner and Blogspot feeds) can push new content to
+us instead of being polled every cycle. WebSubSubscriber:
+  - discovers rel="hub" / rel="self" links in feeds parsed by the regular polling path,
+  - subscribes to the hub and renews the lease before it expires,
+  - runs a small embedded HTTP callback server that answers the hub's verification
+    requests and receives content distribution requests,
+  - parses pushed payloads through the feed class's own get_entries() and queues the
+    resulting entries in `inbox` for immediate delivery.
+
+While a subscription is active its feed is only polled every safety_poll_interval; as
+soon as the lease lapses or verification fails, the feed falls back to regular polling.
+"""
+
+import hmac
+import time
+import queue
+import logging
+import secrets
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import feedparser
+import requests
+
+PENDING = "pending"
+ACTIVE = "active"
+LAPSED = "lapsed"
+
+
+def discover_hub(parsed_feed, feed_url):
+    """
+    Find the WebSub hub and topic URLs advertised by a parsed feed.
+
+    :param parsed_feed: feedparser result.
+    :param feed_url: URL the feed was fetched from (fallback topic).
+    :return: A (hub_url, topic_url) tuple, or None if the feed advertises no hub.
+    """
+    if parsed_feed is None:
+        return None
+    hub = None
+    topic = None
+    for link in parsed_feed.get("feed", {}).get("links", []):
+        rel = link.get("rel")
+        if rel == "hub" and not hub:
+            hub = link.get("href")
+        elif rel == "self" and not topic:
+            topic = link.get("href")
+    if not hub:
+        return None
+    return hub, topic or feed_url
+
+
+class Subscription:
+    """State of one WebSub subscription."""
+
+    __slots__ = ("topic", "hub", "feed_class", "feed_url", "token", "secret", "state",
+                 "lease_expires", "requested_at", "awaiting_verification", "last_polled", "last_push")
+
+    def __init__(self, topic, hub, feed_class, feed_url):
+        self.topic = topic
+        self.hub = hub
+        self.feed_class = feed_class
+        self.feed_url = feed_url
+        # The callback URL is the only credential of verification requests: unguessable.
+        self.token = secrets.token_urlsafe(24)
+        self.secret = secrets.token_hex(20)
+        self.state = PENDING
+        self.lease_expires = 0
+        self.requested_at = 0
+        # True between our (re)subscription request and the hub's verification of it.
+        self.awaiting_verification = False
+        self.last_polled = 0
+        self.last_push = None
+
+
+class WebSubSubscriber:
+    """
+    WebSubSubscriber manages push subscriptions and the callback server.
+
+    Usage:
+        subscriber.start()
+        ...  # polling path calls subscriber.discover(feed_instance) after each parse
+        subscriber.maintain()  # once per cycle: subscribe, renew, detect lapsed leases
+        entry = subscriber.inbox.get(timeout=...)
+    """
+
+    def __init__(self, callback_url, listen_host="0.0.0.0", listen_port=8085,
+                 lease_seconds=5 * 86400, safety_poll_interval=3600, verify_timeout=600):
+        """
+        :param callback_url: Public base URL under which the hub reaches the callback server.
+        :param listen_host: Interface the callback server binds to.
+        :param listen_port: Port the callback server binds to.
+        :param lease_seconds: Lease requested from hubs.
+        :param safety_poll_interval: Seconds between safety polls of push-enabled feeds.
+        :param verify_timeout: Seconds to wait for a hub's verification before retrying.
+        """
+        self.callback_url = callback_url.rstrip("/")
+        self.listen_host = listen_host
+        self.listen_port = listen_port
+        self.lease_seconds = lease_seconds
+        self.safety_poll_interval = safety_poll_interval
+        self.verify_timeout = verify_timeout
+        self.lock = threading.Lock()
+        self.subscriptions = {}
+        self.by_token = {}
+        self.inbox = queue.Queue()
+        self.server = None
+
+    # -- polling integration -------------------------------------------------
+
+    def discover(self, feed_instance):
+        """
+        Register a hub advertised by a freshly parsed feed.
+
+        :param feed_instance: BaseFeed instance whose parsed feed is still loaded.
+        """
+        found = discover_hub(feed_instance.feed, feed_instance.url)
+        if not found:
+            return
+        hub, topic = found
+        with self.lock:
+            if feed_instance.url in self.subscriptions:
+                return
+            subscription = Subscription(topic, hub, feed_instance.__class__, feed_instance.url)
+            self.subscriptions[feed_instance.url] = subscription
+            self.by_token[subscription.token] = subscription
+        logging.info("Discovered WebSub hub %s for %s", hub, topic)
+
+    def should_poll(self, feed_url, now=None):
+        """
+        :param feed_url: Feed URL.
+        :param now: Current time (defaults to time.time()).
+        :return: False while an active push subscription covers the feed, except for
+            periodic safety polls.
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            subscription = self.subscriptions.get(feed_url)
+            if subscription is None or subscription.state != ACTIVE or subscription.lease_expires <= now:
+                return True
+            if now - subscription.last_polled >= self.safety_poll_interval:
+                subscription.last_polled = now
+                return True
+            return False
+
+    def maintain(self, now=None):
+        """
+        Subscribe to newly discovered hubs, renew expiring leases and fall back to polling
+        for subscriptions whose lease lapsed or whose verification never arrived.
+
+        :param now: Current time (defaults to time.time()).
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            subscriptions = list(self.subscriptions.values())
+        for subscription in subscriptions:
+            if subscription.state == ACTIVE:
+                if subscription.lease_expires <= now:
+                    logging.warning("WebSub lease for %s lapsed, falling back to polling.", subscription.topic)
+                    subscription.state = LAPSED
+                else:
+                    remaining = subscription.lease_expires - now
+                    if remaining > min(3600, self.lease_seconds / 10):
+                        continue
+            elif subscription.state == PENDING and subscription.requested_at \
+                    and now - subscription.requested_at < self.verify_timeout:
+                continue
+            self._subscribe(subscription, now)
+
+    def _subscribe(self, subscription, now):
+        subscription.requested_at = now
+        if subscription.state != ACTIVE:
+            subscription.state = PENDING
+        # Set before the request: hubs may verify before they answer it.
+        subscription.awaiting_verification = True
+        accepted = False
+        try:
+            response = requests.post(subscription.hub, data={
+                "hub.mode": "subscribe",
+                "hub.topic": subscription.topic,
+                "hub.callback": "%s/%s" % (self.callback_url, subscription.token),
+                "hub.lease_seconds": str(self.lease_seconds),
+                "hub.secret": subscription.secret,
+            }, timeout=15)
+            if response.status_code not in (202, 204):
+                logging.error("WebSub hub %s rejected subscription to %s: HTTP %s",
+                              subscription.hub, subscription.topic, response.status_code)
+            else:
+                accepted = True
+                logging.info("Requested WebSub subscription to %s via %s", subscription.topic, subscription.hub)
+        except Exception as e:
+            logging.error("Error subscribing to WebSub hub %s: %s", subscription.hub, e)
+        if not accepted:
+            with self.lock:
+                subscription.awaiting_verification = False
+
+    # -- callback server -----------------------------------------------------
+
+    def verify(self, token, params, now=None):
+        """
+        Handle a hub's verification of intent.
+
+        Only answers to our own pending request are confirmed: a subscribe or denied
+        verification while a subscription request awaits verification. Unsolicited
+        requests, including every unsubscribe (which we never request), are refused, so a
+        third party cannot switch a feed to push-only or off push. The lease is capped at
+        the one requested.
+
+        :param token: Callback token from the request path.
+        :param params: Query parameters of the verification request.
+        :param now: Current time (defaults to time.time()).
+        :return: The challenge to echo, or None if the request must be refused.
+        """
+        now = time.time() if now is None else now
+        mode = params.get("hub.mode")
+        topic = params.get("hub.topic")
+        with self.lock:
+            subscription = self.by_token.get(token)
+            if subscription is None or topic != subscription.topic or not subscription.awaiting_verification:
+                return None
+            if mode == "subscribe":
+                try:
+                    lease = min(int(params.get("hub.lease_seconds", self.lease_seconds)), self.lease_seconds)
+                except ValueError:
+                    lease = self.lease_seconds
+                if lease <= 0:
+                    return None
+                subscription.state = ACTIVE
+                subscription.lease_expires = now + lease
+                subscription.last_polled = now
+                subscription.awaiting_verification = False
+                logging.info("WebSub subscription to %s active for %d seconds.", topic, lease)
+            elif mode == "denied":
+                subscription.state = LAPSED
+                subscription.awaiting_verification = False
+                logging.warning("WebSub hub denied subscription to %s: %s", topic, params.get("hub.reason"))
+            else:
+                return None
+        return params.get("hub.challenge", "")
+
+    def receive(self, token, body, signature):
+        """
+        Handle a content distribution request from a hub.
+
+        The payload is parsed with feedparser and run through the feed class's own
+        get_entries(); the resulting entries are queued in the inbox.
+
+        :param token: Callback token from the request path.
+        :param body: Raw request body.
+        :param signature: Value of the X-Hub-Signature header (may be None).
+        :return: Number of entries queued, or None if the request was rejected.
+        """
+        with self.lock:
+            subscription = self.by_token.get(token)
+        if subscription is None:
+            return None
+        if not self._signature_valid(subscription.secret, body, signature):
+            logging.warning("Rejected WebSub push for %s with invalid signature.", subscription.topic)
+            # Per spec, acknowledge but ignore content with an invalid signature.
+            return 0
+
+        feed_instance = subscription.feed_class(subscription.feed_url)
+        feed_instance.feed = feedparser.parse(body)
+        try:
+            feed_instance.validate()
+            entries = feed_instance.get_entries()
+        except Exception as e:
+            logging.error("Error processing WebSub push for %s: %s", subscription.topic, e)
+            return 0
+        finally:
+            feed_instance.release()
+
+        subscription.last_push = time.time()
+        feed_type = feed_instance.__class__.__name__
+        for entry in entries:
+            entry.feed_type = feed_type
+            entry.first_seen = subscription.last_push
+            self.inbox.put(entry)
+        logging.info("Received WebSub push for %s with %d entries.", subscription.topic, len(entries))
+        return len(entries)
+
+    @staticmethod
+    def _signature_valid(secret, body, signature):
+        if not signature or "=" not in signature:
+            return False
+        method, digest = signature.split("=", 1)
+        if method not in ("sha1", "sha256", "sha384", "sha512"):
+            return False
+        expected = hmac.new(secret.encode("utf-8"), body, method).hexdigest()
+        return hmac.compare_digest(expected, digest.strip().lower())
+
+    def start(self):
+        """Start the embedded callback server on a background thread."""
+        subscriber = self
+        prefix = urlparse(self.callback_url).path.rstrip("/")
+
+        class CallbackHandler(BaseHTTPRequestHandler):
+            def _token(self):
+                path = urlparse(self.path).path
+                if not path.startswith(prefix + "/"):
+                    return None
+                return path[len(prefix) + 1:].strip("/")
+
+            def do_GET(self):
+                params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+                challenge = subscriber.verify(self._token(), params)
+                if challenge is None:
+                    self.send_error(404)
+                    return
+                payload = challenge.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                result = subscriber.receive(self._token(), body, self.headers.get("X-Hub-Signature"))
+                if result is None:
+                    self.send_error(404)
+                    return
+                self.send_response(204)
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((self.listen_host, self.listen_port), CallbackHandler)
+        threading.Thread(target=self.server.serve_forever, name="websub-callback", daemon=True).start()
+        logging.info("WebSub callback server listening on %s:%d", self.listen_host, self.server.server_port)
+
+    def stop(self):
+        """Stop the callback server."""
+        if self.server is not None:
+            self.server.shutdown()
+            self.server = None
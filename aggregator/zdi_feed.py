@@ -1,7 +1,8 @@
-import feedparser
 from bs4 import BeautifulSoup
 import html
 from aggregator.base_feed import BaseFeed
+from aggregator.streaming import stream_parse
+from aggregator.entry import Entry, truncate_words
 
 class ZDIFeed(BaseFeed):
     """
@@ -17,15 +18,16 @@ class ZDIFeed(BaseFeed):
 
     def load(self):
         """
-        Load the RSS feed from the specified URL using feedparser.
+        Load the newest items of the RSS feed incrementally.
         """
-        self.feed = feedparser.parse(self.url)
+        # The published feed lists every advisory of the year: only its newest items are read.
+        self.feed = stream_parse(self.url, self.stream_max_items, self.seen)
 
     def get_entries(self):
         """
         Process each entry in the ZDI RSS feed and extract the required fields.
 
-        :return: A list of dictionaries representing the feed entries.
+        :return: A list of Entry records representing the feed entries.
         """
         entries = []
         for entry in self.feed.entries:
@@ -44,15 +46,14 @@ class ZDIFeed(BaseFeed):
             overview_text = overview_text.replace("<![CDATA[", "").replace("]]>", "")
 
             # Limit the overview text to the first 40 words.
-            words = overview_text.split()
-            overview_limited = " ".join(words[:40])
-
-            entries.append({
-                "title": title,
-                "pub_date": pub_date,
-                "link": link,
-                "author": author,
-                "overview": overview_limited
-            })
+            overview_limited = truncate_words(overview_text)
+
+            entries.append(Entry(
+                title=title,
+                pub_date=pub_date,
+                link=link,
+                author=author,
+                overview=overview_limited
+            ))
 
         return entries
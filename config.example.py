@@ -14,6 +14,67 @@ FEED_DISCORD_WEBHOOKS:
     For example, if you want Cisco feed entries to appear in two separate channels, include both webhook
     URLs in the list for the "CiscoFeed" key.
     
+FEED_PRIORITIES (optional):
+    A dictionary mapping feed type identifiers to a priority class: "critical", "high",
+    "normal" or "low". Entries with a parsed severity (e.g. CVEFeed's "9.8 | CRITICAL") are
+    classed by severity; otherwise the feed priority applies (default "normal"). Higher
+    classes get a larger share of Discord deliveries when a burst is queued.
+
+JSONL_SINK_FILE (optional):
+    Path of a JSON-lines file that receives every new entry (one JSON object per line),
+    e.g. for SIEM ingestion. Leave unset or None to disable.
+
+NEAR_DUPLICATE_FEEDS / NEAR_DUPLICATE_MODE (optional):
+    Feed types whose entries are checked for near-duplicate coverage of the same story,
+    and what to do with a near-duplicate: "thread" posts it as a compact reference to the
+    first story, "suppress" drops it.
+
+WEBSUB_CALLBACK_URL (optional):
+    Public base URL (reachable by WebSub hubs) under which the embedded callback server is
+    exposed, e.g. "https://feeds.example.com/websub". Feeds whose hub is discovered are then
+    received by push instead of polling. WEBSUB_LISTEN_HOST / WEBSUB_LISTEN_PORT set the
+    local bind address. Leave unset to disable push ingestion.
+
+DIGEST_FEEDS / DIGEST_WEBHOOKS (optional):
+    Digest windows in seconds, per feed type and per webhook URL. Matching entries are
+    buffered and posted as one compact multi-item message per webhook once the window has
+    elapsed, saving Discord rate-limit budget. Critical and high severity entries are
+    always posted immediately.
+
+NVD_INDEX_FILE (optional):
+    Index built from a local NVD JSON mirror with `python -m aggregator.nvd build`. Entries
+    from any feed that name a CVE are enriched with its CVSS score, vector and CWE without
+    network access. Leave unset to disable enrichment.
+
+WATCHLIST_FILE (optional):
+    JSON file of keyword lists (vendors, assets, threat actors, ...) with their own
+    webhooks; see watchlist.example.json. Entries whose title or overview mention a term
+    are also posted to that list's webhooks. The file is reloaded when it changes.
+
+FRESHNESS_PROMETHEUS_FILE (optional):
+    File the publication-to-post latency histograms (per feed and per webhook) are exported
+    to in the Prometheus text format, e.g. for node_exporter's textfile collector. The
+    histograms are always persisted to freshness.json.
+
+ARTICLE_ENRICH_FEEDS / ARTICLE_DEADLINE (optional):
+    Feed types whose new entries get their overview from the linked article or advisory
+    page when it yields more text than the feed's description. Pages are fetched
+    concurrently and cached on disk (article_cache/); an entry never waits longer than
+    ARTICLE_DEADLINE seconds for its page. Leave empty to disable.
+
+REORDER_LATENESS (optional):
+    Seconds of publication-time lateness within which entries of different feeds are
+    delivered in chronological order (default 3600). An entry is held back only until no
+    earlier entry can arrive within this allowance; larger values order more strictly
+    but post later. None delivers each feed's entries as soon as the feed is parsed.
+
+GITHUB_ADVISORY_MIRROR (optional):
+    Path of a local git clone of https://github.com/github/advisory-database, kept up to
+    date separately (e.g. `git -C <path> pull` from cron). GithubFeed then reads only the
+    advisories added since the last processed commit instead of the advisory web page,
+    with severity, CVSS vector, CWE and affected packages from their OSV JSON. Use a full
+    clone: shallow clones lack the history the first read starts from.
+
 Usage:
     In your aggregator code, import these variables:
         from config import GLOBAL_DISCORD_WEBHOOK, FEED_DISCORD_WEBHOOKS
@@ -71,3 +132,57 @@ FEED_DISCORD_WEBHOOKS = {
     ],
     # Add additional feed-specific webhooks as needed.
 }
+
+# Optional priority class per feed type. Feeds not listed default to "normal".
+FEED_PRIORITIES = {
+    "CVEFeed": "normal",
+    "MicrosoftFeed": "high",
+    "SchneierFeed": "low",
+    "HackerNewsFeed": "low",
+    "BleepingComputerFeed": "low",
+}
+
+# Optional JSON-lines output for SIEM ingestion. Set to None to disable.
+JSONL_SINK_FILE = "entries.jsonl"
+
+# Optional near-duplicate handling for news feeds that often cover the same story.
+NEAR_DUPLICATE_FEEDS = {"HackerNewsFeed", "BleepingComputerFeed", "CheckPointFeed", "SchneierFeed", "InfostealerFeed"}
+NEAR_DUPLICATE_MODE = "thread"
+
+# Optional WebSub push ingestion. The callback server listens on WEBSUB_LISTEN_HOST:WEBSUB_LISTEN_PORT
+# and must be reachable by hubs under WEBSUB_CALLBACK_URL (e.g. behind a reverse proxy).
+WEBSUB_CALLBACK_URL = None  # e.g. "https://feeds.example.com/websub"
+WEBSUB_LISTEN_HOST = "0.0.0.0"
+WEBSUB_LISTEN_PORT = 8085
+
+# Optional digest mode: roll low-priority feeds into one message per webhook and window (seconds).
+DIGEST_FEEDS = {
+    "SchneierFeed": 3600,
+    "HackerNewsFeed": 1800,
+}
+DIGEST_WEBHOOKS = {
+    # "https://discord.com/api/webhooks/YOUR_GLOBAL_WEBHOOK_ID/YOUR_GLOBAL_WEBHOOK_TOKEN": 900,
+}
+
+# Optional offline CVSS enrichment from a local NVD mirror (python -m aggregator.nvd build nvd.idx <mirror>).
+NVD_INDEX_FILE = None  # e.g. "nvd.idx"
+
+# Optional content-based routing by keyword watchlists (see watchlist.example.json).
+WATCHLIST_FILE = None  # e.g. "watchlist.json"
+
+# Optional Prometheus export of the freshness histograms (node_exporter textfile collector).
+FRESHNESS_PROMETHEUS_FILE = None  # e.g. "/var/lib/node_exporter/textfile/threatfeed.prom"
+
+# Optional linked-article enrichment for feeds with weak descriptions.
+ARTICLE_ENRICH_FEEDS = {
+    # "GithubFeed",
+    # "MicrosoftFeed",
+    # "SophosFeed",
+}
+ARTICLE_DEADLINE = 5
+
+# Publication-time lateness (seconds) within which entries are delivered in chronological order.
+REORDER_LATENESS = 3600
+
+# Optional local git mirror of github/advisory-database for GithubFeed.
+GITHUB_ADVISORY_MIRROR = None  # e.g. "/srv/mirror/advisory-database"
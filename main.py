@@ -4,37 +4,155 @@ Main Entry Point for the RSS Feed Aggregator
 This script aggregates multiple RSS feeds using modules from the aggregator package.
 It prints out standardized feed entries and ensures that each entry is processed only once
 by maintaining a persistent record of processed entries in a JSON file.
-It polls all feeds, aggregates new entries, sorts them by publication date, and posts them 
-in chronological order while respecting Discord’s rate limit.
+It polls all feeds through a staged fetch -> parse -> dedup -> deliver pipeline, so new
+entries start delivery as soon as their feed is parsed, and posts them by priority class
+(critical CVEs first) while respecting Discord’s rate limit.
+The same entries are also written to the searchable archive and, if configured,
+to a JSON-lines file for SIEM ingestion.
 """
 
 import os
+import sys
 import json
 import time
+import queue
+import signal
 import logging
-import requests
-from dateutil.parser import parse as parse_date  
+import argparse
+import importlib
+import config
 from config import GLOBAL_DISCORD_WEBHOOK, FEED_DISCORD_WEBHOOKS
 
-from aggregator.sophos_feed import SophosFeed
-from aggregator.cisco_feed import CiscoFeed
-from aggregator.zdi_feed import ZDIFeed
-from aggregator.projectzero_feed import ProjectZeroFeed
-from aggregator.githubsec_feed import GithubFeed
-from aggregator.checkpoint_feed import CheckPointFeed
-from aggregator.hackernews_feed import HackerNewsFeed
-from aggregator.bleepingcomputer_feed import BleepingComputerFeed
-from aggregator.microsoft_feed import MicrosoftFeed
-from aggregator.schneier_feed import SchneierFeed 
-from aggregator.cve_feed import CVEFeed
-from aggregator.infostealer_feed import InfostealerFeed
+# Feed modules (and the parsers they pull in) are imported lazily, see load_feed_class().
+from aggregator.dedup import NearDuplicateDetector
+from aggregator.pipeline import FeedPipeline
+from aggregator.health import FeedHealthTracker
+from aggregator.freshness import FreshnessTracker
+from aggregator.sinks import ArchiveSink, DiscordSink, JsonLinesSink, SinkDispatcher
 
 # File used to persist processed entry identifiers (e.g., URLs)
 POSTED_FILE = "posted_entries.json"
+# SQLite database holding the searchable archive of posted entries
+ARCHIVE_FILE = "archive.db"
 # Global polling interval for the overall loop (in seconds)
 GLOBAL_SLEEP_INTERVAL = 30  # For example, 5 minutes
-# Delay between processing individual feeds (in seconds)
+# Delay between two fetches of the same fetch worker (in seconds)
 DELAY_BETWEEN_FEEDS = 1
+# Number of feeds fetched concurrently
+FETCH_WORKERS = 4
+# Capacity of the bounded queues between pipeline stages
+PIPELINE_QUEUE_SIZE = 64
+# Publication-time lateness (in seconds) within which entries of different feeds are delivered in
+# chronological order; an entry is held until no earlier one can arrive within it (None disables)
+REORDER_LATENESS = getattr(config, "REORDER_LATENESS", 3600)
+# Maximum number of entries held back for reordering
+REORDER_CAPACITY = 1000
+
+# Optional per-feed priority class ("critical", "high", "normal", "low"), see config.example.py
+FEED_PRIORITIES = getattr(config, "FEED_PRIORITIES", {})
+# Relative delivery share of each priority class while several classes are waiting
+PRIORITY_CLASS_WEIGHTS = {"critical": 8, "high": 4, "normal": 2, "low": 1}
+# Never deliver entries to a webhook out of their chronological order, even across classes
+PRESERVE_CHANNEL_ORDER = False
+# SQLite database Discord deliveries spill to once DELIVERY_MEMORY_LIMIT are queued in memory;
+# the spilled backlog is delivered in the background, oldest first, while polling continues
+DELIVERY_BACKLOG_FILE = "backlog.db"
+DELIVERY_MEMORY_LIMIT = 100
+# Critical and high deliveries that may be queued in memory beyond that before they spill too
+DELIVERY_URGENT_LIMIT = 20
+# Requests per webhook rate-limit window that backlog catch-up leaves free for fresh entries
+CATCHUP_RESERVE = 1
+
+# JSON-lines file receiving every new entry for SIEM ingestion (None disables the sink)
+JSONL_SINK_FILE = getattr(config, "JSONL_SINK_FILE", None)
+# Entries buffered in memory before the JSON-lines sink writes them out
+JSONL_BUFFER_ENTRIES = 256
+# Size at which the JSON-lines file is rotated, and number of rotated files kept
+JSONL_MAX_BYTES = 50 * 1024 * 1024
+JSONL_BACKUP_COUNT = 5
+
+# News feeds checked for near-duplicate coverage of the same story under different URLs
+NEAR_DUPLICATE_FEEDS = getattr(config, "NEAR_DUPLICATE_FEEDS", {
+    "HackerNewsFeed", "BleepingComputerFeed", "CheckPointFeed", "SchneierFeed", "InfostealerFeed",
+})
+# "suppress" drops near-duplicates, "thread" posts them as a compact reference to the first story
+NEAR_DUPLICATE_MODE = getattr(config, "NEAR_DUPLICATE_MODE", "thread")
+# Minimum Jaccard similarity of the word shingles of near-duplicates (checked by
+# tools/dedup_check.py against real-world coverage pairs), and how long stories are remembered
+NEAR_DUPLICATE_THRESHOLD = 0.3
+NEAR_DUPLICATE_WINDOW = 72 * 3600
+# File persisting the stories of that window across runs and restarts
+NEAR_DUPLICATE_STATE_FILE = "near_duplicates.json"
+
+# File persisting per-feed health (consecutive failures, backoff, quarantine)
+FEED_HEALTH_FILE = "feed_health.json"
+# Backoff after a feed's first failure (doubled per further failure) and its upper bound (in seconds)
+FEED_BACKOFF_BASE = 60
+FEED_BACKOFF_MAX = 3600
+# Upper bound of the backoff after network or server errors, which never quarantine a feed (in seconds)
+FEED_TRANSIENT_BACKOFF_MAX = 300
+# Consecutive failures after which a feed is quarantined, and how often it is then probed (in seconds)
+FEED_QUARANTINE_AFTER = 8
+FEED_PROBE_INTERVAL = 6 * 3600
+
+# Public base URL of the WebSub callback server (None disables push ingestion)
+WEBSUB_CALLBACK_URL = getattr(config, "WEBSUB_CALLBACK_URL", None)
+# Interface and port the WebSub callback server listens on
+WEBSUB_LISTEN_HOST = getattr(config, "WEBSUB_LISTEN_HOST", "0.0.0.0")
+WEBSUB_LISTEN_PORT = getattr(config, "WEBSUB_LISTEN_PORT", 8085)
+# Lease requested from hubs, and how often push-enabled feeds are still polled as a safety net (in seconds)
+WEBSUB_LEASE_SECONDS = 5 * 86400
+WEBSUB_SAFETY_POLL_INTERVAL = 3600
+
+# Digest windows (in seconds) per feed type and per webhook URL; matching entries are rolled
+# into one combined message per webhook and window instead of being posted one by one
+DIGEST_FEEDS = getattr(config, "DIGEST_FEEDS", {})
+DIGEST_WEBHOOKS = getattr(config, "DIGEST_WEBHOOKS", {})
+# SQLite database durably buffering entries waiting for their digest
+DIGEST_FILE = "digest.db"
+
+# Offline CVSS enrichment: index built from a local NVD mirror with `python -m aggregator.nvd build`
+NVD_INDEX_FILE = getattr(config, "NVD_INDEX_FILE", None)
+
+# Content-based routing: JSON watchlist file mapping term lists to extra webhooks
+WATCHLIST_FILE = getattr(config, "WATCHLIST_FILE", None)
+WATCHLIST_CHECK_INTERVAL = 30
+
+# Publication-to-post latency histograms per feed and webhook
+FRESHNESS_FILE = "freshness.json"
+FRESHNESS_PROMETHEUS_FILE = getattr(config, "FRESHNESS_PROMETHEUS_FILE", None)
+
+# Linked-article enrichment for feeds with weak descriptions (disabled when empty)
+ARTICLE_ENRICH_FEEDS = getattr(config, "ARTICLE_ENRICH_FEEDS", set())
+ARTICLE_DEADLINE = getattr(config, "ARTICLE_DEADLINE", 5)
+ARTICLE_CACHE_DIR = "article_cache"
+ARTICLE_WORKERS = 8
+ARTICLE_PER_HOST = 2
+ARTICLE_TIMEOUT = 10
+
+# Local git mirror of github/advisory-database read incrementally instead of the advisory page
+GITHUB_ADVISORY_MIRROR = getattr(config, "GITHUB_ADVISORY_MIRROR", None)
+
+# Feed classes (as dotted import paths, imported only when polled) and the URLs they are polled from.
+FEEDS = [
+    ("aggregator.sophos_feed.SophosFeed", "https://www.sophos.com/de-de/security-advisories/feed"),
+    ("aggregator.cisco_feed.CiscoFeed", "https://newsroom.cisco.com/c/services/i/servlets/newsroom/rssfeed.json?feed=security"),
+    ("aggregator.zdi_feed.ZDIFeed", "https://www.zerodayinitiative.com/rss/published/"),
+    ("aggregator.projectzero_feed.ProjectZeroFeed", "https://googleprojectzero.blogspot.com/feeds/posts/default"),
+    ("aggregator.githubsec_feed.GithubFeed", GITHUB_ADVISORY_MIRROR or "https://github.com/security-advisories"),
+    ("aggregator.checkpoint_feed.CheckPointFeed", "https://research.checkpoint.com/feed/"),
+    ("aggregator.hackernews_feed.HackerNewsFeed", "https://feeds.feedburner.com/TheHackersNews/"),
+    ("aggregator.bleepingcomputer_feed.BleepingComputerFeed", "https://www.bleepingcomputer.com/feed/"),
+    ("aggregator.microsoft_feed.MicrosoftFeed", "https://msrc.microsoft.com/blog/feed/"),
+    ("aggregator.schneier_feed.SchneierFeed", "https://www.schneier.com/feed/atom/"),
+    ("aggregator.cve_feed.CVEFeed", "https://cvefeed.io/rssfeed/latest.xml"),
+    ("aggregator.infostealer_feed.InfostealerFeed", "https://www.infostealers.com/learn-info-stealers/feed/"),
+]
+
+# Exit statuses of a single-cycle (--once) run
+EXIT_OK = 0
+EXIT_FAILURE = 1
+EXIT_FEED_ERRORS = 2
 
 # Configure logging
 logging.basicConfig(
@@ -51,10 +169,10 @@ def load_posted_entries():
     """Loads the set of already processed entry IDs from a JSON file."""
     if os.path.exists(POSTED_FILE):
         try:
-            with open(POSTED_FILE, "r", encoding="utf-8") as f:
-                posted = json.load(f)
+            with open(POSTED_FILE, "rb") as f:
+                posted = set(json.loads(f.read()))
                 logging.info(f"Loaded {len(posted)} posted entries.")
-                return set(posted)
+                return posted
         except json.JSONDecodeError as e:
             logging.error("Error decoding JSON from posted entries file: %s", e)
             return set()
@@ -65,169 +183,355 @@ def load_posted_entries():
 def save_posted_entries(posted_entries):
     """Saves the set of processed entry IDs to a JSON file."""
     try:
+        # Written compactly: the file grows with every entry and is decoded at every start.
         with open(POSTED_FILE, "w", encoding="utf-8") as f:
-            json.dump(list(posted_entries), f, indent=2)
+            json.dump(list(posted_entries), f, separators=(",", ":"))
         logging.info("Successfully saved %d posted entries.", len(posted_entries))
     except Exception as e:
         logging.error("Failed to save posted entries: %s", e)
 
 
-def post_to_discord(entry, webhook_urls):
-    """
-    Sends a structured message to Discord using embeds while respecting rate limits.
-    If the entry is from the CVEFeed, an additional severity line is included in the embed.
-
-    :param entry: Dictionary containing feed entry data.
-    :param webhook_urls: List (or single string) of Discord webhook URLs to send the message to.
-    """
-    # Check if the entry is from CVEFeed
-    if entry.get("feed_type") == "CVEFeed":
-        
-        embed = {
-            "title": entry["title"],
-            "url": entry["link"],
-            "description": (
-                f"**Published on:** {entry['pub_date']}\n"
-                f"**Author:** {entry['author']}\n\n"
-                f"**Severity:** {entry['severity']}\n\n"
-                f"**Overview:** {entry['overview']}..."
-            ),
-            "color": 0xff0000  # Red color for CVE alerts
-        }
-    else:
-        embed = {
-            "title": entry["title"],
-            "url": entry["link"],
-            "description": (
-                f"**Published on:** {entry['pub_date']}\n"
-                f"**Author:** {entry['author']}\n\n"
-                f"**Overview:** {entry['overview']}..."
-            ),
-            "color": 0x007bff  # Blue color for regular feeds
-        }
-
-    payload = {
-        "username": "ThreatFeed HQ",
-        "embeds": [embed]
-    }
-
-    # Ensure webhook_urls is a list
-    if not isinstance(webhook_urls, list):
-        webhook_urls = [webhook_urls]
-
-    for url in webhook_urls:
-        while True:  # retry if rate limit is reached
-            try:
-                response = requests.post(url, json=payload)
-                if response.status_code == 204:
-                    logging.info("Successfully posted to Discord via webhook: %s", url)
-                    break  
-                elif response.status_code == 429:  # Rate Limit Error
-                    retry_after = response.json().get("retry_after", 1)  # wait 1 second
-                    logging.warning(f"Rate limit hit! Waiting {retry_after} seconds...")
-                    time.sleep(retry_after)  # wait for next try
-                else:
-                    logging.error("Discord webhook returned status %s: %s", response.status_code, response.text)
-                    break  
-
-            except Exception as e:
-                logging.error("Error posting to Discord: %s", e)
-                break  
-
-
-def aggregate_new_entries(posted_entries):
-    """
-    Aggregates new entries from all configured feeds into a single list.
-    Each new entry is augmented with its feed type for later channel-specific posting.
+def load_feed_class(path):
+    """
+    Imports a feed class from its dotted path, so feed modules and the parsers they use
+    are only imported for feeds that are actually polled.
 
-    :param posted_entries: A set of already processed entry IDs.
-    :return: A list of new entry dictionaries.
-    """
-    new_entries = []
-    # List of feed instances to process.
-    feeds = [
-        SophosFeed("https://www.sophos.com/de-de/security-advisories/feed"),
-        CiscoFeed("https://newsroom.cisco.com/c/services/i/servlets/newsroom/rssfeed.json?feed=security"),
-        ZDIFeed("https://www.zerodayinitiative.com/rss/published/"),
-        ProjectZeroFeed("https://googleprojectzero.blogspot.com/feeds/posts/default"),
-        GithubFeed("https://github.com/security-advisories"),
-        CheckPointFeed("https://research.checkpoint.com/feed/"),
-        HackerNewsFeed("https://feeds.feedburner.com/TheHackersNews/"),
-        BleepingComputerFeed("https://www.bleepingcomputer.com/feed/"),
-        MicrosoftFeed("https://msrc.microsoft.com/blog/feed/"),
-        SchneierFeed("https://www.schneier.com/feed/atom/"),
-        CVEFeed("https://cvefeed.io/rssfeed/latest.xml"),
-        InfostealerFeed("https://www.infostealers.com/learn-info-stealers/feed/")
-        
-    ]
+    :param path: Dotted path such as "aggregator.cve_feed.CVEFeed".
+    :return: The feed class.
+    """
+    module_name, class_name = path.rsplit(".", 1)
+    return getattr(importlib.import_module(module_name), class_name)
 
+
+def aggregate_new_entries(posted_entries, feed_health, websub=None, summary=None, enricher=None):
+    """
+    Streams new entries from all configured feeds.
+    Feeds are fetched concurrently and entries are yielded, augmented with their feed type,
+    as soon as their feed has been parsed and no earlier entry can still arrive within
+    REORDER_LATENESS, so delivery follows publication order across feeds.
+
+    :param posted_entries: A set of already processed entry IDs.
+    :param feed_health: FeedHealthTracker deciding which feeds are polled this cycle.
+    :param websub: Optional WebSubSubscriber; feeds it receives by push are not polled.
+    :param summary: Optional dictionary that receives "polled", "skipped" and "failed" counts.
+    :param enricher: Optional ArticleEnricher improving overviews from linked pages.
+    :return: A generator of new Entry records.
+    """
+    # Feeds backing off, quarantined or covered by push are skipped (and never imported).
+    due = [(path, url) for path, url in FEEDS if feed_health.should_poll(url)]
+    skipped = len(FEEDS) - len(due)
+    if skipped:
+        logging.info("Skipping %d unhealthy feed(s) this cycle.", skipped)
+    if websub is not None:
+        due = [(path, url) for path, url in due if websub.should_poll(url)]
+    feeds = [load_feed_class(path)(url) for path, url in due]
     for feed_instance in feeds:
-        try:
-            feed_instance.load()
-            logging.info("Loaded feed from URL: %s", feed_instance.url)
-        except Exception as e:
-            logging.error("Error loading feed from URL %s: %s", feed_instance.url, e)
-            continue
+        # Streaming feeds stop reading at the first already processed item.
+        feed_instance.seen = posted_entries.__contains__
+    pipeline = FeedPipeline(FETCH_WORKERS, PIPELINE_QUEUE_SIZE, DELAY_BETWEEN_FEEDS, feed_health,
+                            websub.discover if websub is not None else None, enricher,
+                            REORDER_LATENESS, REORDER_CAPACITY)
 
-        try:
-            entries = feed_instance.get_entries()
-        except Exception as e:
-            logging.error("Error processing entries for feed %s: %s", feed_instance.url, e)
-            continue
+    # Already processed entries are dropped in the parse stage, before any date parsing.
+    for entry in pipeline.run(feeds, lambda e: e.link and e.link not in posted_entries):
+        yield entry
+
+    if summary is not None:
+        summary["polled"] = len(feeds)
+        summary["skipped"] = len(FEEDS) - len(feeds)
+        summary["failed"] = len(pipeline.failed_feeds)
 
-        for entry in entries:
-            entry_id = entry.get("link", "")
-            if entry_id and entry_id not in posted_entries:
-                entry["feed_type"] = feed_instance.__class__.__name__
-                new_entries.append(entry)
 
-        logging.info("Waiting %d seconds before processing the next feed...", DELAY_BETWEEN_FEEDS)
-        time.sleep(DELAY_BETWEEN_FEEDS)
+def process_entry(entry, posted_entries, detector, dispatcher, cve_index=None, router=None):
+    """
+    Dedup stage: drops already processed entries, handles near-duplicates, attaches CVSS
+    data for named CVEs, adds watchlist webhooks and hands the entry to every sink.
+
+    :param entry: Entry record.
+    :param posted_entries: A set of already processed entry IDs (updated in place).
+    :param detector: NearDuplicateDetector for news feeds.
+    :param dispatcher: SinkDispatcher receiving the entry.
+    :param cve_index: Optional CveIndex used for offline CVSS enrichment.
+    :param router: Optional WatchlistRouter adding webhooks by content.
+    :return: True if the entry was handed to the sinks.
+    """
+    if not entry.link or entry.link in posted_entries:
+        return False
 
-    return new_entries
+    if entry.feed_type in NEAR_DUPLICATE_FEEDS:
+        original = detector.check(entry)
+        if original is not None:
+            logging.info("Near-duplicate of %s: %s", original, entry.link)
+            if NEAR_DUPLICATE_MODE == "suppress":
+                posted_entries.add(entry.link)
+                return False
+            entry.duplicate_of = original
 
+    if cve_index is not None:
+        cve_index.enrich(entry)
+    if router is not None:
+        router.route(entry)
 
-def main():
+    dispatcher.emit(entry)
+
+    # Mark this entry as processed.
+    posted_entries.add(entry.link)
+    return True
+
+
+def wait_for_pushes(websub, seconds, posted_entries, detector, dispatcher, cve_index=None, router=None):
     """
-    Main function that aggregates new entries from all feeds, sorts them by publication date,
-    and pushes them to Discord in chronological order while respecting rate limits.
+    Sleeps until the next polling cycle, delivering WebSub pushes as soon as they arrive.
+
+    :param websub: WebSubSubscriber, or None to simply sleep.
+    :param seconds: Time to wait.
+    :param posted_entries: A set of already processed entry IDs (updated in place).
+    :param detector: NearDuplicateDetector for news feeds.
+    :param dispatcher: SinkDispatcher receiving pushed entries.
+    :param cve_index: Optional CveIndex used for offline CVSS enrichment.
+    :param router: Optional WatchlistRouter adding webhooks by content.
+    :return: Number of pushed entries handed to the sinks.
     """
-    logging.info("RSS Feed Aggregator started.")
+    if websub is None:
+        time.sleep(seconds)
+        return 0
+    delivered = 0
+    deadline = time.monotonic() + seconds
     while True:
-        logging.info("Starting feed polling cycle")
-        posted_entries = load_posted_entries()
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return delivered
+        try:
+            entry = websub.inbox.get(timeout=remaining)
+        except queue.Empty:
+            return delivered
+        if process_entry(entry, posted_entries, detector, dispatcher, cve_index, router):
+            delivered += 1
 
-        # Aggregate new entries from all feeds.
-        new_entries = aggregate_new_entries(posted_entries)
-        logging.info("Aggregated %d new entries from all feeds.", len(new_entries))
 
-        # Sort new entries by publication date (oldest first)
-        try:
-            new_entries.sort(key=lambda e: parse_date(e.get("pub_date", "")))
-        except Exception as e:
-            logging.error("Error sorting entries by publication date: %s", e)
-
-        # Process sorted new entries.
-        for entry in new_entries:
-            
-            
-
-            # Post to feed-specific Discord channels
-            feed_type = entry.get("feed_type", "")
-            if feed_type in FEED_DISCORD_WEBHOOKS:
-                post_to_discord(entry, FEED_DISCORD_WEBHOOKS[feed_type])
-                
-            # Mark this entry as processed.
-            posted_entries.add(entry.get("link", ""))
-
-        # Save the updated processed entries.
+def open_cve_index():
+    """
+    Open the offline NVD index, if one is configured.
+
+    :return: A CveIndex, or None if enrichment is disabled or the index is unusable.
+    """
+    if not NVD_INDEX_FILE:
+        return None
+    from aggregator.nvd import CveIndex
+    try:
+        index = CveIndex(NVD_INDEX_FILE)
+    except (OSError, ValueError) as e:
+        logging.error("CVSS enrichment disabled, cannot open NVD index %s: %s", NVD_INDEX_FILE, e)
+        return None
+    logging.info("Loaded NVD index with %d CVEs for CVSS enrichment.", len(index))
+    return index
+
+
+def open_watchlist_router():
+    """
+    :return: A WatchlistRouter for WATCHLIST_FILE, or None if content routing is disabled.
+    """
+    if not WATCHLIST_FILE:
+        return None
+    from aggregator.watchlist import WatchlistRouter
+    return WatchlistRouter(WATCHLIST_FILE, WATCHLIST_CHECK_INTERVAL)
+
+
+def open_article_enricher():
+    """
+    :return: An ArticleEnricher for ARTICLE_ENRICH_FEEDS, or None if article enrichment is disabled.
+    """
+    if not ARTICLE_ENRICH_FEEDS:
+        return None
+    from aggregator.articles import ArticleEnricher
+    return ArticleEnricher(ARTICLE_CACHE_DIR, ARTICLE_ENRICH_FEEDS, ARTICLE_WORKERS, ARTICLE_PER_HOST,
+                           ARTICLE_TIMEOUT, ARTICLE_DEADLINE)
+
+
+def build_sinks(freshness=None, spill_on_close=False):
+    """
+    Create the configured output sinks.
+
+    :param freshness: Optional FreshnessTracker recording the latency of every Discord post.
+    :param spill_on_close: Move Discord deliveries still queued in memory to the backlog on
+        shutdown instead of delivering them before exiting.
+    :return: A list of sink instances.
+    """
+    sinks = [
+        DiscordSink(FEED_DISCORD_WEBHOOKS, FEED_PRIORITIES, PRIORITY_CLASS_WEIGHTS, PRESERVE_CHANNEL_ORDER,
+                    DIGEST_FEEDS, DIGEST_WEBHOOKS, DIGEST_FILE, freshness,
+                    DELIVERY_BACKLOG_FILE, DELIVERY_MEMORY_LIMIT, CATCHUP_RESERVE, DELIVERY_URGENT_LIMIT,
+                    spill_on_close),
+        ArchiveSink(ARCHIVE_FILE),
+    ]
+    if JSONL_SINK_FILE:
+        sinks.append(JsonLinesSink(JSONL_SINK_FILE, JSONL_BUFFER_ENTRIES, JSONL_MAX_BYTES, JSONL_BACKUP_COUNT))
+    return sinks
+
+
+def run_cycle(posted_entries, dispatcher, detector, feed_health, websub=None, summary=None, cve_index=None,
+              router=None, enricher=None):
+    """
+    Runs one polling cycle: streams new entries from all feeds into every sink while later
+    feeds are still being fetched, then flushes the sinks at the cycle boundary.
+
+    :param posted_entries: A set of already processed entry IDs (updated in place).
+    :param dispatcher: SinkDispatcher receiving new entries.
+    :param detector: NearDuplicateDetector for news feeds.
+    :param feed_health: FeedHealthTracker deciding which feeds are polled.
+    :param websub: Optional WebSubSubscriber.
+    :param summary: Optional dictionary that receives the cycle's feed counts.
+    :param cve_index: Optional CveIndex used for offline CVSS enrichment.
+    :param router: Optional WatchlistRouter adding webhooks by content.
+    :param enricher: Optional ArticleEnricher improving overviews from linked pages.
+    :return: Number of new entries handed to the sinks.
+    """
+    new_count = 0
+    for entry in aggregate_new_entries(posted_entries, feed_health, websub, summary, enricher):
+        if process_entry(entry, posted_entries, detector, dispatcher, cve_index, router):
+            new_count += 1
+    logging.info("Aggregated %d new entries from all feeds.", new_count)
+    if enricher is not None:
+        enricher.log_summary()
+
+    # Cycle boundary: Discord delivers fresh entries (a spilled backlog keeps draining in the
+    # background), files are fsynced, the archive batch is written.
+    dispatcher.flush()
+    return new_count
+
+
+def run_once():
+    """
+    Runs a single polling cycle and exits, for cron or container-per-run deployments.
+    WebSub push ingestion is not available in this mode.
+
+    :return: EXIT_OK if every polled feed succeeded, EXIT_FEED_ERRORS if some feeds failed or
+             every feed was skipped as unhealthy, EXIT_FAILURE if the cycle itself failed.
+    """
+    started = time.monotonic()
+    posted_entries = load_posted_entries()
+    known = len(posted_entries)
+    feed_health = FeedHealthTracker(FEED_HEALTH_FILE, FEED_BACKOFF_BASE, FEED_BACKOFF_MAX,
+                                    FEED_QUARANTINE_AFTER, FEED_PROBE_INTERVAL, FEED_TRANSIENT_BACKOFF_MAX)
+    detector = NearDuplicateDetector(NEAR_DUPLICATE_THRESHOLD, NEAR_DUPLICATE_WINDOW)
+    detector.load(NEAR_DUPLICATE_STATE_FILE)
+    freshness = FreshnessTracker(FRESHNESS_FILE, FRESHNESS_PROMETHEUS_FILE)
+    dispatcher = SinkDispatcher(build_sinks(freshness))
+    cve_index = open_cve_index()
+    router = open_watchlist_router()
+    enricher = open_article_enricher()
+    summary = {"polled": 0, "skipped": 0, "failed": 0}
+    try:
+        new_count = run_cycle(posted_entries, dispatcher, detector, feed_health, summary=summary,
+                              cve_index=cve_index, router=router, enricher=enricher)
+    except Exception as e:
+        logging.exception("Polling cycle failed: %s", e)
+        return EXIT_FAILURE
+    finally:
+        dispatcher.close()
+        feed_health.save()
+        detector.save(NEAR_DUPLICATE_STATE_FILE)
+        freshness.save()
+        if cve_index is not None:
+            cve_index.close()
+        if enricher is not None:
+            enricher.close()
+
+    # Skip rewriting the state file when nothing changed.
+    if len(posted_entries) != known:
+        save_posted_entries(posted_entries)
+    print("Polled %d feeds (%d skipped, %d failed), %d new entries in %.1fs" % (
+        summary["polled"], summary["skipped"], summary["failed"], new_count, time.monotonic() - started))
+    if not summary["polled"] and summary["skipped"]:
+        # Nothing was checked at all: not a healthy run, even though nothing failed.
+        logging.warning("No feed polled: all %d feeds are backing off or quarantined.", summary["skipped"])
+        return EXIT_FEED_ERRORS
+    return EXIT_FEED_ERRORS if summary["failed"] else EXIT_OK
+
+
+def handle_sigterm(signum, frame):
+    """
+    Turn SIGTERM into SystemExit, so shutdown runs the same cleanup as Ctrl-C.
+    """
+    raise SystemExit(EXIT_OK)
+
+
+def main():
+    """
+    Main function that streams new entries from all feeds through a staged pipeline and
+    pushes them to Discord by priority class (in publication order within REORDER_LATENESS)
+    while respecting rate limits. Feeds with an active WebSub subscription are delivered
+    by push between cycles instead of being polled.
+    """
+    logging.info("RSS Feed Aggregator started.")
+    freshness = FreshnessTracker(FRESHNESS_FILE, FRESHNESS_PROMETHEUS_FILE)
+    # Queued deliveries are already in the saved posted set; on shutdown they move to the backlog.
+    dispatcher = SinkDispatcher(build_sinks(freshness, spill_on_close=True))
+    detector = NearDuplicateDetector(NEAR_DUPLICATE_THRESHOLD, NEAR_DUPLICATE_WINDOW)
+    detector.load(NEAR_DUPLICATE_STATE_FILE)
+    feed_health = FeedHealthTracker(FEED_HEALTH_FILE, FEED_BACKOFF_BASE, FEED_BACKOFF_MAX,
+                                    FEED_QUARANTINE_AFTER, FEED_PROBE_INTERVAL, FEED_TRANSIENT_BACKOFF_MAX)
+    websub = None
+    if WEBSUB_CALLBACK_URL:
+        from aggregator.websub import WebSubSubscriber
+        websub = WebSubSubscriber(WEBSUB_CALLBACK_URL, WEBSUB_LISTEN_HOST, WEBSUB_LISTEN_PORT,
+                                  WEBSUB_LEASE_SECONDS, WEBSUB_SAFETY_POLL_INTERVAL)
+        websub.start()
+    cve_index = open_cve_index()
+    router = open_watchlist_router()
+    enricher = open_article_enricher()
+    # Processed entries are loaded once; this process is the only writer of the file.
+    posted_entries = load_posted_entries()
+    try:
+        while True:
+            logging.info("Starting feed polling cycle")
+            known = len(posted_entries)
+            run_cycle(posted_entries, dispatcher, detector, feed_health, websub, cve_index=cve_index, router=router,
+                      enricher=enricher)
+
+            # Save the updated processed entries.
+            if len(posted_entries) != known:
+                save_posted_entries(posted_entries)
+            feed_health.save()
+            feed_health.log_summary()
+            detector.save(NEAR_DUPLICATE_STATE_FILE)
+            freshness.save()
+            freshness.log_summary()
+            if websub is not None:
+                websub.maintain()
+            logging.info("Global cycle completed. Sleeping for %d seconds...", GLOBAL_SLEEP_INTERVAL)
+            if wait_for_pushes(websub, GLOBAL_SLEEP_INTERVAL, posted_entries, detector, dispatcher,
+                               cve_index, router):
+                save_posted_entries(posted_entries)
+    finally:
+        # Closing the sinks moves undelivered entries to the backlog (or delivers them, without
+        # one) before the process exits.
+        dispatcher.close()
         save_posted_entries(posted_entries)
-        logging.info("Global cycle completed. Sleeping for %d seconds...", GLOBAL_SLEEP_INTERVAL)
-        time.sleep(GLOBAL_SLEEP_INTERVAL)
+        feed_health.save()
+        detector.save(NEAR_DUPLICATE_STATE_FILE)
+        freshness.save()
+        if websub is not None:
+            websub.stop()
+        if cve_index is not None:
+            cve_index.close()
+        if enricher is not None:
+            enricher.close()
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ThreatFeed HQ RSS feed aggregator.")
+    parser.add_argument("--once", action="store_true",
+                        help="Run a single polling cycle and exit (for cron or container-per-run deployments)")
+    args = parser.parse_args()
+    # Unwind on SIGTERM like on Ctrl-C, so queued deliveries and state are saved.
+    signal.signal(signal.SIGTERM, handle_sigterm)
+    if args.once:
+        sys.exit(run_once())
     try:
         main()
     except KeyboardInterrupt:
         logging.info("Aggregator stopped by user.")
+    except SystemExit:
+        logging.info("Aggregator stopped.")
+        raise
@@ -0,0 +1,98 @@
+import os
+import json
+import sqlite3
+import tempfile
+import unittest
+from contextlib import closing
+from unittest import mock
+
+from aggregator.backlog import DeliveryBacklog
+from aggregator.entry import Entry
+from aggregator.sinks import DiscordSink
+
+FIRST = "https://discord.example/api/webhooks/1/a"
+SECOND = "https://discord.example/api/webhooks/2/b"
+
+
+def response(status_code):
+    return mock.Mock(status_code=status_code, headers={}, text="unavailable")
+
+
+def entry(number):
+    return Entry("Advisory %d" % number, "2026-10-19", "https://example.com/%d" % number, "Vendor",
+                 "Overview of advisory %d" % number, feed_type="VendorFeed")
+
+
+class CatchUpTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "backlog.db")
+        self.sink = DiscordSink({"VendorFeed": [FIRST, SECOND]}, backlog_file=self.path)
+
+    def tearDown(self):
+        self.sink.close()
+        self.directory.cleanup()
+
+    def spill(self, count, webhook_urls):
+        backlog = self.sink._delivery_backlog()
+        for number in range(count):
+            backlog.add(entry(number), webhook_urls, "normal")
+
+    def remaining(self):
+        with closing(sqlite3.connect(self.path)) as conn:
+            rows = conn.execute("SELECT webhooks FROM backlog_items ORDER BY id").fetchall()
+        return [json.loads(webhooks) for webhooks, in rows]
+
+    def test_failed_post_keeps_row_and_backs_off(self):
+        self.spill(5, [FIRST])
+        with mock.patch("requests.post", return_value=response(503)) as post:
+            self.assertTrue(self.sink.work())
+            self.assertEqual(post.call_count, 1)
+            # Catch-up waits for the retry time instead of hammering the webhook.
+            self.assertFalse(self.sink.work())
+            self.assertEqual(post.call_count, 1)
+        self.assertEqual(len(self.sink.backlog), 5)
+        self.assertEqual(len(self.remaining()), 5)
+        self.assertIn(FIRST, self.sink.catchup_retries)
+
+    def test_partial_post_keeps_failed_webhooks(self):
+        self.spill(1, [FIRST, SECOND])
+        with mock.patch("requests.post", side_effect=lambda url, json: response(204 if url == FIRST else 503)):
+            self.assertTrue(self.sink.work())
+        self.assertEqual(self.remaining(), [[SECOND]])
+
+        # Once the retry is due, a successful post removes the row.
+        self.sink.catchup_retries[SECOND] = (1, 0)
+        with mock.patch("requests.post", return_value=response(204)) as post:
+            self.assertTrue(self.sink.work())
+            post.assert_called_once()
+            self.assertEqual(post.call_args[0][0], SECOND)
+        self.assertEqual(self.remaining(), [])
+        self.assertNotIn(SECOND, self.sink.catchup_retries)
+
+
+class SpillOnCloseTest(unittest.TestCase):
+    def test_queued_deliveries_move_to_front_of_backlog(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "backlog.db")
+            sink = DiscordSink({"VendorFeed": [FIRST]}, backlog_file=path, memory_limit=2, spill_on_close=True)
+            for number in range(4):
+                sink.emit(entry(number))
+            self.assertEqual(len(sink.scheduler), 2)
+            with mock.patch("requests.post") as post:
+                sink.close()
+                post.assert_not_called()
+
+            backlog = DeliveryBacklog(path)
+            order = []
+            item = backlog.peek()
+            while item is not None:
+                order.append(item.entry["link"])
+                backlog.remove(item)
+                item = backlog.peek()
+            backlog.close()
+            self.assertEqual(order, ["https://example.com/%d" % number for number in range(4)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+"""
+Near-Duplicate Detection Check
+
+Runs NearDuplicateDetector over pairs of real-world headlines and overviews (as the news
+feeds deliver them, truncated to 40 words) and reports the Jaccard similarity of each
+pair. "same" pairs are coverage of one story by different outlets and must be detected;
+"different" pairs are distinct stories about the same vendor, group or event and must not be.
+
+Run it after changing the tokenizer, the shingles or NEAR_DUPLICATE_THRESHOLD:
+
+    python tools/dedup_check.py [--threshold 0.3]
+
+The exit status is non-zero if any pair is classified wrongly.
+"""
+
+import argparse
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from aggregator.dedup import DEFAULT_THRESHOLD, NearDuplicateDetector, jaccard, shingles  # noqa: E402
+
+PAIRS = [
+    ("same",
+     ("Ivanti warns of critical Connect Secure flaw exploited in zero-day attacks",
+      "Ivanti is warning that hackers exploited a Connect Secure remote code execution "
+      "vulnerability tracked as CVE-2025-0282 in zero-day attacks to install malware on "
+      "appliances. The company says it became aware of the vulnerabilities after the "
+      "Ivanti Integrity Checker Tool detected malicious activity on customers' appliances."),
+     ("Ivanti Flaw CVE-2025-0282 Actively Exploited, Impacts Connect Secure and ZTA Gateways",
+      "Ivanti is warning that a critical security flaw impacting Ivanti Connect Secure, "
+      "Policy Secure, and ZTA Gateways has come under active exploitation in the wild. The "
+      "vulnerability, tracked as CVE-2025-0282 (CVSS score: 9.0), is a stack-based buffer "
+      "overflow that affects Ivanti Connect Secure.")),
+    ("same",
+     ("LockBit ransomware gang's site hacked, database leaked",
+      "The LockBit ransomware gang's dark web affiliate panels have been defaced and "
+      "replaced with a message that links to a MySQL database dump, containing Bitcoin "
+      "addresses, builds and chats with victims."),
+     ("LockBit Ransomware Panel Defaced, Internal Database Leaked Online",
+      "The dark web affiliate panels of the LockBit ransomware operation were defaced with "
+      "a message and a link to a MySQL database dump that exposes Bitcoin addresses, "
+      "negotiation chats with victims, malware builds and affiliate accounts.")),
+    ("same",
+     ("Fortinet warns of new FortiOS zero-day exploited to hijack firewalls",
+      "Fortinet disclosed an authentication bypass zero-day vulnerability in FortiOS and "
+      "FortiProxy that is actively exploited to hijack Fortinet firewalls and breach "
+      "enterprise networks. The flaw is tracked as CVE-2024-55591."),
+     ("Fortinet Confirms Zero-Day Exploit Targeting FortiOS and FortiProxy Firewalls",
+      "Fortinet has confirmed that a critical authentication bypass flaw in FortiOS and "
+      "FortiProxy, tracked as CVE-2024-55591 (CVSS score: 9.6), has been exploited in the "
+      "wild as a zero-day to gain super-admin privileges on firewalls.")),
+    ("same",
+     ("Microsoft January 2025 Patch Tuesday fixes 8 zero-days, 159 flaws",
+      "Today is Microsoft's January 2025 Patch Tuesday, which includes security updates "
+      "for 159 flaws, including eight zero-day vulnerabilities, with three actively "
+      "exploited in attacks."),
+     ("Microsoft Patches 159 Flaws Including 8 Zero-Days, Three Actively Exploited",
+      "Microsoft kicked off 2025 with security updates addressing 159 vulnerabilities, "
+      "including eight zero-day flaws, three of which have come under active exploitation "
+      "in attacks, as part of its January Patch Tuesday.")),
+    ("different",
+     ("Ivanti warns of critical Connect Secure flaw exploited in zero-day attacks",
+      "Ivanti is warning that hackers exploited a Connect Secure remote code execution "
+      "vulnerability tracked as CVE-2025-0282 in zero-day attacks to install malware on "
+      "appliances. The company says it became aware of the vulnerabilities after the "
+      "Ivanti Integrity Checker Tool detected malicious activity on customers' appliances."),
+     ("Ivanti fixes maximum severity flaws in Endpoint Manager software",
+      "Ivanti has released security updates for its Endpoint Manager (EPM) software to "
+      "address four critical absolute path traversal vulnerabilities that let "
+      "unauthenticated attackers leak sensitive information from vulnerable systems.")),
+    ("different",
+     ("LockBit ransomware gang's site hacked, database leaked",
+      "The LockBit ransomware gang's dark web affiliate panels have been defaced and "
+      "replaced with a message that links to a MySQL database dump, containing Bitcoin "
+      "addresses, builds and chats with victims."),
+     ("Police arrest LockBit ransomware developer in Israel, extradition pending",
+      "A dual Russian-Israeli national suspected of being a developer for the LockBit "
+      "ransomware operation was arrested in Israel in August and awaits extradition to "
+      "the United States, according to a criminal complaint unsealed this week.")),
+    ("different",
+     ("Fortinet warns of new FortiOS zero-day exploited to hijack firewalls",
+      "Fortinet disclosed an authentication bypass zero-day vulnerability in FortiOS and "
+      "FortiProxy that is actively exploited to hijack Fortinet firewalls and breach "
+      "enterprise networks. The flaw is tracked as CVE-2024-55591."),
+     ("Fortinet warns of critical FortiSwitch flaw letting hackers change admin passwords",
+      "Fortinet has released security updates for a critical vulnerability in FortiSwitch "
+      "devices that could allow remote attackers to change administrator passwords through "
+      "an unverified password change flaw.")),
+    ("same",
+     ("Ivanti warns of critical Connect Secure flaw exploited in attacks",
+      "Ivanti is warning that hackers exploited a Connect Secure remote code execution "
+      "vulnerability tracked as CVE-2025-0282 in attacks to install malware on appliances."),
+     ("Ivanti warns of critical Connect Secure flaw exploited in zero-day attacks",
+      "Ivanti is warning that hackers exploited a Connect Secure remote code execution "
+      "vulnerability tracked as CVE-2025-0282 in zero-day attacks to install malware on "
+      "appliances.")),
+    ("different",
+     ("Microsoft January 2025 Patch Tuesday fixes 8 zero-days, 159 flaws",
+      "Today is Microsoft's January 2025 Patch Tuesday, which includes security updates "
+      "for 159 flaws, including eight zero-day vulnerabilities, with three actively "
+      "exploited in attacks."),
+     ("SAP fixes critical NetWeaver flaws in January 2025 Patch Day",
+      "SAP has released its January 2025 security updates addressing 14 vulnerabilities, "
+      "including two critical flaws in NetWeaver web application server that could let "
+      "attackers hijack user accounts.")),
+    ("different",
+     ("CISA adds SonicWall SMA1000 flaw to Known Exploited Vulnerabilities catalog",
+      "CISA has added a SonicWall SMA1000 deserialization vulnerability, tracked as "
+      "CVE-2025-23006, to its Known Exploited Vulnerabilities catalog, ordering federal "
+      "agencies to patch it within three weeks."),
+     ("CISA adds Zyxel CPE flaw to Known Exploited Vulnerabilities catalog",
+      "CISA has added a Zyxel CPE command injection vulnerability, tracked as "
+      "CVE-2024-40891, to its Known Exploited Vulnerabilities catalog, ordering federal "
+      "agencies to patch it within three weeks.")),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="Jaccard threshold (defaults to main.NEAR_DUPLICATE_THRESHOLD)")
+    args = parser.parse_args()
+    threshold = args.threshold
+    if threshold is None:
+        try:
+            from main import NEAR_DUPLICATE_THRESHOLD as threshold
+        except ImportError:  # no config.py
+            threshold = DEFAULT_THRESHOLD
+
+    failures = 0
+    for expected, first, second in PAIRS:
+        detector = NearDuplicateDetector(threshold)
+        detector.check({"title": first[0], "overview": first[1], "link": "https://a.example/1"}, now=0)
+        original = detector.check({"title": second[0], "overview": second[1], "link": "https://b.example/2"}, now=0)
+        detected = original is not None
+        similarity = jaccard(shingles(*first), shingles(*second))
+        ok = detected == (expected == "same")
+        failures += not ok
+        print("%-4s %-9s J=%.2f  %s | %s" % ("ok" if ok else "FAIL", expected, similarity, first[0][:40], second[0][:40]))
+
+    print("%d of %d pairs classified correctly at threshold %.2f" % (len(PAIRS) - failures, len(PAIRS), threshold))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,567 @@
+"""
+Record-and-Replay Harness for End-to-End Throughput Testing
+
+This script measures how the aggregator behaves under load without touching the real
+feeds or Discord. It has two sub-commands:
+
+    record  Fetch every feed configured in main.FEEDS and store the raw responses on disk.
+    run     Serve the recordings from a local HTTP server, inject synthetic new items at a
+            configurable rate (plus an optional one-off burst), and run main()'s full loop
+            against a local Discord webhook stand-in that enforces realistic 429 behaviour.
+
+At the end of a run it reports end-to-end items/sec, polling cycle latency percentiles
+and time-to-post (from the moment an item appears in a feed until Discord accepts it).
+
+Examples:
+    python tools/replay_harness.py record --out recordings
+    python tools/replay_harness.py run --recordings recordings --duration 120 --speed 10 \\
+        --rate 30 --burst 500 --burst-feed MicrosoftFeed
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import types
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+from xml.sax.saxutils import escape
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+INDEX_FILE = "index.json"
+
+# Discord allows roughly 5 requests per 2 seconds per webhook and 30 per minute per channel.
+WEBHOOK_BUCKET_SIZE = 5
+WEBHOOK_BUCKET_WINDOW = 2.0
+CHANNEL_MINUTE_LIMIT = 30
+
+SYNTHETIC_VOCABULARY = (
+    "ransomware botnet phishing firmware kernel router gateway driver exploit backdoor "
+    "loader stealer wiper campaign espionage supply chain npm pypi docker kubernetes vpn "
+    "firewall exchange sharepoint outlook chrome firefox android ios linux windows macos "
+    "authentication bypass overflow injection deserialization traversal escalation remote "
+    "credential token cookie session cloud storage bucket database patch advisory zero-day"
+).split()
+# Story-specific names (vendors, products, actors) built from syllables, e.g. "belmartor".
+SYNTHETIC_NAME_SYLLABLES = "ar bel cor dex fen gal hor ist jun kel lor mar nex or pul quin ros sal tor vex".split()
+SYNTHETIC_NAMES = [a + b + c for a in SYNTHETIC_NAME_SYLLABLES for b in SYNTHETIC_NAME_SYLLABLES
+                   for c in SYNTHETIC_NAME_SYLLABLES]
+# Zipf-like weights: a few common terms and names recur across many items, as in real feeds.
+SYNTHETIC_VOCABULARY_WEIGHTS = list(itertools.accumulate(1.0 / rank
+                                                         for rank in range(1, len(SYNTHETIC_VOCABULARY) + 1)))
+SYNTHETIC_NAME_WEIGHTS = list(itertools.accumulate(rank ** -0.6 for rank in range(1, len(SYNTHETIC_NAMES) + 1)))
+
+
+def percentile(values, pct):
+    """
+    Return the pct-th percentile of values using nearest-rank.
+
+    :param values: List of numbers.
+    :param pct: Percentile between 0 and 100.
+    :return: The percentile, or None for an empty list.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def import_main(config_module=None):
+    """
+    Import main.py, optionally replacing the config module it reads webhooks from.
+
+    :param config_module: Module object installed as "config" before the import.
+    :return: The imported main module.
+    """
+    if config_module is not None:
+        sys.modules["config"] = config_module
+    elif "config" not in sys.modules:
+        try:
+            import config  # noqa: F401
+        except ImportError:
+            sys.modules["config"] = types.SimpleNamespace(
+                GLOBAL_DISCORD_WEBHOOK="", FEED_DISCORD_WEBHOOKS={}
+            )
+    import main
+    return main
+
+
+# ---------------------------------------------------------------------------
+# Recording
+# ---------------------------------------------------------------------------
+
+def record(out_dir):
+    """
+    Fetch every configured feed and store the raw response bodies in out_dir.
+
+    :param out_dir: Directory the recordings and their index are written to.
+    """
+    import requests
+
+    main = import_main()
+    os.makedirs(out_dir, exist_ok=True)
+    index = []
+    for position, (feed_path, url) in enumerate(main.FEEDS):
+        feed_name = feed_path.rsplit(".", 1)[1]
+        try:
+            response = requests.get(url, timeout=30, headers={"User-Agent": "ThreatFeedHQ-Recorder/1.0"})
+        except Exception as e:
+            print("Failed to record %s (%s): %s" % (feed_name, url, e))
+            continue
+        filename = "%02d_%s.xml" % (position, feed_name)
+        with open(os.path.join(out_dir, filename), "wb") as f:
+            f.write(response.content)
+        index.append({
+            "feed": feed_name,
+            "url": url,
+            "file": filename,
+            "status": response.status_code,
+            "content_type": response.headers.get("Content-Type", "application/xml"),
+        })
+        print("Recorded %s: HTTP %d, %d bytes" % (feed_name, response.status_code, len(response.content)))
+
+    with open(os.path.join(out_dir, INDEX_FILE), "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+    print("Wrote %d recordings to %s" % (len(index), out_dir))
+
+
+# ---------------------------------------------------------------------------
+# Feed replay server
+# ---------------------------------------------------------------------------
+
+class SyntheticSchedule:
+    """
+    Decides which synthetic items are visible in which feed at a given moment.
+
+    Items are scheduled at a steady rate (spread round-robin across feeds) plus an
+    optional burst that appears in one feed at the start of the run. Each item keeps the
+    time it became visible, which is the reference point for time-to-post.
+    """
+
+    def __init__(self, feed_names, rate_per_second, burst=0, burst_feed=None):
+        self.feed_names = feed_names
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.burst_feed = burst_feed
+        self.base_url = ""
+        self.started = time.time()
+        self.lock = threading.Lock()
+        self.items = {name: [] for name in feed_names}
+        self.visible_since = {}
+        self.scheduled = 0
+
+    def start(self, base_url):
+        """
+        Start the schedule clock and publish the burst.
+
+        :param base_url: Base URL of the feed server, used to build absolute item links.
+        """
+        with self.lock:
+            self.base_url = base_url
+            self.started = time.time()
+            if self.burst and self.burst_feed in self.items:
+                for _ in range(self.burst):
+                    self._add(self.burst_feed, self.started)
+
+    def _add(self, feed_name, visible_at):
+        seq = len(self.visible_since)
+        link = "%s/synthetic/%s/%d" % (self.base_url, feed_name, seq)
+        self.items[feed_name].append((seq, link, visible_at))
+        self.visible_since[link] = visible_at
+
+    def items_for(self, feed_name):
+        """
+        Return the synthetic items currently visible in a feed, newest first.
+
+        :param feed_name: Feed class name.
+        :return: List of (seq, link, visible_at) tuples.
+        """
+        with self.lock:
+            if self.rate_per_second > 0:
+                due = int((time.time() - self.started) * self.rate_per_second)
+                while self.scheduled < due:
+                    target = self.feed_names[self.scheduled % len(self.feed_names)]
+                    self._add(target, self.started + self.scheduled / self.rate_per_second)
+                    self.scheduled += 1
+            return list(reversed(self.items[feed_name]))
+
+
+def synthetic_words(seq, count=30, names=18):
+    """
+    Return a deterministic pseudo-random word sequence for a synthetic item.
+
+    Like real coverage, items mix common security terms with names specific to the story,
+    so distinct items overlap somewhat but stay below the near-duplicate threshold.
+
+    :param seq: Item sequence number used as the random seed.
+    :param count: Number of words.
+    :param names: How many of the words are story-specific names.
+    :return: List of words.
+    """
+    generator = random.Random(seq)
+    words = generator.choices(SYNTHETIC_VOCABULARY, cum_weights=SYNTHETIC_VOCABULARY_WEIGHTS, k=count - names)
+    words += generator.choices(SYNTHETIC_NAMES, cum_weights=SYNTHETIC_NAME_WEIGHTS, k=names)
+    generator.shuffle(words)
+    return words
+
+
+def render_synthetic(body, feed_name, items):
+    """
+    Insert synthetic items in front of the first real item of an RSS or Atom document.
+
+    :param body: Recorded response body (bytes).
+    :param feed_name: Feed class name, used to pick a plausible description.
+    :param items: List of (seq, link, visible_at) tuples.
+    :return: The modified body (bytes).
+    """
+    if not items:
+        return body
+    text = body.decode("utf-8", errors="replace")
+    is_atom = "<feed" in text[:2000] and "<rss" not in text[:2000]
+
+    fragments = []
+    for seq, link, visible_at in items:
+        words = synthetic_words(seq)
+        title = escape("Synthetic advisory %d: %s" % (seq, " ".join(words[:6])))
+        # Every tenth item is critical so priority handling shows up in the numbers.
+        severity = "9.8 | CRITICAL" if seq % 10 == 0 else "5.3 | MEDIUM"
+        description = escape("Severity: %s %s" % (severity, " ".join(words[6:])))
+        if is_atom:
+            stamp = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(visible_at))
+            fragments.append(
+                "<entry><title>%s</title><link href=\"%s\"/><id>%s</id>"
+                "<published>%s</published><updated>%s</updated><summary>%s</summary></entry>"
+                % (title, escape(link), escape(link), stamp, stamp, description)
+            )
+        else:
+            stamp = formatdate(visible_at, usegmt=True)
+            fragments.append(
+                "<item><title>%s</title><link>%s</link><guid>%s</guid>"
+                "<pubDate>%s</pubDate><description>%s</description></item>"
+                % (title, escape(link), escape(link), stamp, description)
+            )
+    injected = "".join(fragments)
+
+    markers = ("<entry", "</feed>") if is_atom else ("<item", "</channel>")
+    for marker in markers:
+        position = text.find(marker)
+        if position != -1:
+            return (text[:position] + injected + text[position:]).encode("utf-8")
+    return body
+
+
+def start_feed_server(recordings, schedule):
+    """
+    Serve recorded feeds at /feed/<position> with synthetic items injected.
+
+    :param recordings: List of (feed_name, body, content_type) tuples.
+    :param schedule: SyntheticSchedule deciding which items are visible.
+    :return: The running server.
+    """
+
+    class FeedHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parts = urlparse(self.path).path.strip("/").split("/")
+            if len(parts) != 2 or parts[0] != "feed" or not parts[1].isdigit() \
+                    or int(parts[1]) >= len(recordings):
+                self.send_error(404)
+                return
+            feed_name, body, content_type = recordings[int(parts[1])]
+            payload = render_synthetic(body, feed_name, schedule.items_for(feed_name))
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FeedHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# ---------------------------------------------------------------------------
+# Discord webhook stand-in
+# ---------------------------------------------------------------------------
+
+class WebhookStandIn:
+    """
+    Local stand-in for Discord webhooks.
+
+    Accepts POST /api/webhooks/<id>/<token>, enforces a per-webhook bucket of
+    WEBHOOK_BUCKET_SIZE requests per WEBHOOK_BUCKET_WINDOW seconds and
+    CHANNEL_MINUTE_LIMIT requests per minute, and answers excess requests with HTTP 429
+    and a JSON retry_after exactly like Discord does. Accepted requests report the
+    bucket's remaining budget in X-RateLimit-* headers.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.history = {}
+        self.deliveries = []
+        self.rate_limited = 0
+
+    def check(self, webhook):
+        """
+        Register a request against a webhook's rate limits.
+
+        :param webhook: Webhook path.
+        :return: None if the request is allowed, otherwise the retry_after in seconds.
+        """
+        now = time.time()
+        with self.lock:
+            history = [t for t in self.history.get(webhook, []) if now - t < 60]
+            recent = [t for t in history if now - t < WEBHOOK_BUCKET_WINDOW]
+            if len(recent) >= WEBHOOK_BUCKET_SIZE:
+                self.rate_limited += 1
+                self.history[webhook] = history
+                return round(WEBHOOK_BUCKET_WINDOW - (now - recent[0]), 3)
+            if len(history) >= CHANNEL_MINUTE_LIMIT:
+                self.rate_limited += 1
+                self.history[webhook] = history
+                return round(60 - (now - history[0]), 3)
+            history.append(now)
+            self.history[webhook] = history
+            return None
+
+    def bucket(self, webhook):
+        """
+        :param webhook: Webhook path.
+        :return: Tuple of requests remaining in the webhook's bucket and seconds until it resets.
+        """
+        now = time.time()
+        with self.lock:
+            recent = [t for t in self.history.get(webhook, []) if now - t < WEBHOOK_BUCKET_WINDOW]
+        if not recent:
+            return WEBHOOK_BUCKET_SIZE, 0.0
+        return max(0, WEBHOOK_BUCKET_SIZE - len(recent)), round(WEBHOOK_BUCKET_WINDOW - (now - recent[0]), 3)
+
+    def start(self):
+        """
+        Start serving on an ephemeral local port.
+
+        :return: The running server.
+        """
+        stand_in = self
+
+        class WebhookHandler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(length)
+                retry_after = stand_in.check(self.path)
+                if retry_after is not None:
+                    payload = json.dumps({
+                        "message": "You are being rate limited.",
+                        "retry_after": retry_after,
+                        "global": False,
+                    }).encode("utf-8")
+                    self.send_response(429)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Retry-After", str(retry_after))
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                    return
+                try:
+                    message = json.loads(body or b"{}")
+                except ValueError:
+                    message = {}
+                received = time.time()
+                with stand_in.lock:
+                    for embed in message.get("embeds", []):
+                        stand_in.deliveries.append((self.path, embed.get("url", ""), received))
+                remaining, reset_after = stand_in.bucket(self.path)
+                self.send_response(204)
+                self.send_header("X-RateLimit-Limit", str(WEBHOOK_BUCKET_SIZE))
+                self.send_header("X-RateLimit-Remaining", str(remaining))
+                self.send_header("X-RateLimit-Reset-After", str(reset_after))
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), WebhookHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+# ---------------------------------------------------------------------------
+# Run
+# ---------------------------------------------------------------------------
+
+def load_recordings(recordings_dir):
+    """
+    Load the recordings index and bodies.
+
+    :param recordings_dir: Directory written by the record command.
+    :return: List of (feed_name, url, body, content_type) tuples.
+    """
+    with open(os.path.join(recordings_dir, INDEX_FILE), "r", encoding="utf-8") as f:
+        index = json.load(f)
+    recordings = []
+    for item in index:
+        with open(os.path.join(recordings_dir, item["file"]), "rb") as f:
+            recordings.append((item["feed"], item["url"], f.read(), item.get("content_type", "application/xml")))
+    return recordings
+
+
+def instrument_cycles(main):
+    """
+    Wrap main's polling cycle to measure its latency.
+
+    :param main: The imported main module.
+    :return: List that receives one latency (seconds) per completed cycle.
+    """
+    latencies = []
+    run_cycle = main.run_cycle
+
+    def timed_cycle(*args, **kwargs):
+        started = time.time()
+        result = run_cycle(*args, **kwargs)
+        latencies.append(time.time() - started)
+        return result
+
+    main.run_cycle = timed_cycle
+    return latencies
+
+
+def seed_posted_entries(main, recordings):
+    """
+    Mark every recorded (non-synthetic) item as already posted so only injected items count.
+
+    :param main: The imported main module.
+    :param recordings: List of (feed_name, url, body, content_type) tuples.
+    """
+    import feedparser
+
+    classes = {feed_path.rsplit(".", 1)[1]: feed_path for feed_path, _ in main.FEEDS}
+    links = set()
+    for feed_name, url, body, _ in recordings:
+        feed_path = classes.get(feed_name)
+        if feed_path is None:
+            continue
+        feed = main.load_feed_class(feed_path)(url)
+        feed.feed = feedparser.parse(body)
+        try:
+            links.update(entry.get("link", "") for entry in feed.get_entries())
+        except Exception as e:
+            print("Could not pre-parse %s: %s" % (feed_name, e))
+    main.save_posted_entries(links)
+
+
+def run(args):
+    """Replay recordings through main()'s full loop and report throughput."""
+    recordings = load_recordings(args.recordings)
+    workdir = args.workdir or tempfile.mkdtemp(prefix="replay-harness-")
+    os.makedirs(workdir, exist_ok=True)
+
+    stand_in = WebhookStandIn()
+    webhook_server = stand_in.start()
+    webhook_base = "http://127.0.0.1:%d/api/webhooks" % webhook_server.server_port
+
+    feed_names = [name for name, _, _, _ in recordings]
+    schedule = SyntheticSchedule(feed_names, args.rate * args.speed / 60.0, args.burst, args.burst_feed)
+    feed_server = start_feed_server([(n, b, c) for n, _, b, c in recordings], schedule)
+    feed_base = "http://127.0.0.1:%d" % feed_server.server_port
+
+    # Every feed posts to its own webhook; the first N share one to model shared channels.
+    webhooks = {}
+    for position, name in enumerate(feed_names):
+        hooks = ["%s/%d/feed-%s" % (webhook_base, position, name)]
+        if position < args.shared_channel_feeds:
+            hooks.append("%s/shared/global-news" % webhook_base)
+        webhooks[name] = hooks
+    config = types.ModuleType("config")
+    config.GLOBAL_DISCORD_WEBHOOK = "%s/shared/global-news" % webhook_base
+    config.FEED_DISCORD_WEBHOOKS = webhooks
+
+    os.chdir(workdir)
+    main = import_main(config)
+    classes = {feed_path.rsplit(".", 1)[1]: feed_path for feed_path, _ in main.FEEDS}
+    main.FEEDS = [(classes[name], "%s/feed/%d" % (feed_base, position))
+                  for position, name in enumerate(feed_names) if name in classes]
+    main.GLOBAL_SLEEP_INTERVAL = main.GLOBAL_SLEEP_INTERVAL / args.speed
+    main.DELAY_BETWEEN_FEEDS = main.DELAY_BETWEEN_FEEDS / args.speed
+    main.FEED_BACKOFF_BASE = main.FEED_BACKOFF_BASE / args.speed
+    main.FEED_BACKOFF_MAX = main.FEED_BACKOFF_MAX / args.speed
+    main.FEED_PROBE_INTERVAL = main.FEED_PROBE_INTERVAL / args.speed
+
+    if not args.no_seed:
+        seed_posted_entries(main, recordings)
+    cycle_latencies = instrument_cycles(main)
+
+    print("Replaying %d feeds from %s (workdir %s) for %ds at %gx speed..."
+          % (len(main.FEEDS), args.recordings, workdir, args.duration, args.speed))
+    schedule.start(feed_base)
+    started = time.time()
+    threading.Thread(target=main.main, daemon=True).start()
+    time.sleep(args.duration)
+    elapsed = time.time() - started
+
+    with stand_in.lock:
+        deliveries = list(stand_in.deliveries)
+    first_post = {}
+    for _, link, received in deliveries:
+        if link in schedule.visible_since and link not in first_post:
+            first_post[link] = received
+    time_to_post = [first_post[link] - schedule.visible_since[link] for link in first_post]
+
+    print("")
+    print("Results")
+    print("  synthetic items injected : %d" % len(schedule.visible_since))
+    print("  synthetic items posted   : %d" % len(first_post))
+    print("  webhook posts accepted   : %d" % len(deliveries))
+    print("  webhook posts rate-limited (429): %d" % stand_in.rate_limited)
+    print("  end-to-end throughput    : %.2f items/sec (%.2f posts/sec)"
+          % (len(first_post) / elapsed, len(deliveries) / elapsed))
+    for label, values in (("cycle latency", cycle_latencies), ("time-to-post", time_to_post)):
+        if values:
+            print("  %-25s: p50 %.2fs  p90 %.2fs  p99 %.2fs  max %.2fs  (n=%d)" % (
+                label, percentile(values, 50), percentile(values, 90),
+                percentile(values, 99), max(values), len(values)))
+        else:
+            print("  %-25s: no samples" % label)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Record and replay feeds to measure aggregator throughput.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = subparsers.add_parser("record", help="Record the live feeds to disk")
+    record_parser.add_argument("--out", default="recordings", help="Directory for the recordings")
+
+    run_parser = subparsers.add_parser("run", help="Replay recordings through main()'s loop")
+    run_parser.add_argument("--recordings", default="recordings", help="Directory written by 'record'")
+    run_parser.add_argument("--duration", type=float, default=60, help="Wall-clock run time in seconds")
+    run_parser.add_argument("--speed", type=float, default=10,
+                            help="Time compression applied to polling and inter-feed sleeps")
+    run_parser.add_argument("--rate", type=float, default=10,
+                            help="Synthetic new items per (simulated) minute, spread across feeds")
+    run_parser.add_argument("--burst", type=int, default=0, help="Synthetic items present at start")
+    run_parser.add_argument("--burst-feed", default="MicrosoftFeed", help="Feed that receives the burst")
+    run_parser.add_argument("--shared-channel-feeds", type=int, default=4,
+                            help="Number of feeds that also post to one shared channel")
+    run_parser.add_argument("--no-seed", action="store_true",
+                            help="Do not mark recorded items as already posted")
+    run_parser.add_argument("--workdir", help="Working directory for state and logs (default: temp dir)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    if arguments.command == "record":
+        record(arguments.out)
+    else:
+        run(arguments)
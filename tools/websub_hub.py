@@ -0,0 +1,154 @@
+"""
+Local WebSub Hub Stand-In
+
+A minimal WebSub hub for testing push ingestion without a public hub. It implements the
+parts of the spec the aggregator relies on:
+
+    POST /  hub.mode=subscribe    Verifies intent by calling the subscriber's callback with
+                                  a challenge, then stores the subscription with its lease.
+    POST /  hub.mode=unsubscribe  Verifies intent and removes the subscription.
+    POST /  hub.mode=publish      Fetches hub.url and distributes the content to every
+            hub.url=<topic>       subscriber of that topic, signed with X-Hub-Signature.
+
+Point a test feed's <link rel="hub"> at this server, set WEBSUB_CALLBACK_URL to a local
+address and publish with:
+    curl -d hub.mode=publish -d hub.url=<topic> http://127.0.0.1:8086/
+
+Usage:
+    python tools/websub_hub.py --port 8086 --max-lease 300
+"""
+
+import argparse
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import requests
+
+
+class LocalHub:
+    """In-memory WebSub hub state."""
+
+    def __init__(self, max_lease=300):
+        """
+        :param max_lease: Upper bound for granted leases in seconds (short leases exercise renewal).
+        """
+        self.max_lease = max_lease
+        self.lock = threading.Lock()
+        self.subscriptions = {}
+
+    def verify_and_store(self, mode, topic, callback, lease, secret):
+        """
+        Verify intent with the subscriber and update the subscription table.
+
+        :return: True if the subscriber confirmed.
+        """
+        challenge = secrets.token_hex(8)
+        params = {"hub.mode": mode, "hub.topic": topic, "hub.challenge": challenge}
+        if mode == "subscribe":
+            params["hub.lease_seconds"] = str(lease)
+        try:
+            response = requests.get(callback, params=params, timeout=10)
+        except Exception as e:
+            print("Verification of %s failed: %s" % (callback, e))
+            return False
+        if response.status_code // 100 != 2 or response.text != challenge:
+            print("Subscriber %s did not confirm %s of %s" % (callback, mode, topic))
+            return False
+        with self.lock:
+            key = (topic, callback)
+            if mode == "subscribe":
+                self.subscriptions[key] = (time.time() + lease, secret)
+            else:
+                self.subscriptions.pop(key, None)
+        print("%s confirmed: %s -> %s (lease %ss)" % (mode, topic, callback, lease))
+        return True
+
+    def publish(self, topic):
+        """
+        Fetch a topic and distribute it to its live subscribers.
+
+        :return: Number of subscribers the content was delivered to.
+        """
+        response = requests.get(topic, timeout=15)
+        body = response.content
+        content_type = response.headers.get("Content-Type", "application/atom+xml")
+        now = time.time()
+        with self.lock:
+            targets = [(callback, secret) for (t, callback), (expires, secret) in self.subscriptions.items()
+                       if t == topic and expires > now]
+        delivered = 0
+        for callback, secret in targets:
+            headers = {"Content-Type": content_type}
+            if secret:
+                digest = hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+                headers["X-Hub-Signature"] = "sha256=" + digest
+            try:
+                result = requests.post(callback, data=body, headers=headers, timeout=15)
+                if result.status_code // 100 == 2:
+                    delivered += 1
+            except Exception as e:
+                print("Delivery to %s failed: %s" % (callback, e))
+        print("Published %s to %d subscriber(s)" % (topic, delivered))
+        return delivered
+
+    def start(self, host="127.0.0.1", port=0):
+        """
+        Serve the hub on a background thread.
+
+        :return: The running server.
+        """
+        hub = self
+
+        class HubHandler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode("utf-8")
+                params = {k: v[0] for k, v in parse_qs(body).items()}
+                mode = params.get("hub.mode")
+                if mode in ("subscribe", "unsubscribe"):
+                    topic = params.get("hub.topic")
+                    callback = params.get("hub.callback")
+                    if not topic or not callback:
+                        self.send_error(400)
+                        return
+                    try:
+                        lease = min(hub.max_lease, int(params.get("hub.lease_seconds", hub.max_lease)))
+                    except ValueError:
+                        lease = hub.max_lease
+                    self.send_response(202)
+                    self.end_headers()
+                    threading.Thread(target=hub.verify_and_store, daemon=True, args=(
+                        mode, topic, callback, lease, params.get("hub.secret"))).start()
+                elif mode == "publish":
+                    topic = params.get("hub.url") or params.get("hub.topic")
+                    self.send_response(204)
+                    self.end_headers()
+                    threading.Thread(target=hub.publish, args=(topic,), daemon=True).start()
+                else:
+                    self.send_error(400)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), HubHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local WebSub hub stand-in.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8086)
+    parser.add_argument("--max-lease", type=int, default=300, help="Maximum lease granted, in seconds")
+    args = parser.parse_args()
+    hub_server = LocalHub(args.max_lease).start(args.host, args.port)
+    print("WebSub hub stand-in listening on http://%s:%d/" % (args.host, hub_server.server_port))
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass